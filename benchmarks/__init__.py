@@ -0,0 +1 @@
+"""Micro-benchmarks of the request hot path."""
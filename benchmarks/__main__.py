@@ -0,0 +1,112 @@
+"""Run the hot path benchmarks and compare them to the saved baseline.
+
+    python -m benchmarks run [--output FILE] [--rounds 5]
+    python -m benchmarks compare [--baseline FILE] [--threshold 0.25] [--rounds 5]
+
+`compare` exits with status 1 when a case is slower than its baseline by more
+than the threshold, or than its own threshold in `hotpath.THRESHOLDS` if that
+is higher. Cases are compared as multiples of a reference workload timed right
+before them, taking the median of several rounds, so that a busy or different
+machine does not read as a regression. Refresh the baseline with
+`run --output benchmarks/baseline.json` after an intended change.
+"""
+
+import argparse
+import asyncio
+import os
+import platform
+import sys
+import tempfile
+
+# Outside Home Assistant the TTS component imported first runs into the
+# import cycle of websocket_api and persistent_notification, which Home
+# Assistant itself avoids by loading persistent_notification earlier
+from homeassistant.components import persistent_notification  # noqa: F401
+from homeassistant.core import HomeAssistant
+import orjson
+
+from .hotpath import async_run_cases, compare
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+# Rounds per case, the median of which is compared
+DEFAULT_ROUNDS = 5
+
+
+async def _async_run(match: str, rounds: int) -> dict[str, float]:
+    """Run the cases against a Home Assistant instance that is not started."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        try:
+            return await async_run_cases(hass, match, rounds=rounds)
+        finally:
+            await hass.async_stop(force=True)
+
+
+def _print_results(results: dict[str, float]) -> None:
+    width = max(map(len, results), default=0)
+    for name, result in results.items():
+        print(f"{name:<{width}} {result:>12.1f} ns")
+
+
+def main() -> int:
+    """Run the command given on the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--output", help="save the results, e.g. as the new baseline")
+    run.add_argument("-k", "--match", default="", help="only run matching cases")
+    run.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    check = commands.add_parser("compare", help="compare with the baseline")
+    check.add_argument("--baseline", default=BASELINE)
+    check.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    check.add_argument("-k", "--match", default="", help="only run matching cases")
+    check.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    args = parser.parse_args()
+
+    results = asyncio.run(_async_run(args.match, args.rounds))
+
+    if args.command == "run":
+        _print_results(results)
+        if args.output:
+            with open(args.output, "wb") as output:
+                output.write(
+                    orjson.dumps(
+                        {
+                            "python": platform.python_version(),
+                            "machine": platform.machine(),
+                            "results": results,
+                        },
+                        option=orjson.OPT_INDENT_2,
+                    )
+                    + b"\n"
+                )
+        return 0
+
+    with open(args.baseline, "rb") as baseline_file:
+        baseline = orjson.loads(baseline_file.read())["results"]
+    width = max(map(len, results), default=0)
+    slower = 0
+    print(f"{'case':<{width}} {'time':>12}    {'x ref':>7} {'change':>9}")
+    for name, relative, reference, is_slower in compare(
+        results, baseline, args.threshold
+    ):
+        change = (
+            f"{(relative / reference - 1) * 100:+7.1f} %" if reference else "      new"
+        )
+        flag = "  SLOWER" if is_slower else ""
+        print(
+            f"{name:<{width}} {results[name]:>12.1f} ns {relative:>7.2f} "
+            f"{change}{flag}"
+        )
+        slower += is_slower
+    if slower:
+        print(
+            f"{slower} case(s) more than {args.threshold:.0%} slower than the baseline"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
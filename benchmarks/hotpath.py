@@ -0,0 +1,270 @@
+"""Benchmark cases covering the work done for each synthesis request.
+
+Everything up to the HTTP request is measured: resolving the options, looking
+up the voice in catalogs of realistic sizes, building and serializing the
+request body and preparing the headers. Nothing is sent over the network.
+"""
+
+from collections.abc import Awaitable, Callable
+import inspect
+import statistics
+import time
+
+from homeassistant.components.tts import ATTR_VOICE
+from homeassistant.config_entries import SOURCE_USER, ConfigEntry
+from homeassistant.core import HomeAssistant
+import orjson
+
+from custom_components.elevenlabs_tts.const import (
+    CONF_ADAPTIVE_LATENCY,
+    CONF_MODEL,
+    CONF_OPTIMIZE_LATENCY,
+    CONF_PRIORITY,
+    CONF_SIMILARITY,
+    CONF_STABILITY,
+    CONF_STYLE,
+    CONF_USE_SPEAKER_BOOST,
+    DOMAIN,
+)
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.metadata import ModelInfo, VoiceSettings
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+CATALOG_SIZES = (10, 100, 1000, 10000)
+# Catalog size used by the cases that do not depend on it
+DEFAULT_CATALOG_SIZE = 1000
+MESSAGE = "The washing machine is done, please empty it before the laundry smells."
+
+FULL_OPTIONS = {
+    CONF_MODEL: "eleven_multilingual_v2",
+    CONF_STABILITY: 0.4,
+    CONF_SIMILARITY: 0.8,
+    CONF_OPTIMIZE_LATENCY: 2,
+    CONF_STYLE: 0.2,
+    CONF_USE_SPEAKER_BOOST: True,
+}
+
+# {name: (entry options, call options)}, the voice is added to the latter
+OPTION_MIXES = {
+    # Nothing configured, the voice's own defaults apply
+    "defaults": ({}, {}),
+    "entry": (FULL_OPTIONS, {}),
+    "call": ({}, FULL_OPTIONS),
+    "adaptive": ({CONF_ADAPTIVE_LATENCY: True}, {CONF_PRIORITY: "urgent"}),
+}
+
+MODELS = [
+    ModelInfo("eleven_multilingual_v2", True, True, True, 10000),
+    ModelInfo("eleven_turbo_v2_5", True, False, False, 40000),
+    ModelInfo("eleven_flash_v2_5", True, False, False, 40000),
+    ModelInfo("eleven_monolingual_v1", True, False, False, 10000),
+]
+
+Case = Callable[[], object | Awaitable[object]]
+
+# Name of the case the others are compared relative to
+REFERENCE = "reference"
+# Slowdown tolerated per case name prefix, for cases of a microsecond or two
+# whose timings vary more between runs than the default threshold
+THRESHOLDS = {
+    "voice_lookup_": 0.4,
+    "request_body_dumps": 0.4,
+    "request_headers": 0.4,
+}
+
+
+def reference_workload() -> object:
+    """Do fixed pure Python work, timing it tells how fast the machine is now."""
+    values = {f"key{number}": number * 0.5 for number in range(32)}
+    text = ",".join(f"{key}={value}" for key, value in values.items())
+    return sorted(values.items(), key=lambda item: -item[1]), text.split(",")
+
+
+def make_catalog(size: int) -> list[VoiceRecord]:
+    """Return voices shaped like the ones of the API."""
+    return [
+        VoiceRecord(
+            f"{number:020d}",
+            f"Voice {number}",
+            number % 7 == 0,
+            (("accent", "british"), ("age", "young"), ("gender", "female")),
+        )
+        for number in range(size)
+    ]
+
+
+def make_client(
+    hass: HomeAssistant, catalog: list[VoiceRecord], entry_options: dict
+) -> ElevenLabsClient:
+    """Return a client with a filled catalog and metadata cache."""
+    entry = ConfigEntry(
+        version=1,
+        domain=DOMAIN,
+        title="ElevenLabs TTS",
+        data={"api_key": "benchmark_key"},
+        source=SOURCE_USER,
+        options=entry_options,
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices(catalog)
+    # Fill the metadata cache as a running entry has it, without the network
+    client.metadata._models = {model.model_id: model for model in MODELS}
+    client.metadata._models_fetched = time.monotonic()
+    for voice in catalog:
+        client.metadata._voice_settings[voice.voice_id] = (
+            time.monotonic(),
+            VoiceSettings(0.5, 0.75, 0.0, True),
+        )
+    return client
+
+
+def make_cases(hass: HomeAssistant) -> dict[str, Case]:
+    """Return the benchmark cases by name."""
+    cases: dict[str, Case] = {REFERENCE: reference_workload}
+
+    for size in CATALOG_SIZES:
+        catalog = make_catalog(size)
+        client = make_client(hass, catalog, {})
+        last = catalog[-1]
+        cases[f"voice_lookup_name[{size}]"] = (
+            lambda client=client, name=last.name: client.get_voice_by_name_or_id(name)
+        )
+        cases[f"voice_lookup_id[{size}]"] = (
+            lambda client=client, voice_id=last.voice_id: (
+                client.get_voice_by_name_or_id(voice_id)
+            )
+        )
+
+    catalog = make_catalog(DEFAULT_CATALOG_SIZE)
+    voice = catalog[len(catalog) // 2].name
+    for mix, (entry_options, call_options) in OPTION_MIXES.items():
+        client = make_client(hass, catalog, entry_options)
+        options = call_options | {ATTR_VOICE: voice}
+        cases[f"tts_options[{mix}]"] = (
+            lambda client=client, options=options: client.get_tts_options(options)
+        )
+        cases[f"build_request[{mix}]"] = (
+            lambda client=client, options=options: client.build_tts_request(
+                MESSAGE, options
+            )
+        )
+
+    client = make_client(hass, catalog, {})
+    client.pronunciation_locators = [
+        {"pronunciation_dictionary_id": "a" * 20, "version_id": "b" * 20}
+    ]
+    body = {
+        "text": MESSAGE,
+        "model_id": "eleven_multilingual_v2",
+        "voice_settings": {
+            "stability": 0.5,
+            "similarity_boost": 0.75,
+            "style": 0.0,
+            "use_speaker_boost": True,
+        },
+        "pronunciation_dictionary_locators": client.pronunciation_locators,
+    }
+    cases["request_body_dumps"] = lambda: orjson.dumps(body)
+    cases["request_headers"] = lambda: client.get_headers("override_key", audio=True)
+    return cases
+
+
+async def _async_time(case: Case, number: int, is_async: bool) -> float:
+    """Return the seconds taken by calling a case a number of times."""
+    if is_async:
+        start = time.perf_counter()
+        for _ in range(number):
+            await case()
+        return time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(number):
+        case()
+    return time.perf_counter() - start
+
+
+async def async_measure(case: Case, min_time: float = 0.05, repeat: int = 3) -> float:
+    """Return the best time of one call of a case, in seconds.
+
+    Like `timeit`, the number of calls per round grows until a round takes
+    `min_time`, and the fastest of `repeat` rounds is kept.
+    """
+    is_async = inspect.isawaitable(first := case())
+    if is_async:
+        await first
+    number = 1
+    while (elapsed := await _async_time(case, number, is_async)) < min_time:
+        number *= 10 if elapsed < min_time / 10 else 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, await _async_time(case, number, is_async))
+    return best / number
+
+
+async def async_run_cases(
+    hass: HomeAssistant,
+    match: str = "",
+    min_time: float = 0.05,
+    repeat: int = 3,
+    rounds: int = 5,
+) -> dict[str, float]:
+    """Run the cases whose name contains `match`, return nanoseconds per call.
+
+    Each case is timed in `rounds` rounds, each right after timing the
+    reference, and the median of its times relative to the reference is kept.
+    A slow moment of the machine then only shifts one round, and the case and
+    its reference alike. The reference reported is the median of all its
+    rounds, and every case is reported at its median relative time to it.
+    """
+    cases = make_cases(hass)
+    references: list[float] = []
+    relative: dict[str, float] = {}
+    for name, case in cases.items():
+        if name == REFERENCE or match not in name:
+            continue
+        ratios = []
+        for _ in range(rounds):
+            reference = await async_measure(cases[REFERENCE], min_time, repeat)
+            references.append(reference)
+            ratios.append(await async_measure(case, min_time, repeat) / reference)
+        relative[name] = statistics.median(ratios)
+    if not references:
+        references.append(await async_measure(cases[REFERENCE], min_time, repeat))
+    reference = statistics.median(references) * 1e9
+    return {REFERENCE: round(reference, 1)} | {
+        name: round(ratio * reference, 1) for name, ratio in relative.items()
+    }
+
+
+def threshold_of(name: str, default: float) -> float:
+    """Return the slowdown tolerated for a case, above its run to run noise."""
+    for prefix, threshold in THRESHOLDS.items():
+        if name.startswith(prefix):
+            return max(threshold, default)
+    return default
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float
+) -> list[tuple[str, float, float | None, bool]]:
+    """Return (name, relative time, baseline relative time, slower) per case.
+
+    Times are relative to the reference case of the same run, so that the
+    comparison holds when the machine is busier or faster than when the
+    baseline was recorded. A case is slower when it takes more than
+    `threshold` (0.25 for 25 %) longer than its baseline, or more than its
+    own threshold in THRESHOLDS if that is higher. Cases without a baseline
+    are never slower.
+    """
+    rows = []
+    for name, result in results.items():
+        if name == REFERENCE:
+            continue
+        relative = result / results[REFERENCE]
+        reference = None
+        if name in baseline:
+            reference = baseline[name] / baseline[REFERENCE]
+        slower = reference is not None and relative > reference * (
+            1 + threshold_of(name, threshold)
+        )
+        rows.append((name, relative, reference, slower))
+    return rows
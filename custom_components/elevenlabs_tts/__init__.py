@@ -1,14 +1,63 @@
 """ElevenLabs TTS Custom Integration"""
 
 import logging
+import os
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_API_KEY
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
-import requests
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
+from homeassistant.helpers.event import async_track_time_interval
+from httpx import HTTPError, HTTPStatusError
+import voluptuous as vol
 
-from .const import DEFAULT_VOICE, DOMAIN, PLATFORMS
+from .cache import (
+    AudioCache,
+    CacheBackend,
+    LayeredCache,
+    LocalCacheBackend,
+    MemoryCacheBackend,
+    RemoteCacheBackend,
+    available_memory,
+)
+from .const import (
+    CACHE_COMPACT_INTERVAL,
+    CONF_CACHE_SIZE,
+    CONF_HISTORY_REUSE,
+    CONF_LONG_FORM,
+    CONF_MEMORY_CACHE_SIZE,
+    CONF_MIN_FREE_MEMORY,
+    CONF_OFFLINE_SIMILARITY,
+    CONF_PRONUNCIATION_FILE,
+    CONF_REMOTE_CACHE_TIMEOUT,
+    CONF_REMOTE_CACHE_TOKEN,
+    CONF_REMOTE_CACHE_URL,
+    CONF_TRACE_FILE,
+    CONF_TRACE_OPENTELEMETRY,
+    DATA_VOICE_CATALOG,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_HISTORY_REUSE,
+    DEFAULT_LONG_FORM,
+    DEFAULT_MEMORY_CACHE_SIZE,
+    DEFAULT_MIN_FREE_MEMORY,
+    DEFAULT_OFFLINE_SIMILARITY,
+    DEFAULT_REMOTE_CACHE_TIMEOUT,
+    DEFAULT_VOICE,
+    DOMAIN,
+    ENDPOINT_PROBE_INTERVAL,
+    HISTORY_SYNC_INTERVAL,
+    LONG_FORM_JOB_MAX_AGE,
+    MEMORY_CHECK_INTERVAL,
+    PLATFORMS,
+)
 from .elevenlabs import ElevenLabsClient
+from .history import HistoryIndex
+from .longform import JOBS_FOLDER, LongFormJobs
+from .phrases import PHRASE_FILE, PhraseIndex
+from .postprocess import async_shutdown_process_pool
+from .pronunciation import PronunciationDictionaries
+from .stream import async_shutdown_streams
+from .tracing import JsonlTraceHook, OpenTelemetryTraceHook
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,20 +69,50 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     client = ElevenLabsClient(hass, entry)
 
     hass.data[DOMAIN][entry.entry_id] = client
+    _setup_endpoint_probes(hass, entry, client)
 
-    try:
-        await client.get_voices()
-    except requests.exceptions.HTTPError as err:
-        if err.response.status_code == 401:
-            return False
-        raise ConfigEntryNotReady from err
-    except Exception as err:
-        raise ConfigEntryNotReady from err
+    # Reuse the catalog downloaded while the config flow validated the key, the
+    # flow drops it once it is removed
+    catalog = next(
+        (
+            voices
+            for api_key, voices in hass.data[DOMAIN]
+            .get(DATA_VOICE_CATALOG, {})
+            .values()
+            if api_key == entry.data[CONF_API_KEY]
+        ),
+        None,
+    )
+    if catalog is not None:
+        _LOGGER.debug("Using voice catalog fetched by the config flow")
+        client.set_voices(catalog)
+    else:
+        try:
+            await client.get_voices()
+        except HTTPStatusError as err:
+            if err.response.status_code == 401:
+                return False
+            raise ConfigEntryNotReady from err
+        except Exception as err:
+            raise ConfigEntryNotReady from err
 
     voice = await client.get_voice_by_name_or_id(DEFAULT_VOICE)
     if not voice:
         return False
 
+    try:
+        await client.metadata.async_refresh_models()
+    except HTTPError as err:
+        # Requests are built without model capabilities until the next refresh
+        _LOGGER.warning("Could not fetch the ElevenLabs models: %s", err)
+
+    await _async_setup_audio_cache(hass, entry, client)
+    await _async_setup_history(hass, entry, client)
+    await _async_setup_long_form(hass, entry, client)
+    _setup_tracing(hass, entry, client)
+    await _async_sync_pronunciation(hass, entry)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
     await hass.config_entries.async_forward_entry_setups(
         entry,
         PLATFORMS,
@@ -42,6 +121,159 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+def _setup_endpoint_probes(
+    hass: HomeAssistant, entry: ConfigEntry, client: ElevenLabsClient
+) -> None:
+    """Measure the latency of the configured endpoints now and then regularly."""
+    if len(client.endpoints) < 2:
+        return
+
+    async def _async_probe(_now=None) -> None:
+        await client.endpoints.async_probe(client.session)
+
+    entry.async_create_background_task(
+        hass, _async_probe(), "elevenlabs_tts endpoint probe"
+    )
+    entry.async_on_unload(
+        async_track_time_interval(hass, _async_probe, ENDPOINT_PROBE_INTERVAL)
+    )
+
+
+async def _async_setup_audio_cache(
+    hass: HomeAssistant, entry: ConfigEntry, client: ElevenLabsClient
+) -> None:
+    """Open the configured audio cache backends and schedule compaction."""
+    backends: list[CacheBackend] = []
+
+    if memory_size := entry.options.get(
+        CONF_MEMORY_CACHE_SIZE, DEFAULT_MEMORY_CACHE_SIZE
+    ):
+        memory = MemoryCacheBackend(int(memory_size * 1024**2))
+        backends.append(memory)
+        client.memory_cache = memory
+        min_free = (
+            entry.options.get(CONF_MIN_FREE_MEMORY, DEFAULT_MIN_FREE_MEMORY) * 1024**2
+        )
+
+        async def _async_check_memory(_now) -> None:
+            available = await hass.async_add_executor_job(available_memory)
+            if available is not None:
+                memory.adjust_to_memory(available, min_free)
+
+        entry.async_on_unload(
+            async_track_time_interval(hass, _async_check_memory, MEMORY_CHECK_INTERVAL)
+        )
+
+    if cache_size := entry.options.get(CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE):
+        cache_path = hass.config.path(DOMAIN, entry.entry_id)
+        cache = await hass.async_add_executor_job(
+            AudioCache, cache_path, cache_size * 1024**2
+        )
+        backends.append(LocalCacheBackend(hass, cache))
+
+        # Phrases are only indexed for the local cache, it works offline
+        if entry.options.get(CONF_OFFLINE_SIMILARITY, DEFAULT_OFFLINE_SIMILARITY):
+            phrases = PhraseIndex(os.path.join(cache_path, PHRASE_FILE))
+            await hass.async_add_executor_job(phrases.load, cache.keys())
+            client.phrases = phrases
+
+        async def _async_compact(_now) -> None:
+            # The check runs in the executor too, clips are stored from there
+            await hass.async_add_executor_job(cache.compact)
+
+        entry.async_on_unload(
+            async_track_time_interval(hass, _async_compact, CACHE_COMPACT_INTERVAL)
+        )
+
+    if remote_url := entry.options.get(CONF_REMOTE_CACHE_URL):
+        backends.append(
+            RemoteCacheBackend(
+                hass,
+                remote_url,
+                entry.options.get(
+                    CONF_REMOTE_CACHE_TIMEOUT, DEFAULT_REMOTE_CACHE_TIMEOUT
+                ),
+                entry.options.get(CONF_REMOTE_CACHE_TOKEN),
+            )
+        )
+
+    if len(backends) == 1:
+        client.audio_cache = backends[0]
+    elif backends:
+        client.audio_cache = LayeredCache(backends)
+
+
+async def _async_setup_history(
+    hass: HomeAssistant, entry: ConfigEntry, client: ElevenLabsClient
+) -> None:
+    """Load the history index, then sync it in the background and regularly."""
+    if not entry.options.get(CONF_HISTORY_REUSE, DEFAULT_HISTORY_REUSE):
+        return
+    history = HistoryIndex(client, entry.entry_id)
+    await history.async_load()
+    client.history = history
+
+    async def _async_sync(_now=None) -> None:
+        try:
+            await history.async_sync()
+        except HTTPError as err:
+            _LOGGER.warning("Could not sync the ElevenLabs history: %s", err)
+
+    entry.async_create_background_task(
+        hass, _async_sync(), "elevenlabs_tts history sync"
+    )
+    entry.async_on_unload(
+        async_track_time_interval(hass, _async_sync, HISTORY_SYNC_INTERVAL)
+    )
+
+
+async def _async_setup_long_form(
+    hass: HomeAssistant, entry: ConfigEntry, client: ElevenLabsClient
+) -> None:
+    """Keep the chunks of long messages, dropping jobs abandoned long ago."""
+    jobs = LongFormJobs(hass.config.path(DOMAIN, entry.entry_id, JOBS_FOLDER))
+    await hass.async_add_executor_job(jobs.purge, LONG_FORM_JOB_MAX_AGE.total_seconds())
+    # Jobs left from before the option was turned off are still purged
+    if entry.options.get(CONF_LONG_FORM, DEFAULT_LONG_FORM):
+        client.long_form = jobs
+
+
+def _setup_tracing(
+    hass: HomeAssistant, entry: ConfigEntry, client: ElevenLabsClient
+) -> None:
+    """Register the configured trace hooks."""
+    if path := entry.options.get(CONF_TRACE_FILE):
+        client.tracer.hooks.append(JsonlTraceHook(hass, hass.config.path(path)))
+    if entry.options.get(CONF_TRACE_OPENTELEMETRY):
+        try:
+            client.tracer.hooks.append(OpenTelemetryTraceHook())
+        except ImportError:
+            _LOGGER.warning(
+                "Install the opentelemetry-api package to export traces to OpenTelemetry"
+            )
+
+
+async def _async_sync_pronunciation(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Sync the pronunciation dictionaries from the configured lexicon file."""
+    client: ElevenLabsClient = hass.data[DOMAIN][entry.entry_id]
+    path = entry.options.get(CONF_PRONUNCIATION_FILE)
+    if not path:
+        client.pronunciation_locators = []
+        return
+
+    dictionaries = PronunciationDictionaries(hass, client, entry.entry_id, path)
+    try:
+        await dictionaries.async_sync()
+    except (HomeAssistantError, HTTPError, OSError, vol.Invalid) as err:
+        # Keep speaking with the dictionaries from the last successful sync
+        _LOGGER.warning("Could not sync pronunciation dictionaries: %s", err)
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so changed options take effect."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload Wyoming."""
     unload_ok = await hass.config_entries.async_unload_platforms(
@@ -49,6 +281,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         PLATFORMS,
     )
     if unload_ok:
-        del hass.data[DOMAIN][entry.entry_id]
+        client: ElevenLabsClient = hass.data[DOMAIN].pop(entry.entry_id)
+        if client.audio_cache is not None:
+            await client.audio_cache.async_close()
+        await hass.async_add_executor_job(client.tracer.close)
+        # The worker processes and streams are only kept while an entry is loaded
+        if not any(
+            other.entry_id in hass.data[DOMAIN]
+            for other in hass.config_entries.async_entries(DOMAIN)
+        ):
+            async_shutdown_process_pool(hass)
+            async_shutdown_streams(hass)
 
     return unload_ok
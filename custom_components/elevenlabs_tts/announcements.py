@@ -0,0 +1,165 @@
+"""Back to back playback of queued announcements."""
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+import logging
+
+from homeassistant.components import media_source
+from homeassistant.components.media_player import (
+    ATTR_MEDIA_CONTENT_ID,
+    ATTR_MEDIA_CONTENT_TYPE,
+    DOMAIN as MEDIA_PLAYER_DOMAIN,
+    SERVICE_PLAY_MEDIA,
+    MediaPlayerState,
+    MediaType,
+)
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DEFAULT_LOOKAHEAD
+
+_LOGGER = logging.getLogger(__name__)
+
+PLAYING_STATES = {MediaPlayerState.PLAYING, MediaPlayerState.BUFFERING}
+# Seconds to wait for a media player to start playing a clip
+START_TIMEOUT = 10
+# Seconds to wait for a media player to finish a clip
+FINISH_TIMEOUT = 600
+
+
+class AnnouncementQueue:
+    """Play announcements on media players one after the other.
+
+    Clips are synthesized up to `lookahead` announcements ahead of the one
+    playing, so each one is ready when the previous clip ends. Announcements
+    added while the queue is playing are appended to it.
+    """
+
+    def __init__(self, hass: HomeAssistant, entity_ids: list[str]) -> None:
+        """Initialize the queue."""
+        self.hass = hass
+        self.entity_ids = entity_ids
+        self.lookahead = DEFAULT_LOOKAHEAD
+        # Media source IDs not synthesized yet
+        self._waiting: deque[str] = deque()
+        # Media source IDs being synthesized after the current one, with their
+        # synthesis
+        self._prepared: deque[tuple[str, asyncio.Task]] = deque()
+        self._worker: asyncio.Task | None = None
+
+    @callback
+    def async_add(self, media_source_ids: list[str]) -> None:
+        """Append announcements and start playing if idle."""
+        self._waiting.extend(media_source_ids)
+        self._fill()
+        if self._worker is None or self._worker.done():
+            self._worker = self.hass.async_create_background_task(
+                self._async_run(), f"elevenlabs_tts announcements {self.entity_ids}"
+            )
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop the queued announcements and stop the worker."""
+        self._waiting.clear()
+        while self._prepared:
+            self._prepared.popleft()[1].cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+
+    def _fill(self) -> None:
+        """Start synthesizing announcements up to the lookahead."""
+        while self._waiting and len(self._prepared) < self.lookahead:
+            self._prepared.append(self._synthesize(self._waiting.popleft()))
+
+    def _synthesize(self, media_source_id: str) -> tuple[str, asyncio.Task]:
+        """Start synthesizing an announcement."""
+        return (
+            media_source_id,
+            self.hass.async_create_background_task(
+                media_source.async_resolve_media(self.hass, media_source_id, None),
+                "elevenlabs_tts announcement synthesis",
+            ),
+        )
+
+    async def _async_run(self) -> None:
+        """Play the announcements as they become ready."""
+        while self._prepared or self._waiting:
+            if self._prepared:
+                media_source_id, synthesis = self._prepared.popleft()
+            else:
+                media_source_id, synthesis = self._synthesize(self._waiting.popleft())
+            # The following announcements are synthesized while this one plays
+            self._fill()
+            try:
+                await synthesis
+            except Exception as err:  # pylint: disable=broad-except
+                # One failed announcement must not drop the rest of the queue
+                _LOGGER.warning("Skipping announcement %s: %s", media_source_id, err)
+                continue
+
+            try:
+                await self._async_play(media_source_id)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Could not play announcement %s on %s",
+                    media_source_id,
+                    self.entity_ids,
+                )
+
+    async def _async_play(self, media_source_id: str) -> None:
+        """Play an announcement once the media players are idle."""
+        await self._async_wait_for(self._is_idle, FINISH_TIMEOUT)
+        _LOGGER.debug("Playing %s on %s", media_source_id, self.entity_ids)
+        await self.hass.services.async_call(
+            MEDIA_PLAYER_DOMAIN,
+            SERVICE_PLAY_MEDIA,
+            {
+                ATTR_ENTITY_ID: self.entity_ids,
+                ATTR_MEDIA_CONTENT_ID: media_source_id,
+                ATTR_MEDIA_CONTENT_TYPE: MediaType.MUSIC,
+            },
+            blocking=True,
+        )
+        await self._async_wait_for(self._is_playing, START_TIMEOUT)
+
+    def _states(self) -> list[State]:
+        """Return the current states of the media players."""
+        return [
+            state
+            for entity_id in self.entity_ids
+            if (state := self.hass.states.get(entity_id)) is not None
+        ]
+
+    def _is_idle(self) -> bool:
+        """Return True if no media player is playing."""
+        return all(state.state not in PLAYING_STATES for state in self._states())
+
+    def _is_playing(self) -> bool:
+        """Return True if a media player started playing."""
+        return any(state.state in PLAYING_STATES for state in self._states())
+
+    async def _async_wait_for(
+        self, condition: Callable[[], bool], timeout: float
+    ) -> None:
+        """Wait until the media players meet a condition, or the timeout."""
+        if condition():
+            return
+        met = asyncio.Event()
+
+        @callback
+        def _async_state_changed(event: Event) -> None:
+            if condition():
+                met.set()
+
+        unsub = async_track_state_change_event(
+            self.hass, self.entity_ids, _async_state_changed
+        )
+        try:
+            async with asyncio.timeout(timeout):
+                await met.wait()
+        except TimeoutError:
+            _LOGGER.debug("Media players %s did not change state", self.entity_ids)
+        finally:
+            unsub()
@@ -0,0 +1,124 @@
+"""Circuit breaker around requests to ElevenLabs."""
+
+from collections import deque
+from collections.abc import Callable
+import logging
+import time
+
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Number of recent requests the failure and slow rates are computed over
+BREAKER_WINDOW = 20
+# Requests needed in the window before the breaker may open
+BREAKER_MIN_REQUESTS = 5
+# Share of failed requests in the window that opens the breaker
+BREAKER_FAILURE_RATE = 0.5
+# Requests taking longer than this many seconds to return their first audio
+# breach the latency objective
+BREAKER_SLOW_SECONDS = 10.0
+# Share of slow requests in the window that opens the breaker
+BREAKER_SLOW_RATE = 0.5
+# Seconds the breaker stays open before letting a probe request through
+BREAKER_RESET_SECONDS = 30.0
+
+
+class CircuitOpenError(HomeAssistantError):
+    """Error to indicate requests are not sent while ElevenLabs is degraded."""
+
+
+class CircuitBreaker:
+    """Stop sending requests while ElevenLabs fails or is too slow.
+
+    The breaker opens when too many recent requests failed or breached the
+    latency objective. While open, requests are refused without waiting. After
+    a while a single probe is let through (half open): if it succeeds the
+    breaker closes again, otherwise it opens for another period.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the breaker."""
+        self.state = STATE_CLOSED
+        self._listeners: list[Callable[[str], None]] = []
+        # True for a failed or slow request, False for a good one
+        self._failures: deque[bool] = deque(maxlen=BREAKER_WINDOW)
+        self._slow: deque[bool] = deque(maxlen=BREAKER_WINDOW)
+        self._opened_at = 0.0
+        self._probing = False
+
+    def async_add_listener(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """Call a listener on every state change, return a function removing it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _set_state(self, state: str) -> None:
+        """Change state and notify the listeners."""
+        if state == self.state:
+            return
+        _LOGGER.info("ElevenLabs circuit breaker is now %s", state)
+        self.state = state
+        for listener in self._listeners:
+            listener(state)
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self._opened_at < BREAKER_RESET_SECONDS:
+                return False
+            self._set_state(STATE_HALF_OPEN)
+        # Half open, only one probe at a time
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self, seconds: float) -> None:
+        """Record a request that succeeded, with its seconds to first audio."""
+        slow = seconds > BREAKER_SLOW_SECONDS
+        self._record(False, slow)
+
+    def record_failure(self) -> None:
+        """Record a failed request."""
+        self._record(True, False)
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        """Update the window and the state after a request."""
+        if self.state == STATE_HALF_OPEN:
+            self._probing = False
+            if failed or slow:
+                self._open()
+            else:
+                self._failures.clear()
+                self._slow.clear()
+                self._set_state(STATE_CLOSED)
+            return
+        if self.state == STATE_OPEN:
+            # A request sent before the breaker opened
+            return
+
+        self._failures.append(failed)
+        self._slow.append(slow)
+        count = len(self._failures)
+        if count < BREAKER_MIN_REQUESTS:
+            return
+        if (
+            sum(self._failures) / count >= BREAKER_FAILURE_RATE
+            or sum(self._slow) / count >= BREAKER_SLOW_RATE
+        ):
+            self._open()
+
+    def release_probe(self) -> None:
+        """Let another probe through when one ended without an outcome."""
+        self._probing = False
+
+    def _open(self) -> None:
+        """Open the breaker."""
+        self._opened_at = time.monotonic()
+        self._set_state(STATE_OPEN)
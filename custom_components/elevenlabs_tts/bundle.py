@@ -0,0 +1,108 @@
+"""Export and import the audio cache as a content-addressed bundle.
+
+A bundle is an uncompressed tar file. Its first member is `manifest.json`,
+mapping each cache key to the SHA-256 of its clip. The clips follow as
+`blobs/<sha256>`, each stored once however many keys share it. Members are
+written and read in order, so neither side holds more than one clip in memory.
+
+The export reads every clip once. Space for the manifest is reserved before
+the clips are written and filled in at the end, padded with spaces that JSON
+ignores.
+"""
+
+import hashlib
+import io
+import logging
+import re
+import tarfile
+import time
+
+import orjson
+
+from .cache import AudioCache
+
+_LOGGER = logging.getLogger(__name__)
+
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+BLOB_PREFIX = "blobs/"
+BLOB_NAME = re.compile(r"^blobs/([0-9a-f]{64})$")
+
+
+def _add_member(archive: tarfile.TarFile, name: str, content: bytes) -> None:
+    """Add an in-memory file to the archive."""
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    info.mtime = int(time.time())
+    archive.addfile(info, io.BytesIO(content))
+
+
+def export_bundle(cache: AudioCache, path: str) -> int:
+    """Write every cached clip to a bundle and return the number of clips."""
+    keys = list(cache.keys())
+    # Every digest has the same length, so this is the largest manifest
+    reserved = len(
+        orjson.dumps(
+            {
+                "version": BUNDLE_VERSION,
+                "clips": {key.hex(): "0" * 64 for key in keys},
+            }
+        )
+    )
+    # {key hex: blob sha256}
+    clips: dict[str, str] = {}
+    blobs: set[str] = set()
+    with open(path, "wb") as file:
+        with tarfile.open(fileobj=file, mode="w") as archive:
+            _add_member(archive, MANIFEST_NAME, b" " * reserved)
+            for key in keys:
+                if (audio := cache.get(key, touch=False)) is None:
+                    continue
+                digest = hashlib.sha256(audio).hexdigest()
+                clips[key.hex()] = digest
+                if digest not in blobs:
+                    blobs.add(digest)
+                    _add_member(archive, f"{BLOB_PREFIX}{digest}", audio)
+
+        manifest = orjson.dumps({"version": BUNDLE_VERSION, "clips": clips})
+        # The manifest is the first member, its data follows a one-block header
+        file.seek(tarfile.BLOCKSIZE)
+        file.write(manifest.ljust(reserved))
+
+    _LOGGER.info(
+        "Exported %s cached clips as %s blobs to %s", len(clips), len(blobs), path
+    )
+    return len(clips)
+
+
+def import_bundle(cache: AudioCache, path: str) -> int:
+    """Add the clips of a bundle to the cache and return the number added."""
+    imported = 0
+    with tarfile.open(path, "r|") as archive:
+        member = archive.next()
+        if member is None or member.name != MANIFEST_NAME:
+            raise ValueError(f"{path} does not start with a bundle manifest")
+        manifest = orjson.loads(archive.extractfile(member).read())
+        if manifest.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle version {manifest.get('version')}")
+
+        # {blob sha256: [key, ...]}
+        keys_by_blob: dict[str, list[bytes]] = {}
+        for key, digest in manifest["clips"].items():
+            keys_by_blob.setdefault(digest, []).append(bytes.fromhex(key))
+
+        for member in archive:
+            match = BLOB_NAME.match(member.name)
+            if not member.isfile() or not match:
+                _LOGGER.debug("Skipping unexpected bundle member %s", member.name)
+                continue
+            audio = archive.extractfile(member).read()
+            if hashlib.sha256(audio).hexdigest() != match.group(1):
+                _LOGGER.warning("Skipping corrupted blob %s", member.name)
+                continue
+            for key in keys_by_blob.get(match.group(1), []):
+                cache.put(key, audio)
+                imported += 1
+
+    _LOGGER.info("Imported %s clips from %s", imported, path)
+    return imported
@@ -0,0 +1,615 @@
+"""Persistent audio cache for synthesized clips."""
+
+from abc import ABC, abstractmethod
+import asyncio
+from collections import OrderedDict
+from collections.abc import Iterator
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.httpx_client import get_async_client
+import httpx
+import orjson
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+INDEX_FILE = "index.bin"
+INDEX_MAGIC = b"ELTTSIDX"
+INDEX_VERSION = 1
+# magic, version, capacity, count (live entries), used (live + tombstones)
+HEADER = struct.Struct("<8sIIII")
+HEADER_SIZE = 64
+# key, segment, offset of the clip in the segment, clip size, last access time
+SLOT = struct.Struct("<16sIQII")
+KEY_SIZE = 16
+EMPTY_KEY = bytes(KEY_SIZE)
+TOMBSTONE = 0xFFFFFFFF
+MIN_CAPACITY = 1024
+MAX_LOAD = 0.7
+
+SEGMENT_PREFIX = "segment_"
+SEGMENT_SUFFIX = ".dat"
+SEGMENT_SIZE = 32 * 1024 * 1024
+# Each clip in a segment is preceded by its key and size, so segments can be
+# walked and validated without the index
+RECORD = struct.Struct("<16sI")
+
+# Share of the memory tier kept for clips that were read again since cached
+PROTECTED_SHARE = 0.8
+
+
+def cache_key(endpoint: str, data: dict, params: dict) -> bytes:
+    """Return the canonical cache key for a TTS request."""
+    payload = orjson.dumps([endpoint, data, params], option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=KEY_SIZE).digest()
+
+
+class AudioCache:
+    """A disk cache of audio clips with a fixed-record, memory-mapped index.
+
+    The index is an open-addressing hash table stored in one file and mapped
+    into memory, so opening the cache does not depend on the number of clips
+    and lookups create no per-entry Python objects. Clips are appended to
+    segment files. `compact` drops the oldest segment once the cache is over
+    its size limit, copying forward clips that were read since that segment
+    was written.
+
+    All methods do blocking I/O and are safe to call from executor threads.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        """Open or create the cache in a directory."""
+        self._path = path
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        # {segment number: size in bytes}, segment files are few and large
+        self._segments: dict[int, int] = {}
+        for name in os.listdir(path):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                number = int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+                self._segments[number] = os.path.getsize(self._segment_path(number))
+        self._fds: dict[int, int] = {}
+        self._active = max(self._segments, default=0)
+        self._segments.setdefault(self._active, 0)
+
+        self._index_file = None
+        self._index: mmap.mmap | None = None
+        self._open_index()
+
+    def _segment_path(self, number: int) -> str:
+        """Return the path of a segment file."""
+        return os.path.join(self._path, f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}")
+
+    def _segment_fd(self, number: int) -> int:
+        """Return an open file descriptor for a segment."""
+        if number not in self._fds:
+            self._fds[number] = os.open(
+                self._segment_path(number), os.O_RDWR | os.O_CREAT | os.O_APPEND
+            )
+        return self._fds[number]
+
+    def _open_index(self) -> None:
+        """Map the index file, creating an empty one if needed."""
+        index_path = os.path.join(self._path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as file:
+                magic, version, capacity, _, _ = HEADER.unpack(file.read(HEADER.size))
+            expected = HEADER_SIZE + capacity * SLOT.size
+            if (
+                magic != INDEX_MAGIC
+                or version != INDEX_VERSION
+                or os.path.getsize(index_path) != expected
+            ):
+                _LOGGER.warning("Audio cache index is invalid, starting empty")
+                self._write_empty_index(index_path, MIN_CAPACITY)
+        else:
+            self._write_empty_index(index_path, MIN_CAPACITY)
+
+        self._index_file = open(index_path, "r+b")
+        self._index = mmap.mmap(self._index_file.fileno(), 0)
+
+    @staticmethod
+    def _write_empty_index(index_path: str, capacity: int) -> None:
+        """Write an index file with no entries."""
+        with open(index_path, "wb") as file:
+            file.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, capacity, 0, 0))
+            file.truncate(HEADER_SIZE + capacity * SLOT.size)
+
+    def _header(self) -> tuple[int, int, int]:
+        """Return the capacity, count and used slots of the index."""
+        return HEADER.unpack_from(self._index, 0)[2:]
+
+    def _set_header(self, capacity: int, count: int, used: int) -> None:
+        """Update the index header."""
+        HEADER.pack_into(
+            self._index, 0, INDEX_MAGIC, INDEX_VERSION, capacity, count, used
+        )
+
+    def _find(self, key: bytes) -> tuple[int, bool]:
+        """Return the slot offset for a key and whether the key is present.
+
+        When the key is absent, the offset is the first free slot on its probe
+        sequence, reusing a tombstone if one was passed.
+        """
+        capacity = self._header()[0]
+        slot = int.from_bytes(key[:8], "little") & (capacity - 1)
+        reusable = None
+        while True:
+            offset = HEADER_SIZE + slot * SLOT.size
+            slot_key = self._index[offset : offset + KEY_SIZE]
+            if slot_key == key:
+                segment = SLOT.unpack_from(self._index, offset)[1]
+                if segment != TOMBSTONE:
+                    return offset, True
+            elif slot_key == EMPTY_KEY:
+                return (offset if reusable is None else reusable), False
+            if reusable is None and slot_key != EMPTY_KEY:
+                segment = SLOT.unpack_from(self._index, offset)[1]
+                if segment == TOMBSTONE:
+                    reusable = offset
+            slot = (slot + 1) & (capacity - 1)
+
+    def _remove(self, offset: int) -> None:
+        """Turn an index slot into a tombstone."""
+        key = self._index[offset : offset + KEY_SIZE]
+        SLOT.pack_into(self._index, offset, key, TOMBSTONE, 0, 0, 0)
+        capacity, count, used = self._header()
+        self._set_header(capacity, count - 1, used)
+
+    def _grow(self) -> None:
+        """Rebuild the index with room for more entries, dropping tombstones."""
+        capacity, count, _ = self._header()
+        new_capacity = capacity
+        while count + 1 > new_capacity * MAX_LOAD / 2:
+            new_capacity *= 2
+        _LOGGER.debug("Resizing audio cache index to %s slots", new_capacity)
+
+        old = self._index
+        old_file = self._index_file
+        index_path = os.path.join(self._path, INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        self._write_empty_index(tmp_path, new_capacity)
+        with open(tmp_path, "r+b") as file, mmap.mmap(file.fileno(), 0) as new:
+            self._index = new
+            for slot in range(capacity):
+                entry = SLOT.unpack_from(old, HEADER_SIZE + slot * SLOT.size)
+                if entry[0] == EMPTY_KEY or entry[1] == TOMBSTONE:
+                    continue
+                offset, _ = self._find(entry[0])
+                SLOT.pack_into(new, offset, *entry)
+            self._set_header(new_capacity, count, count)
+            new.flush()
+        old.close()
+        old_file.close()
+        os.replace(tmp_path, index_path)
+        self._open_index()
+
+    def get(self, key: bytes, touch: bool = True) -> bytes | None:
+        """Return a cached clip, or None on a miss.
+
+        Unless `touch` is False, the read counts as a use of the clip when
+        deciding what compaction evicts.
+        """
+        with self._lock:
+            offset, found = self._find(key)
+            if not found:
+                return None
+            _, segment, position, size, _ = SLOT.unpack_from(self._index, offset)
+            if touch:
+                SLOT.pack_into(
+                    self._index, offset, key, segment, position, size, int(time.time())
+                )
+            fd = self._segment_fd(segment)
+
+            record = os.pread(fd, RECORD.size + size, position - RECORD.size)
+            if len(record) != RECORD.size + size or RECORD.unpack_from(record) != (
+                key,
+                size,
+            ):
+                # The clip did not make it to disk, forget about it
+                _LOGGER.debug("Dropping damaged audio cache entry")
+                self._remove(offset)
+                return None
+        return record[RECORD.size :]
+
+    def put(self, key: bytes, audio: bytes) -> None:
+        """Store a clip, replacing any clip stored under the same key."""
+        with self._lock:
+            self._append(key, audio, int(time.time()))
+
+    def _append(self, key: bytes, audio: bytes, last_access: int) -> None:
+        """Append a clip to the active segment and point the index at it."""
+        if self._segments[self._active] >= SEGMENT_SIZE:
+            self._active += 1
+            self._segments[self._active] = 0
+
+        fd = self._segment_fd(self._active)
+        position = self._segments[self._active] + RECORD.size
+        os.write(fd, RECORD.pack(key, len(audio)) + audio)
+        self._segments[self._active] = position + len(audio)
+
+        capacity, count, used = self._header()
+        if used + 1 > capacity * MAX_LOAD:
+            self._grow()
+            capacity, count, used = self._header()
+
+        offset, found = self._find(key)
+        if not found:
+            reused = self._index[offset : offset + KEY_SIZE] != EMPTY_KEY
+            self._set_header(capacity, count + 1, used if reused else used + 1)
+        SLOT.pack_into(
+            self._index, offset, key, self._active, position, len(audio), last_access
+        )
+
+    def keys(self) -> Iterator[bytes]:
+        """Yield the keys of the clips cached when iteration started."""
+        with self._lock:
+            capacity = self._header()[0]
+            snapshot = self._index[:]
+        for slot in range(capacity):
+            key, segment = SLOT.unpack_from(snapshot, HEADER_SIZE + slot * SLOT.size)[
+                :2
+            ]
+            if key != EMPTY_KEY and segment != TOMBSTONE:
+                yield key
+
+    @property
+    def size(self) -> int:
+        """Return the bytes used by all segments."""
+        with self._lock:
+            return sum(self._segments.values())
+
+    def __len__(self) -> int:
+        """Return the number of cached clips."""
+        with self._lock:
+            return self._header()[1]
+
+    def needs_compaction(self) -> bool:
+        """Return True when the cache is over its size limit."""
+        with self._lock:
+            return (
+                sum(self._segments.values()) > self._max_bytes
+                and len(self._segments) > 1
+            )
+
+    def compact(self) -> None:
+        """Drop the oldest segments until the cache fits its size limit.
+
+        Clips that were read after their segment was last written get a second
+        chance and are copied to the active segment, everything else is
+        evicted.
+        """
+        while self.needs_compaction():
+            with self._lock:
+                oldest = min(self._segments)
+                if oldest == self._active:
+                    return
+                path = self._segment_path(oldest)
+                sealed_at = os.path.getmtime(path)
+
+            kept = dropped = 0
+            with open(path, "rb") as file:
+                while header := file.read(RECORD.size):
+                    if len(header) < RECORD.size:
+                        break
+                    key, size = RECORD.unpack(header)
+                    position = file.tell()
+                    file.seek(size, os.SEEK_CUR)
+                    with self._lock:
+                        offset, found = self._find(key)
+                        if not found:
+                            continue
+                        _, segment, slot_position, _, last_access = SLOT.unpack_from(
+                            self._index, offset
+                        )
+                        if segment != oldest or slot_position != position:
+                            # Superseded by a newer copy of the same clip
+                            continue
+                        if last_access > sealed_at:
+                            audio = os.pread(file.fileno(), size, position)
+                            self._append(key, audio, last_access)
+                            kept += 1
+                        else:
+                            self._remove(offset)
+                            dropped += 1
+
+            with self._lock:
+                if fd := self._fds.pop(oldest, None):
+                    os.close(fd)
+                del self._segments[oldest]
+                os.remove(path)
+            _LOGGER.debug(
+                "Compacted audio cache segment %s: %s kept, %s evicted",
+                oldest,
+                kept,
+                dropped,
+            )
+
+    def close(self) -> None:
+        """Flush the index and close all files."""
+        with self._lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+            if self._index is not None:
+                self._index.flush()
+                self._index.close()
+                self._index_file.close()
+                self._index = None
+
+
+class CacheBackend(ABC):
+    """A store for synthesized clips, keyed by `cache_key`."""
+
+    @abstractmethod
+    async def async_get(self, key: bytes) -> bytes | None:
+        """Return a cached clip, or None on a miss."""
+
+    @abstractmethod
+    async def async_put(self, key: bytes, audio: bytes) -> None:
+        """Store a clip."""
+
+    async def async_close(self) -> None:
+        """Release the resources held by the backend."""
+
+    @property
+    def local_cache(self) -> AudioCache | None:
+        """Return the local disk cache behind this backend, if any."""
+        return None
+
+
+def available_memory() -> int | None:
+    """Return the bytes of system memory available, None if unknown."""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Keep the most used clips in memory, within a byte budget.
+
+    A segmented LRU: new clips enter a probation segment and move to a
+    protected one, holding up to PROTECTED_SHARE of the budget, once read
+    again. Clips are evicted from the least recently used end of probation, so
+    a burst of one-off messages does not push the popular phrases out.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initialize an empty tier."""
+        self.max_bytes = max_bytes
+        # Budget in use, lowered while system memory is short
+        self.limit = max_bytes
+        self._probation: OrderedDict[bytes, bytes] = OrderedDict()
+        self._protected: OrderedDict[bytes, bytes] = OrderedDict()
+        self._protected_size = 0
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of clips."""
+        return len(self._probation) + len(self._protected)
+
+    @property
+    def hit_ratio(self) -> float | None:
+        """Return the share of lookups served from memory, None before any."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def get(self, key: bytes) -> bytes | None:
+        """Return a clip, or None on a miss."""
+        if (audio := self._protected.get(key)) is not None:
+            self._protected.move_to_end(key)
+        elif (audio := self._probation.pop(key, None)) is not None:
+            self._protected[key] = audio
+            self._protected_size += len(audio)
+            self._demote()
+        else:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return audio
+
+    def put(self, key: bytes, audio: bytes) -> None:
+        """Store a clip, unless it is larger than the budget."""
+        if key in self._protected or key in self._probation or len(audio) > self.limit:
+            return
+        self._probation[key] = audio
+        self.size += len(audio)
+        self._evict()
+
+    async def async_get(self, key: bytes) -> bytes | None:
+        """Return a clip, or None on a miss."""
+        return self.get(key)
+
+    async def async_put(self, key: bytes, audio: bytes) -> None:
+        """Store a clip."""
+        self.put(key, audio)
+
+    def resize(self, limit: int) -> None:
+        """Change the budget, evicting clips until they fit a smaller one."""
+        self.limit = min(limit, self.max_bytes)
+        self._demote()
+        self._evict()
+
+    def adjust_to_memory(self, available: int, min_free: int) -> None:
+        """Halve the budget while system memory is short, restore it once not."""
+        if available < min_free and self.limit:
+            _LOGGER.warning(
+                "Only %s MB of memory available, shrinking the memory audio cache",
+                available // 1024**2,
+            )
+            self.resize(self.limit // 2)
+        elif available >= 2 * min_free and self.limit < self.max_bytes:
+            self.resize(max(self.limit * 2, self.max_bytes // 16))
+
+    def _demote(self) -> None:
+        """Move protected clips back to probation while over their share."""
+        while self._protected_size > self.limit * PROTECTED_SHARE:
+            key, audio = self._protected.popitem(last=False)
+            self._protected_size -= len(audio)
+            self._probation[key] = audio
+
+    def _evict(self) -> None:
+        """Drop the least recently used clips while over the budget."""
+        while self.size > self.limit:
+            if self._probation:
+                _, audio = self._probation.popitem(last=False)
+            else:
+                _, audio = self._protected.popitem(last=False)
+                self._protected_size -= len(audio)
+            self.size -= len(audio)
+
+    async def async_close(self) -> None:
+        """Drop the clips."""
+        self._probation.clear()
+        self._protected.clear()
+        self._protected_size = self.size = 0
+
+
+class LocalCacheBackend(CacheBackend):
+    """Keep clips in an `AudioCache` on the local disk."""
+
+    def __init__(self, hass: HomeAssistant, cache: AudioCache) -> None:
+        """Initialize the backend."""
+        self.hass = hass
+        self.cache = cache
+
+    async def async_get(self, key: bytes) -> bytes | None:
+        """Return a cached clip, or None on a miss."""
+        return await self.hass.async_add_executor_job(self.cache.get, key)
+
+    async def async_put(self, key: bytes, audio: bytes) -> None:
+        """Store a clip."""
+        await self.hass.async_add_executor_job(self.cache.put, key, audio)
+
+    async def async_close(self) -> None:
+        """Flush and close the cache files."""
+        await self.hass.async_add_executor_job(self.cache.close)
+
+    @property
+    def local_cache(self) -> AudioCache | None:
+        """Return the local disk cache."""
+        return self.cache
+
+
+class RemoteCacheBackend(CacheBackend):
+    """Share clips through an HTTP server speaking plain GET and PUT.
+
+    Each clip is an object named after its hex key below the base URL, which
+    works with S3-compatible buckets as well as simple WebDAV-style servers.
+    Clips may be MP3, WAV or any other format the cache holds, so objects have
+    no extension and are stored as plain bytes.
+    Lookups give up after `timeout` seconds and treat any failure as a miss, and
+    uploads happen in the background, so a slow or broken server never delays
+    a request by more than the timeout.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, url: str, timeout: float, token: str | None = None
+    ) -> None:
+        """Initialize the backend."""
+        self.hass = hass
+        self._url = url.rstrip("/")
+        self._timeout = timeout
+        self._headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.session: httpx.AsyncClient = get_async_client(hass)
+        self._uploads: set[asyncio.Task] = set()
+
+    def _object_url(self, key: bytes) -> str:
+        """Return the URL of the object holding a clip."""
+        return f"{self._url}/{key.hex()}"
+
+    async def async_get(self, key: bytes) -> bytes | None:
+        """Return a shared clip, or None on a miss, error or timeout."""
+        try:
+            async with asyncio.timeout(self._timeout):
+                response = await self.session.get(
+                    self._object_url(key), headers=self._headers
+                )
+        except (TimeoutError, httpx.HTTPError) as err:
+            _LOGGER.debug("Remote audio cache lookup failed: %r", err)
+            return None
+        if response.status_code != 200:
+            return None
+        return response.content
+
+    async def async_put(self, key: bytes, audio: bytes) -> None:
+        """Upload a clip in the background."""
+        task = self.hass.async_create_background_task(
+            self._async_upload(key, audio), f"{DOMAIN} remote cache upload"
+        )
+        self._uploads.add(task)
+        task.add_done_callback(self._uploads.discard)
+
+    async def _async_upload(self, key: bytes, audio: bytes) -> None:
+        """Upload a clip, logging rather than raising on failure."""
+        try:
+            response = await self.session.put(
+                self._object_url(key),
+                headers={**self._headers, "Content-Type": "application/octet-stream"},
+                content=audio,
+                timeout=httpx.Timeout(30),
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as err:
+            _LOGGER.warning("Could not upload clip to the remote audio cache: %s", err)
+
+    async def async_close(self) -> None:
+        """Wait for pending uploads to finish."""
+        if self._uploads:
+            await asyncio.wait(self._uploads, timeout=self._timeout + 30)
+
+
+class LayeredCache(CacheBackend):
+    """Read through a list of backends, fastest first.
+
+    A hit in a slower backend is copied into the faster ones, and new clips are
+    stored in all of them.
+    """
+
+    def __init__(self, backends: list[CacheBackend]) -> None:
+        """Initialize the layered cache."""
+        self.backends = backends
+
+    async def async_get(self, key: bytes) -> bytes | None:
+        """Return the clip from the first backend that has it."""
+        for depth, backend in enumerate(self.backends):
+            if (audio := await backend.async_get(key)) is not None:
+                for faster in self.backends[:depth]:
+                    await faster.async_put(key, audio)
+                return audio
+        return None
+
+    async def async_put(self, key: bytes, audio: bytes) -> None:
+        """Store a clip in every backend."""
+        for backend in self.backends:
+            await backend.async_put(key, audio)
+
+    async def async_close(self) -> None:
+        """Close every backend."""
+        for backend in self.backends:
+            await backend.async_close()
+
+    @property
+    def local_cache(self) -> AudioCache | None:
+        """Return the first local disk cache among the backends."""
+        for backend in self.backends:
+            if backend.local_cache is not None:
+                return backend.local_cache
+        return None
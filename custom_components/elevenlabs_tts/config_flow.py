@@ -3,31 +3,91 @@ from homeassistant.components.tts import ATTR_VOICE
 from homeassistant.const import CONF_API_KEY
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-from httpx import HTTPStatusError
+from homeassistant.helpers.selector import (
+    EntitySelector,
+    EntitySelectorConfig,
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+)
+from httpx import HTTPError, HTTPStatusError
 import voluptuous as vol
 
 from .const import (
+    CONF_ADAPTIVE_LATENCY,
+    CONF_BASE_URLS,
+    CONF_CACHE_SIZE,
+    CONF_FALLBACK_TTS,
+    CONF_HISTORY_REUSE,
+    CONF_LONG_FORM,
+    CONF_MAX_CONCURRENCY,
+    CONF_MEMORY_CACHE_SIZE,
+    CONF_MIN_FREE_MEMORY,
     CONF_MODEL,
+    CONF_OFFLINE_SIMILARITY,
     CONF_OPTIMIZE_LATENCY,
+    CONF_POST_PROCESSING,
+    CONF_PRONUNCIATION_FILE,
+    CONF_REMOTE_CACHE_TIMEOUT,
+    CONF_REMOTE_CACHE_TOKEN,
+    CONF_REMOTE_CACHE_URL,
+    CONF_SAMPLE_RATE,
     CONF_SIMILARITY,
     CONF_STABILITY,
     CONF_STYLE,
+    CONF_TARGET_LOUDNESS,
+    CONF_TEXT_NORMALIZATION,
+    CONF_TRACE_FILE,
+    CONF_TRACE_OPENTELEMETRY,
     CONF_USE_SPEAKER_BOOST,
+    DATA_VOICE_CATALOG,
+    DEFAULT_ADAPTIVE_LATENCY,
+    DEFAULT_BASE_URLS,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_HISTORY_REUSE,
+    DEFAULT_LONG_FORM,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MEMORY_CACHE_SIZE,
+    DEFAULT_MIN_FREE_MEMORY,
     DEFAULT_MODEL,
+    DEFAULT_OFFLINE_SIMILARITY,
     DEFAULT_OPTIMIZE_LATENCY,
+    DEFAULT_POST_PROCESSING,
+    DEFAULT_PRONUNCIATION_FILE,
+    DEFAULT_REMOTE_CACHE_TIMEOUT,
+    DEFAULT_REMOTE_CACHE_TOKEN,
+    DEFAULT_REMOTE_CACHE_URL,
+    DEFAULT_SAMPLE_RATE,
     DEFAULT_SIMILARITY,
     DEFAULT_STABILITY,
     DEFAULT_STYLE,
+    DEFAULT_TARGET_LOUDNESS,
+    DEFAULT_TEXT_NORMALIZATION,
+    DEFAULT_TRACE_FILE,
+    DEFAULT_TRACE_OPENTELEMETRY,
     DEFAULT_USE_SPEAKER_BOOST,
     DEFAULT_VOICE,
     DOMAIN,
+    SAMPLE_RATES,
+    TEXT_NORMALIZATION_LOCAL,
+    TEXT_NORMALIZATION_SERVER,
 )
 from .elevenlabs import ElevenLabsClient
+from .voices import VoiceRecord
+
+# Steps of the options flow, each one a group of options offered in the menu
+OPTIONS_STEPS = ["voice", "latency", "cache", "resilience", "long_form", "tracing"]
 
 
 class ElevenlabsTTSSetupFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        # Voice catalog downloaded while validating the key
+        self._voices: list[VoiceRecord] | None = None
+
     async def async_step_import(self, import_config):
         """Import a config entry from configuration.yaml."""
         return await self.async_step_user(import_config)
@@ -43,6 +103,12 @@ class ElevenlabsTTSSetupFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors[CONF_API_KEY] = resp
 
             if not errors:
+                if self._voices is not None:
+                    # Handed to the setup of the entry created right below,
+                    # which runs before the flow is removed
+                    self.hass.data.setdefault(DOMAIN, {}).setdefault(
+                        DATA_VOICE_CATALOG, {}
+                    )[self.flow_id] = (user_input[CONF_API_KEY], self._voices)
                 return self.async_create_entry(title="Eleven Labs TTS", data=user_input)
 
         return self.async_show_form(
@@ -55,6 +121,13 @@ class ElevenlabsTTSSetupFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    @callback
+    def async_remove(self) -> None:
+        """Drop the catalog handed to the entry setup, however the flow ended."""
+        self.hass.data.get(DOMAIN, {}).get(DATA_VOICE_CATALOG, {}).pop(
+            self.flow_id, None
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -63,23 +136,41 @@ class ElevenlabsTTSSetupFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def _validate_api_key(self, api_key) -> list[str]:
         """Perform API key validation."""
-        # Implement your validation logic here, e.g., make an API
-        # call to validate the key
         # Return None if the key is valid, otherwise Error
         client = ElevenLabsClient(self.hass, api_key=api_key)
+        self._voices = None
         try:
-            await client.get_voices()
+            await client.validate_api_key()
         except HTTPStatusError as http_error:
-            if 500 <= http_error.response.status_code < 600:
-                return "Server Error"
-            elif 400 <= http_error.response.status_code < 500:
-                err_json = http_error.response.json()
-                return err_json["detail"]["status"]
-            else:
-                return str(http_error.response.content)
+            if http_error.response.status_code not in (401, 403):
+                return _describe_error(http_error)
+            # Keys scoped to text to speech may not read the user, but list voices
+            try:
+                self._voices = await client.get_voices()
+            except HTTPStatusError:
+                return _describe_error(http_error)
+            return None
+
+        # The key is good, fetch the catalog once and hand it to entry setup
+        try:
+            self._voices = await client.get_voices()
+        except HTTPError:
+            # Setup will retry the download on its own
+            pass
         return None
 
 
+def _describe_error(http_error: HTTPStatusError) -> str:
+    """Return the form error of a failed validation."""
+    if 500 <= http_error.response.status_code < 600:
+        return "Server Error"
+    elif 400 <= http_error.response.status_code < 500:
+        err_json = http_error.response.json()
+        return err_json["detail"]["status"]
+    else:
+        return str(http_error.response.content)
+
+
 class ElevenlabsTTSOptionsFlowHandler(config_entries.OptionsFlow):
     """Handle TTS options."""
 
@@ -88,72 +179,239 @@ class ElevenlabsTTSOptionsFlowHandler(config_entries.OptionsFlow):
         self.config_entry = config_entry
 
     async def async_step_init(self, user_input=None):
-        """Manage the TTS options."""
-        if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+        """Offer the groups of TTS options."""
+        return self.async_show_menu(step_id="init", menu_options=OPTIONS_STEPS)
 
-        return self.async_show_form(
-            step_id="init",
-            data_schema=vol.Schema(
-                {
-                    vol.Optional(
-                        CONF_API_KEY,
-                        default=self.config_entry.data.get(CONF_API_KEY),
-                    ): str,
-                    vol.Optional(
-                        ATTR_VOICE,
-                        default=self.config_entry.options.get(
-                            ATTR_VOICE, DEFAULT_VOICE
-                        ),
-                    ): str,
-                    vol.Optional(
-                        CONF_STABILITY,
-                        default=self.config_entry.options.get(
-                            CONF_STABILITY, DEFAULT_STABILITY
-                        ),
-                    ): vol.All(
-                        vol.Coerce(float),
-                        vol.Range(min=0, max=1),
+    async def async_step_voice(self, user_input=None):
+        """Manage the voice, model and the text sent to ElevenLabs."""
+        # Offer the voices already cached by the loaded entry, no network call
+        client: ElevenLabsClient | None = self.hass.data.get(DOMAIN, {}).get(
+            self.config_entry.entry_id
+        )
+        voice_options = [
+            SelectOptionDict(value=voice.name, label=voice.name)
+            for voice in (client.voices if client else [])
+        ]
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_API_KEY,
+                    default=self.config_entry.data.get(CONF_API_KEY),
+                ): str,
+                vol.Optional(
+                    ATTR_VOICE,
+                    default=options.get(ATTR_VOICE, DEFAULT_VOICE),
+                ): SelectSelector(
+                    SelectSelectorConfig(
+                        options=voice_options,
+                        custom_value=True,
+                        mode=SelectSelectorMode.DROPDOWN,
+                        sort=True,
+                    )
+                ),
+                vol.Optional(
+                    CONF_STABILITY,
+                    default=options.get(CONF_STABILITY, DEFAULT_STABILITY),
+                ): vol.All(
+                    vol.Coerce(float),
+                    vol.Range(min=0, max=1),
+                ),
+                vol.Optional(
+                    CONF_SIMILARITY,
+                    default=options.get(CONF_SIMILARITY, DEFAULT_SIMILARITY),
+                ): vol.All(
+                    vol.Coerce(float),
+                    vol.Range(min=0, max=1),
+                ),
+                vol.Optional(
+                    CONF_MODEL,
+                    default=options.get(CONF_MODEL, DEFAULT_MODEL),
+                ): str,
+                vol.Optional(
+                    CONF_STYLE,
+                    default=options.get(CONF_STYLE, DEFAULT_STYLE),
+                ): vol.All(
+                    vol.Coerce(float),
+                    vol.Range(min=0, max=1),
+                ),
+                vol.Optional(
+                    CONF_USE_SPEAKER_BOOST,
+                    default=options.get(
+                        CONF_USE_SPEAKER_BOOST, DEFAULT_USE_SPEAKER_BOOST
                     ),
-                    vol.Optional(
-                        CONF_SIMILARITY,
-                        default=self.config_entry.options.get(
-                            CONF_SIMILARITY, DEFAULT_SIMILARITY
-                        ),
-                    ): vol.All(
-                        vol.Coerce(float),
-                        vol.Range(min=0, max=1),
+                ): bool,
+                vol.Optional(
+                    CONF_POST_PROCESSING,
+                    default=options.get(CONF_POST_PROCESSING, DEFAULT_POST_PROCESSING),
+                ): bool,
+                vol.Optional(
+                    CONF_TARGET_LOUDNESS,
+                    default=options.get(CONF_TARGET_LOUDNESS, DEFAULT_TARGET_LOUDNESS),
+                ): vol.All(vol.Coerce(float), vol.Range(min=-40, max=-6)),
+                vol.Optional(
+                    CONF_SAMPLE_RATE,
+                    default=options.get(CONF_SAMPLE_RATE, DEFAULT_SAMPLE_RATE),
+                ): vol.In(SAMPLE_RATES),
+                vol.Optional(
+                    CONF_PRONUNCIATION_FILE,
+                    default=options.get(
+                        CONF_PRONUNCIATION_FILE, DEFAULT_PRONUNCIATION_FILE
                     ),
-                    vol.Optional(
-                        CONF_MODEL,
-                        default=self.config_entry.options.get(
-                            CONF_MODEL, DEFAULT_MODEL
-                        ),
-                    ): str,
-                    vol.Optional(
-                        CONF_OPTIMIZE_LATENCY,
-                        default=self.config_entry.options.get(
-                            CONF_OPTIMIZE_LATENCY, DEFAULT_OPTIMIZE_LATENCY
-                        ),
-                    ): vol.All(int, vol.Range(min=0, max=4)),
-                    vol.Optional(
-                        CONF_STYLE,
-                        default=self.config_entry.options.get(
-                            CONF_STYLE, DEFAULT_STYLE
-                        ),
-                    ): vol.All(
-                        vol.Coerce(float),
-                        vol.Range(min=0, max=1),
+                ): str,
+                vol.Optional(
+                    CONF_TEXT_NORMALIZATION,
+                    default=options.get(
+                        CONF_TEXT_NORMALIZATION, DEFAULT_TEXT_NORMALIZATION
                     ),
-                    vol.Optional(
-                        CONF_USE_SPEAKER_BOOST,
-                        default=self.config_entry.options.get(
-                            CONF_USE_SPEAKER_BOOST, DEFAULT_USE_SPEAKER_BOOST
-                        ),
-                    ): bool,
-                }
-            ),
+                ): vol.In([TEXT_NORMALIZATION_SERVER, TEXT_NORMALIZATION_LOCAL]),
+            }
+        )
+        return self._async_save_or_show("voice", schema, user_input)
+
+    async def async_step_latency(self, user_input=None):
+        """Manage the latency level and the requests sent at once."""
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_OPTIMIZE_LATENCY,
+                    default=options.get(
+                        CONF_OPTIMIZE_LATENCY, DEFAULT_OPTIMIZE_LATENCY
+                    ),
+                ): vol.All(int, vol.Range(min=0, max=4)),
+                vol.Optional(
+                    CONF_ADAPTIVE_LATENCY,
+                    default=options.get(
+                        CONF_ADAPTIVE_LATENCY, DEFAULT_ADAPTIVE_LATENCY
+                    ),
+                ): bool,
+                vol.Optional(
+                    CONF_MAX_CONCURRENCY,
+                    default=options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+                ): vol.All(int, vol.Range(min=1, max=50)),
+            }
+        )
+        return self._async_save_or_show("latency", schema, user_input)
+
+    async def async_step_cache(self, user_input=None):
+        """Manage the audio caches and the reuse of the history."""
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_CACHE_SIZE,
+                    default=options.get(CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE),
+                ): vol.All(int, vol.Range(min=0)),
+                vol.Optional(
+                    CONF_MEMORY_CACHE_SIZE,
+                    default=options.get(
+                        CONF_MEMORY_CACHE_SIZE, DEFAULT_MEMORY_CACHE_SIZE
+                    ),
+                ): vol.All(int, vol.Range(min=0)),
+                vol.Optional(
+                    CONF_MIN_FREE_MEMORY,
+                    default=options.get(CONF_MIN_FREE_MEMORY, DEFAULT_MIN_FREE_MEMORY),
+                ): vol.All(int, vol.Range(min=0)),
+                vol.Optional(
+                    CONF_REMOTE_CACHE_URL,
+                    default=options.get(
+                        CONF_REMOTE_CACHE_URL, DEFAULT_REMOTE_CACHE_URL
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_REMOTE_CACHE_TOKEN,
+                    default=options.get(
+                        CONF_REMOTE_CACHE_TOKEN, DEFAULT_REMOTE_CACHE_TOKEN
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_REMOTE_CACHE_TIMEOUT,
+                    default=options.get(
+                        CONF_REMOTE_CACHE_TIMEOUT, DEFAULT_REMOTE_CACHE_TIMEOUT
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.05, max=5)),
+                vol.Optional(
+                    CONF_HISTORY_REUSE,
+                    default=options.get(CONF_HISTORY_REUSE, DEFAULT_HISTORY_REUSE),
+                ): bool,
+            }
         )
+        return self._async_save_or_show("cache", schema, user_input)
+
+    async def async_step_resilience(self, user_input=None):
+        """Manage the endpoints and what plays while ElevenLabs is down."""
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_BASE_URLS,
+                    default=options.get(CONF_BASE_URLS, DEFAULT_BASE_URLS),
+                ): str,
+                vol.Optional(
+                    CONF_FALLBACK_TTS,
+                    description={"suggested_value": options.get(CONF_FALLBACK_TTS)},
+                ): EntitySelector(EntitySelectorConfig(domain="tts")),
+                vol.Optional(
+                    CONF_OFFLINE_SIMILARITY,
+                    default=options.get(
+                        CONF_OFFLINE_SIMILARITY, DEFAULT_OFFLINE_SIMILARITY
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+            }
+        )
+        return self._async_save_or_show("resilience", schema, user_input)
+
+    async def async_step_long_form(self, user_input=None):
+        """Manage the synthesis of long messages in chunks."""
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_LONG_FORM,
+                    default=self.config_entry.options.get(
+                        CONF_LONG_FORM, DEFAULT_LONG_FORM
+                    ),
+                ): bool,
+            }
+        )
+        return self._async_save_or_show("long_form", schema, user_input)
+
+    async def async_step_tracing(self, user_input=None):
+        """Manage where the traces of the syntheses go."""
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_TRACE_FILE,
+                    default=options.get(CONF_TRACE_FILE, DEFAULT_TRACE_FILE),
+                ): str,
+                vol.Optional(
+                    CONF_TRACE_OPENTELEMETRY,
+                    default=options.get(
+                        CONF_TRACE_OPENTELEMETRY, DEFAULT_TRACE_OPENTELEMETRY
+                    ),
+                ): bool,
+            }
+        )
+        return self._async_save_or_show("tracing", schema, user_input)
+
+    def _async_save_or_show(
+        self, step_id: str, schema: vol.Schema, user_input: dict | None
+    ) -> FlowResult:
+        """Show the form of a step, or save its options with those of the others.
+
+        The options of the step are replaced as a whole, so an optional field
+        left empty is removed rather than keeping its previous value.
+        """
+        if user_input is None:
+            return self.async_show_form(step_id=step_id, data_schema=schema)
+        keys = {str(marker) for marker in schema.schema}
+        options = {
+            key: value
+            for key, value in self.config_entry.options.items()
+            if key not in keys
+        }
+        return self.async_create_entry(title="", data=options | user_input)
 
 
 class InvalidAuth(exceptions.HomeAssistantError):
@@ -1,5 +1,7 @@
 """Consts module."""
 
+from datetime import timedelta
+
 from homeassistant.const import Platform
 
 ################################
@@ -8,7 +10,7 @@ INTEGRATION_VERSION = "main"  # git tag will be used
 MIN_REQUIRED_HA_VERSION = "0.0.0"  # set min required version in hacs.json
 ################################
 
-PLATFORMS = [Platform.TTS]
+PLATFORMS = [Platform.SENSOR, Platform.TTS]
 
 DOMAIN = "elevenlabs_tts"
 VERSION = "1.0.0"
@@ -28,3 +30,136 @@ CONF_USE_SPEAKER_BOOST = "use_speaker_boost"
 DEFAULT_USE_SPEAKER_BOOST = True
 
 LEGACY_VOICE_SUFFIX = " (Legacy)"
+
+# Values of the audio_output option, dialogues, long messages and post-processed
+# clips are WAV whichever is asked for
+AUDIO_OUTPUTS = ["mp3", "wav"]
+
+# hass.data[DOMAIN] key holding catalogs fetched by config flows, by flow ID,
+# with the API key they were fetched with
+DATA_VOICE_CATALOG = "voice_catalog"
+
+# hass.data[DOMAIN] key holding the progressive audio stream manager
+DATA_STREAMS = "streams"
+# Bytes of audio kept per in-progress stream, older audio is dropped
+STREAM_BUFFER_SIZE = 2 * 1024 * 1024
+# Seconds a finished stream stays available to late or retrying players
+STREAM_LINGER_SECONDS = 300
+SERVICE_STREAM_SPEAK = "stream_speak"
+SERVICE_WYOMING_SPEAK = "wyoming_speak"
+# Entity of a Wyoming satellite, the host is taken from its config entry
+ATTR_SATELLITE = "satellite"
+# Port of the sound service of a Wyoming satellite
+DEFAULT_WYOMING_PORT = 10601
+DEFAULT_WYOMING_RATE = 16000
+SERVICE_EXPORT_CACHE = "export_cache"
+SERVICE_IMPORT_CACHE = "import_cache"
+ATTR_MEDIA_PLAYER_ENTITY_ID = "media_player_entity_id"
+
+CONF_PRONUNCIATION_FILE = "pronunciation_file"
+DEFAULT_PRONUNCIATION_FILE = ""
+# ElevenLabs accepts at most this many dictionaries per request
+MAX_PRONUNCIATION_DICTIONARIES = 3
+
+# Where numbers, dates and units are spelled out, "local" sends the message
+# normalized and turns the normalization of ElevenLabs off
+CONF_TEXT_NORMALIZATION = "text_normalization"
+TEXT_NORMALIZATION_SERVER = "server"
+TEXT_NORMALIZATION_LOCAL = "local"
+DEFAULT_TEXT_NORMALIZATION = TEXT_NORMALIZATION_SERVER
+
+CONF_CACHE_SIZE = "cache_size"
+# Megabytes of synthesized audio kept on disk, 0 disables the audio cache
+DEFAULT_CACHE_SIZE = 0
+CACHE_COMPACT_INTERVAL = timedelta(minutes=10)
+# Megabytes of the most used clips kept in memory, 0 disables the memory tier
+CONF_MEMORY_CACHE_SIZE = "memory_cache_size"
+DEFAULT_MEMORY_CACHE_SIZE = 0
+# Megabytes of system memory to keep available, the memory tier shrinks below
+CONF_MIN_FREE_MEMORY = "min_free_memory"
+DEFAULT_MIN_FREE_MEMORY = 256
+MEMORY_CHECK_INTERVAL = timedelta(seconds=30)
+
+# Base URL of a cache shared by several Home Assistant instances, empty to disable
+CONF_REMOTE_CACHE_URL = "remote_cache_url"
+DEFAULT_REMOTE_CACHE_URL = ""
+CONF_REMOTE_CACHE_TOKEN = "remote_cache_token"
+DEFAULT_REMOTE_CACHE_TOKEN = ""
+# Seconds a remote cache lookup may add before falling back to ElevenLabs
+CONF_REMOTE_CACHE_TIMEOUT = "remote_cache_timeout"
+DEFAULT_REMOTE_CACHE_TIMEOUT = 0.3
+# Download clips already generated from the account's history on a cache miss
+CONF_HISTORY_REUSE = "history_reuse"
+DEFAULT_HISTORY_REUSE = False
+HISTORY_SYNC_INTERVAL = timedelta(minutes=15)
+
+# Comma separated base URLs of the API, requests go to the fastest healthy one
+CONF_BASE_URLS = "base_urls"
+DEFAULT_BASE_URLS = "https://api.elevenlabs.io"
+# Time between two latency probes of the base URLs, if there are several
+ENDPOINT_PROBE_INTERVAL = timedelta(minutes=1)
+
+CONF_MAX_CONCURRENCY = "max_concurrent_requests"
+# Synthesis requests sent to ElevenLabs at once, others wait for a free slot
+DEFAULT_MAX_CONCURRENCY = 4
+# TTS option, seconds after which a pending synthesis is abandoned
+CONF_DEADLINE = "deadline"
+# TTS option, a new message with the same value cancels the pending one
+CONF_SUPERSEDE = "supersede"
+
+# Let the latency controller pick the model and latency level per request
+CONF_ADAPTIVE_LATENCY = "adaptive_latency"
+DEFAULT_ADAPTIVE_LATENCY = False
+# TTS option, the priority class whose latency target applies
+CONF_PRIORITY = "priority"
+
+# TTS option, {script label: voice name or ID}, renders the message as a dialogue
+CONF_SPEAKERS = "speakers"
+# TTS option, seconds of silence between the lines of a dialogue
+CONF_DIALOGUE_GAP = "dialogue_gap"
+DEFAULT_DIALOGUE_GAP = 0.3
+
+# TTS entity used while the circuit breaker is open, empty to disable
+CONF_FALLBACK_TTS = "fallback_tts"
+# Lowest similarity of a cached phrase played instead of a message while
+# ElevenLabs is unreachable, 1 only plays the same words and 0 disables it
+CONF_OFFLINE_SIMILARITY = "offline_similarity"
+DEFAULT_OFFLINE_SIMILARITY = 0.8
+
+# Synthesize long messages in resumable chunks, joined into one WAV clip
+CONF_LONG_FORM = "long_form"
+DEFAULT_LONG_FORM = False
+# Messages longer than this are synthesized in chunks of at most this size,
+# and a failed message resumes from the chunks already synthesized
+LONG_FORM_CHUNK_CHARS = 1000
+# Time an unfinished long message is kept for a retry
+LONG_FORM_JOB_MAX_AGE = timedelta(days=1)
+
+SERVICE_QUEUE_SPEAK = "queue_speak"
+# Announcements synthesized ahead of the one playing
+ATTR_LOOKAHEAD = "lookahead"
+DEFAULT_LOOKAHEAD = 2
+
+# Trim, normalize and resample synthesized clips in a process pool
+CONF_POST_PROCESSING = "post_processing"
+DEFAULT_POST_PROCESSING = False
+# Loudness clips are normalized to, in dBFS (RMS)
+CONF_TARGET_LOUDNESS = "target_loudness"
+DEFAULT_TARGET_LOUDNESS = -20.0
+# Sample rate of post-processed clips, in Hz
+CONF_SAMPLE_RATE = "sample_rate"
+DEFAULT_SAMPLE_RATE = 22050
+SAMPLE_RATES = [16000, 22050, 24000, 44100, 48000]
+# hass.data[DOMAIN] key holding the process pool and the removal of its stop
+# listener
+DATA_PROCESS_POOL = "process_pool"
+
+# Memory held by responses in flight, shared by all entries
+DATA_MEMORY_BUDGET = "memory_budget"
+
+# JSON lines file receiving a trace per synthesis, empty to disable
+CONF_TRACE_FILE = "trace_file"
+DEFAULT_TRACE_FILE = ""
+# Hand traces to the OpenTelemetry tracer provider of this process
+CONF_TRACE_OPENTELEMETRY = "trace_opentelemetry"
+DEFAULT_TRACE_OPENTELEMETRY = False
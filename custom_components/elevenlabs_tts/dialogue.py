@@ -0,0 +1,64 @@
+"""Multi-speaker dialogue scripts rendered as one clip."""
+
+import re
+
+import orjson
+
+from .postprocess import SAMPLE_WIDTH
+
+# "Label: text", the label is short and holds no colon
+SPEAKER_LINE = re.compile(r"^\s*([^:]{1,40}?)\s*:\s*(.*)$")
+
+
+def parse_speakers(speakers: dict | str) -> dict[str, str]:
+    """Return the voice of each script label.
+
+    Speakers are a mapping, a JSON object, or "Label=Voice" pairs separated by
+    commas. Only the strings survive the query string of a TTS media source ID,
+    which is how `tts.speak` passes its options.
+    """
+    if isinstance(speakers, str):
+        if speakers.lstrip().startswith("{"):
+            speakers = orjson.loads(speakers)
+        else:
+            pairs = [pair.partition("=") for pair in speakers.split(",")]
+            if any(not separator for _, separator, _ in pairs):
+                raise ValueError("expected Label=Voice pairs separated by commas")
+            speakers = {label.strip(): voice.strip() for label, _, voice in pairs}
+    if not isinstance(speakers, dict) or not all(
+        isinstance(label, str) and isinstance(voice, str) and label and voice
+        for label, voice in speakers.items()
+    ):
+        raise ValueError("expected script labels mapped to voices")
+    return speakers
+
+
+def parse_dialogue(
+    message: str, speakers: dict[str, str]
+) -> list[tuple[str | None, str]]:
+    """Split a script into (voice, text) lines.
+
+    A line starting with a speaker label and a colon is spoken with that
+    speaker's voice, labels are matched without regard to case. Other lines
+    continue the previous line. Text before the first label is spoken with the
+    voice of the call, given as None.
+    """
+    voices = {label.casefold(): voice for label, voice in speakers.items()}
+    lines: list[tuple[str | None, str]] = []
+    for row in message.splitlines():
+        match = SPEAKER_LINE.match(row)
+        if match and match[1].casefold() in voices:
+            lines.append((voices[match[1].casefold()], match[2].strip()))
+        elif row.strip():
+            if lines:
+                voice, text = lines[-1]
+                lines[-1] = (voice, f"{text} {row.strip()}".strip())
+            else:
+                lines.append((None, row.strip()))
+    return [(voice, text) for voice, text in lines if text]
+
+
+def join_pcm(clips: list[bytes], gap: float, rate: int) -> bytes:
+    """Join 16-bit PCM clips with `gap` seconds of silence between them."""
+    silence = bytes(SAMPLE_WIDTH * int(gap * rate))
+    return silence.join(clip[: len(clip) - len(clip) % SAMPLE_WIDTH] for clip in clips)
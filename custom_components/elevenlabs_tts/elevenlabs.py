@@ -1,32 +1,105 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from functools import partial
 import logging
+import time
+from typing import TypeVar
 
-from homeassistant.components.tts import ATTR_AUDIO_OUTPUT, ATTR_VOICE, Voice
+from homeassistant.components.tts import (
+    ATTR_AUDIO_OUTPUT,
+    ATTR_LANGUAGE,
+    ATTR_VOICE,
+    Voice,
+)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.httpx_client import get_async_client
+from homeassistant.util import dt as dt_util
 import httpx
 import orjson
 
+from .breaker import CircuitBreaker, CircuitOpenError
+from .cache import CacheBackend, MemoryCacheBackend, cache_key
 from .const import (
+    AUDIO_OUTPUTS,
+    CONF_ADAPTIVE_LATENCY,
+    CONF_BASE_URLS,
+    CONF_DEADLINE,
+    CONF_DIALOGUE_GAP,
+    CONF_MAX_CONCURRENCY,
     CONF_MODEL,
+    CONF_OFFLINE_SIMILARITY,
     CONF_OPTIMIZE_LATENCY,
+    CONF_POST_PROCESSING,
+    CONF_PRIORITY,
+    CONF_SAMPLE_RATE,
     CONF_SIMILARITY,
+    CONF_SPEAKERS,
     CONF_STABILITY,
     CONF_STYLE,
+    CONF_SUPERSEDE,
+    CONF_TARGET_LOUDNESS,
+    CONF_TEXT_NORMALIZATION,
     CONF_USE_SPEAKER_BOOST,
+    DEFAULT_ADAPTIVE_LATENCY,
+    DEFAULT_BASE_URLS,
+    DEFAULT_DIALOGUE_GAP,
+    DEFAULT_MAX_CONCURRENCY,
     DEFAULT_MODEL,
+    DEFAULT_OFFLINE_SIMILARITY,
     DEFAULT_OPTIMIZE_LATENCY,
+    DEFAULT_POST_PROCESSING,
+    DEFAULT_SAMPLE_RATE,
     DEFAULT_SIMILARITY,
     DEFAULT_STABILITY,
     DEFAULT_STYLE,
+    DEFAULT_TARGET_LOUDNESS,
+    DEFAULT_TEXT_NORMALIZATION,
     DEFAULT_USE_SPEAKER_BOOST,
     DEFAULT_VOICE,
     LEGACY_VOICE_SUFFIX,
+    LONG_FORM_CHUNK_CHARS,
+    TEXT_NORMALIZATION_LOCAL,
+)
+from .dialogue import join_pcm, parse_dialogue, parse_speakers
+from .endpoints import FAILOVER_STATUSES, EndpointPool, parse_base_urls
+from .history import HistoryIndex
+from .latency import DEFAULT_PRIORITY, LatencyController
+from .longform import CHUNK_ATTEMPTS, RETRY_DELAY, LongFormJobs, split_long_form
+from .metadata import MetadataCache, VoiceSettings
+from .normalizer import normalize_text
+from .phrases import PhraseIndex
+from .postprocess import (
+    SOURCE_FORMAT,
+    SOURCE_RATE,
+    async_get_process_pool,
+    pcm_to_wav,
+    process_audio,
 )
+from .spool import AudioSpool, async_get_memory_budget
+from .tracing import Trace, Tracer, current_trace, span
+from .voices import VOICES_PAGE_SIZE, VoiceCatalog, VoiceRecord, parse_voices_page
 
 _LOGGER = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+
+def _first_set(*values):
+    """Return the first value that is not None, so 0 and False count as set."""
+    return next((value for value in values if value is not None), None)
+
+
+class DeadlineExceededError(HomeAssistantError):
+    """Error to indicate a synthesis did not finish before its deadline."""
+
+    def __init__(self, message: str, queued: bool = False) -> None:
+        """Initialize the error, queued if no request was sent yet."""
+        super().__init__(message)
+        self.queued = queued
+
 
 class ElevenLabsClient:
     """A class to handle the connection to the ElevenLabs API."""
@@ -40,6 +113,7 @@ class ElevenLabsClient:
         if api_key is None and config_entry is None:
             raise ValueError("Either 'api_key' or 'config_entry' must be provided.")
 
+        self.hass = hass
         self.config_entry = config_entry
         if api_key is not None:
             self._api_key = api_key
@@ -48,90 +122,833 @@ class ElevenLabsClient:
 
         self.session: httpx.AsyncClient = get_async_client(hass)
 
-        self.base_url = "https://api.elevenlabs.io/v1"
+        base_urls = (
+            config_entry.options.get(CONF_BASE_URLS, DEFAULT_BASE_URLS)
+            if config_entry
+            else DEFAULT_BASE_URLS
+        )
+        self.endpoints = EndpointPool(
+            parse_base_urls(base_urls) or parse_base_urls(DEFAULT_BASE_URLS)
+        )
         self._headers = {"Content-Type": "application/json"}
+        self._audio_headers = self._headers | {"accept": "audio/mpeg"}
+
+        self.catalog = VoiceCatalog()
+
+        # [{"pronunciation_dictionary_id": str, "version_id": str}]
+        self.pronunciation_locators: list[dict] = []
 
-        # [{"voice_id": str, "name": str, ...}]
-        self._voices: list[dict] = []
+        self.audio_cache: CacheBackend | None = None
+        # The in-memory tier of the audio cache, also part of audio_cache
+        self.memory_cache: MemoryCacheBackend | None = None
+        # Texts of the cached clips, searched while ElevenLabs is unreachable
+        self.phrases: PhraseIndex | None = None
+        # Clips in the account's history, downloaded instead of generated again
+        self.history: HistoryIndex | None = None
+        # Chunks of long messages in progress, kept to resume after a failure
+        self.long_form: LongFormJobs | None = None
 
-    async def get(self, endpoint: str, api_key=None) -> dict:
+        # Requests waiting on the semaphore are woken in order as slots free up
+        max_concurrency = (
+            config_entry.options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY)
+            if config_entry
+            else DEFAULT_MAX_CONCURRENCY
+        )
+        self._slots = asyncio.Semaphore(max_concurrency)
+        # {supersede key: task of the pending synthesis}
+        self._pending: dict[str, asyncio.Task] = {}
+
+        self.latency_controller = LatencyController()
+        self.breaker = CircuitBreaker()
+
+        self.tracer = Tracer()
+        self.metadata = MetadataCache(self)
+
+        # {post-processing stage: (total seconds, number of clips)}
+        self.post_processing_timings: dict[str, tuple[float, int]] = {}
+
+    @property
+    def base_url(self) -> str:
+        """Return the URL of version 1 of the API on the best endpoint."""
+        return f"{self.endpoints.best().url}/v1"
+
+    def get_headers(self, api_key: str | None = None, audio: bool = False) -> dict:
+        """Return the headers of a request, with the entry's API key by default."""
+        headers = self._audio_headers if audio else self._headers
+        return headers | {"xi-api-key": api_key or self._api_key}
+
+    async def _async_failover(self, send: Callable[[str], Awaitable[_T]]) -> _T:
+        """Send a request to the best endpoint, then to the next ones if it fails.
+
+        `send` gets the base URL of an endpoint. Only errors that show the
+        request never reached ElevenLabs, or a gateway error, try the next one.
+        """
+        endpoints = self.endpoints.ordered()
+        for number, endpoint in enumerate(endpoints, 1):
+            try:
+                result = await send(endpoint.url)
+            except (
+                httpx.ConnectError,
+                httpx.ConnectTimeout,
+                httpx.HTTPStatusError,
+            ) as err:
+                if (
+                    isinstance(err, httpx.HTTPStatusError)
+                    and err.response.status_code not in FAILOVER_STATUSES
+                ):
+                    self.endpoints.record_success(endpoint)
+                    raise
+                self.endpoints.record_failure(endpoint)
+                if number == len(endpoints):
+                    raise
+                continue
+            self.endpoints.record_success(endpoint)
+            return result
+
+    async def _async_request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request to the API path of an endpoint and check its status."""
+
+        async def _async_send(base_url: str) -> httpx.Response:
+            response = await self.session.request(
+                method, f"{base_url}/{path}", **kwargs
+            )
+            response.raise_for_status()
+            return response
+
+        return await self._async_failover(_async_send)
+
+    async def get(self, endpoint: str, api_key=None, params=None) -> dict:
         """Make a GET request to the API."""
-        url = f"{self.base_url}/{endpoint}"
-        headers = self._headers.copy()
-        if api_key:
-            headers["xi-api-key"] = api_key
-        else:
-            headers["xi-api-key"] = self._api_key
+        headers = self.get_headers(api_key)
+
+        response = await self._async_request(
+            "GET", f"v1/{endpoint}", headers=headers, params=params
+        )
+        return response.json()
 
-        response = await self.session.get(url, headers=headers)
-        response.raise_for_status()
+    async def get_audio(self, endpoint: str, api_key=None) -> bytes:
+        """Make a GET request to an API endpoint returning audio."""
+        headers = self.get_headers(api_key, audio=True)
+
+        response = await self._async_request(
+            "GET", f"v1/{endpoint}", headers=headers, timeout=httpx.Timeout(60)
+        )
+        return response.content
+
+    async def post_json(self, endpoint: str, data: dict, api_key=None) -> dict:
+        """Make a POST request to a JSON API endpoint."""
+        headers = self.get_headers(api_key)
+
+        response = await self._async_request(
+            "POST", f"v1/{endpoint}", headers=headers, content=orjson.dumps(data)
+        )
         return response.json()
 
     async def post(
         self, endpoint: str, data: dict, params: dict, api_key: str = None
-    ) -> dict:
-        """Make a POST request to the API."""
-        url = f"{self.base_url}/{endpoint}"
-        headers = self._headers.copy()
-        headers["accept"] = "audio/mpeg"
-        if api_key:
-            headers["xi-api-key"] = api_key
-        else:
-            headers["xi-api-key"] = self._api_key
+    ) -> AudioSpool:
+        """Make a POST request to the API and spool the audio it returns.
+
+        The time from sending the request to the first chunk of audio is kept
+        on the spool, without the wait for memory or for a failed endpoint.
+        The caller closes the spool once done with the audio.
+        """
+        headers = self.get_headers(api_key, audio=True)
 
         json_str = orjson.dumps(data)
 
-        response = await self.session.post(
-            url,
-            headers=headers,
-            data=json_str,
-            params=params,
-            timeout=httpx.Timeout(60),
-        )
-        response.raise_for_status()
+        trace = current_trace()
+        sent = 0.0
+
+        async def _async_send(base_url: str) -> httpx.Response:
+            nonlocal sent
+            sent = time.monotonic()
+            return await self._async_send_streaming(
+                self.session.build_request(
+                    "POST",
+                    f"{base_url}/v1/{endpoint}",
+                    headers=headers,
+                    content=json_str,
+                    params=params,
+                    timeout=httpx.Timeout(60),
+                    extensions={"trace": _HttpTrace(trace)} if trace else None,
+                )
+            )
+
+        budget = async_get_memory_budget(self.hass)
+        with span("memory_wait"):
+            await budget.async_wait_for_room()
+        response = await self._async_failover(_async_send)
+        spool = None
+        try:
+            length = response.headers.get("content-length", "")
+            spool = AudioSpool(
+                self.hass, budget, int(length) if length.isdigit() else None
+            )
+            spool.request_id = response.headers.get("request-id")
+            with span("transfer"):
+                async for chunk in response.aiter_bytes():
+                    if spool.first_byte is None:
+                        spool.first_byte = time.monotonic() - sent
+                    await spool.async_write(chunk)
+            if spool.first_byte is None:
+                spool.first_byte = time.monotonic() - sent
+        except BaseException:
+            if spool is not None:
+                spool.close()
+            raise
+        finally:
+            await response.aclose()
+        return spool
+
+    async def _async_send_streaming(self, request: httpx.Request) -> httpx.Response:
+        """Send a request and return its response before the body is read.
+
+        Streaming the body lets a cancelled caller close the connection right
+        away instead of waiting for the whole clip. Error responses are read
+        and closed, and raised.
+        """
+        response = await self.session.send(request, stream=True)
+        if response.is_error:
+            try:
+                await response.aread()
+                response.raise_for_status()
+            finally:
+                await response.aclose()
         return response
 
-    async def get_voices(self) -> dict:
-        """Get voices from the API."""
-        endpoint = "voices?show_legacy=true"
-        voices = await self.get(endpoint)
-        self._voices = voices.get("voices", [])
+    async def validate_api_key(self) -> dict:
+        """Validate the API key against the lightweight user endpoint."""
+        return await self.get("user")
 
-        self.voices = []
+    @property
+    def voices(self) -> list[Voice]:
+        """Return the voices offered to Home Assistant."""
+        return self.catalog.tts_voices
 
-        for voice in self._voices:
-            if voice.get("is_legacy"):
-                name = voice["name"] + LEGACY_VOICE_SUFFIX
-            else:
-                name = voice["name"]
-            new_voice = Voice(voice_id=voice["voice_id"], name=name)
-            self.voices.append(new_voice)
+    async def get_voices(self) -> list[VoiceRecord]:
+        """Download the voice catalog page by page and update the index."""
+        headers = self.get_headers()
+        params = {"page_size": VOICES_PAGE_SIZE, "show_legacy": "true"}
+        voices: list[VoiceRecord] = []
+        while True:
+            # The paginated voices endpoint only exists in version 2 of the API
+            response = await self._async_request(
+                "GET", "v2/voices", headers=headers, params=params
+            )
+            page, next_page_token = await self.hass.async_add_executor_job(
+                parse_voices_page, response.content
+            )
+            voices.extend(page)
+            if not next_page_token:
+                break
+            params["next_page_token"] = next_page_token
+
+        return self.set_voices(voices)
 
-        return self._voices
+    def set_voices(self, voices: list[VoiceRecord]) -> list[VoiceRecord]:
+        """Update the voice catalog from an already fetched one."""
+        self.catalog.apply(voices)
+        return voices
 
-    async def get_voice_by_name_or_id(self, identifier: str) -> dict:
+    async def get_voice_by_name_or_id(self, identifier: str) -> VoiceRecord | None:
         """Get a voice by its name or ID."""
         # Remove potential legacy suffix from identifier
         identifier = identifier.replace(LEGACY_VOICE_SUFFIX, "")
         _LOGGER.debug("Looking for voice with identifier %s", identifier)
-        for voice in self._voices:
-            if voice["name"] == identifier or voice["voice_id"] == identifier:
-                _LOGGER.debug(
-                    "Found voice %s from identifier %s", voice["voice_id"], identifier
-                )
-                return voice
+        if (voice := self.catalog.get(identifier)) is not None:
+            _LOGGER.debug(
+                "Found voice %s from identifier %s", voice.voice_id, identifier
+            )
+            return voice
         _LOGGER.warning("Could not find voice with identifier %s", identifier)
-        return {}
+        return None
 
     async def get_tts_audio(
         self, message: str, options: dict | None = None
     ) -> tuple[str, bytes]:
         """Get text-to-speech audio for the given message."""
-        tts_options = await self.get_tts_options(options)
+        with self.tracer.trace("synthesis", chars=len(message)):
+            try:
+                return await self._async_get_tts_audio(message, options)
+            except (CircuitOpenError, httpx.TransportError):
+                if (
+                    audio := await self._async_get_offline_audio(message, options)
+                ) is None:
+                    raise
+                return audio
+
+    async def _async_get_offline_audio(
+        self, message: str, options: dict | None
+    ) -> tuple[str, bytes] | None:
+        """Return the cached clip of the most similar phrase of the same voice."""
+        options = options or {}
+        if (
+            self.phrases is None
+            or self.audio_cache is None
+            or options.get(CONF_SPEAKERS)
+        ):
+            return None
+        voice_opt = (
+            options.get(ATTR_VOICE)
+            or self.config_entry.options.get(ATTR_VOICE)
+            or DEFAULT_VOICE
+        )
+        if (
+            voice := self.catalog.get(voice_opt.replace(LEGACY_VOICE_SUFFIX, ""))
+        ) is None:
+            return None
+        threshold = self.config_entry.options.get(
+            CONF_OFFLINE_SIMILARITY, DEFAULT_OFFLINE_SIMILARITY
+        )
+        # Phrases are indexed with the text that was sent to ElevenLabs
+        message = self._normalize_text(message, options) or message
+        while True:
+            with span("offline_lookup"):
+                found = self.phrases.find(message, voice.voice_id, threshold)
+            if found is None:
+                return None
+            phrase, score = found
+            if (audio := await self.audio_cache.async_get(phrase.key)) is not None:
+                break
+            # The clip was evicted, try the next most similar phrase
+            self.phrases.remove(phrase.key)
+        _LOGGER.info(
+            "ElevenLabs is unreachable, playing a cached phrase %.0f%% similar",
+            score * 100,
+        )
+        return phrase.extension, audio
+
+    def _remember_phrase(
+        self, endpoint: str, data: dict, key: bytes, extension: str
+    ) -> None:
+        """Index a cached clip for playback while ElevenLabs is unreachable."""
+        if self.phrases is None:
+            return
+        voice_id = endpoint.rsplit("/", 1)[-1]
+        if (
+            phrase := self.phrases.add(data["text"], voice_id, key, extension)
+        ) is not None:
+            self.hass.async_add_executor_job(self.phrases.append, phrase)
+
+    async def _async_get_tts_audio(
+        self, message: str, options: dict | None
+    ) -> tuple[str, bytes]:
+        """Get text-to-speech audio, within the trace of the synthesis."""
+        if options and options.get(CONF_SPEAKERS):
+            return await self._async_get_dialogue_audio(message, options)
+        if self.long_form is not None and len(message) > LONG_FORM_CHUNK_CHARS:
+            return await self._async_get_long_form_audio(message, options)
+
+        endpoint, data, params, api_key = await self.build_tts_request(message, options)
+        if (post_processing := self._get_post_processing()) is None:
+            if (options or {}).get(ATTR_AUDIO_OUTPUT, "mp3") == "mp3":
+                return "mp3", await self._async_get_audio(
+                    endpoint, data, params, api_key, options
+                )
+            # WAV is raw PCM with a header, the PCM is cached like dialogue lines
+            params = params | {"output_format": SOURCE_FORMAT}
+            pcm = await self._async_get_audio(endpoint, data, params, api_key, options)
+            return "wav", await self.hass.async_add_executor_job(
+                pcm_to_wav, pcm, SOURCE_RATE
+            )
+
+        # Processed clips are cached next to the raw PCM they were made from
+        params = params | {"output_format": SOURCE_FORMAT}
+        key = cache_key(
+            endpoint, data, params | {CONF_POST_PROCESSING: post_processing}
+        )
+        if self.audio_cache is not None:
+            with span("cache_read", processed=True):
+                audio = await self.audio_cache.async_get(key)
+            if audio is not None:
+                _LOGGER.debug("Serving post-processed TTS from the audio cache")
+                self._remember_phrase(endpoint, data, key, "wav")
+                return "wav", audio
+
+        pcm = await self._async_get_audio(endpoint, data, params, api_key, options)
+        with span("post_process"):
+            audio = await self._async_post_process(pcm, post_processing)
+        if self.audio_cache is not None:
+            with span("cache_write", processed=True):
+                await self.audio_cache.async_put(key, audio)
+            self._remember_phrase(endpoint, data, key, "wav")
+        return "wav", audio
+
+    async def _async_get_audio(
+        self,
+        endpoint: str,
+        data: dict,
+        params: dict,
+        api_key: str,
+        options: dict | None,
+    ) -> bytes:
+        """Get the audio of a request from the cache or from ElevenLabs."""
+        key = cache_key(endpoint, data, params)
+        if self.audio_cache is not None:
+            with span("cache_read"):
+                audio = await self.audio_cache.async_get(key)
+            if audio is not None:
+                _LOGGER.debug("Serving TTS from the audio cache")
+                if "output_format" not in params:
+                    self._remember_phrase(endpoint, data, key, "mp3")
+                return audio
+
+        spool = None
+        if (
+            audio := await self._async_get_history_audio(
+                endpoint, data, params, api_key
+            )
+        ) is None:
+            spool = await self._async_synthesize(
+                endpoint, data, params, api_key, options
+            )
+        try:
+            if spool is not None:
+                # Home Assistant plays bytes, the spool keeps its memory
+                # reserved until the cache has the copy too
+                audio = await spool.async_read()
+            if self.audio_cache is not None:
+                with span("cache_write"):
+                    await self.audio_cache.async_put(key, audio)
+                # Raw PCM is not playable, only its post-processed clip is indexed
+                if "output_format" not in params:
+                    self._remember_phrase(endpoint, data, key, "mp3")
+        finally:
+            if spool is not None:
+                spool.close()
+        return audio
+
+    async def _async_get_history_audio(
+        self, endpoint: str, data: dict, params: dict, api_key: str
+    ) -> bytes | None:
+        """Download the clip of the same request from the account's history.
+
+        History items are MP3 and do not record pronunciation dictionaries, so
+        other formats and requests using dictionaries are always generated.
+        """
+        if (
+            self.history is None
+            or "output_format" in params
+            or "pronunciation_dictionary_locators" in data
+            or api_key != self._api_key
+        ):
+            return None
+        item_id = self.history.find(
+            endpoint.rpartition("/")[2],
+            data["model_id"],
+            data["text"],
+            data["voice_settings"],
+        )
+        if item_id is None:
+            return None
+        try:
+            with span("history_download"):
+                audio = await self.get_audio(f"history/{item_id}/audio")
+        except httpx.HTTPError as err:
+            # Deleted items are forgotten, the clip is generated again
+            if (
+                isinstance(err, httpx.HTTPStatusError)
+                and err.response.status_code == 404
+            ):
+                self.history.discard(item_id)
+            _LOGGER.debug("Could not download history item %s: %s", item_id, err)
+            return None
+        _LOGGER.debug("Serving TTS from history item %s", item_id)
+        return audio
+
+    async def _async_synthesize(
+        self,
+        endpoint: str,
+        data: dict,
+        params: dict,
+        api_key: str,
+        options: dict | None,
+    ) -> AudioSpool:
+        """Generate the audio of a request, through the circuit breaker.
+
+        The breaker judges ElevenLabs by the time to the first audio of the
+        request, the wait for a slot and the transfer are local.
+        The caller closes the spool once done with the audio.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("ElevenLabs is degraded, not sending the request")
+
+        options = options or {}
+        try:
+            spool = await self._async_run_request(
+                partial(self._async_timed_post, endpoint, data, params, api_key),
+                options.get(CONF_DEADLINE),
+                options.get(CONF_SUPERSEDE),
+            )
+        except BaseException as err:
+            self._record_failure(err)
+            raise
+        self.breaker.record_success(spool.first_byte)
+        return spool
+
+    def _record_failure(self, err: BaseException) -> None:
+        """Count a failed request against the circuit breaker, if it was one."""
+        if isinstance(err, httpx.HTTPStatusError):
+            # Client errors such as an unknown voice say nothing about health
+            failed = err.response.status_code >= 500 or err.response.status_code == 429
+        else:
+            # A deadline passed in the queue says nothing about ElevenLabs
+            failed = isinstance(err, httpx.TransportError) or (
+                isinstance(err, DeadlineExceededError) and not err.queued
+            )
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release_probe()
+
+    async def _async_get_dialogue_audio(
+        self, message: str, options: dict
+    ) -> tuple[str, bytes]:
+        """Synthesize the lines of a dialogue at once and join them in one clip.
+
+        Lines are requested as PCM so they can be joined with silence, each one
+        through the audio cache and the concurrency limit like a message.
+        """
+        try:
+            speakers = parse_speakers(options[CONF_SPEAKERS])
+        except ValueError as err:
+            raise HomeAssistantError(f"Invalid {CONF_SPEAKERS}: {err}") from err
+        if not (lines := parse_dialogue(message, speakers)):
+            raise HomeAssistantError("The dialogue has no lines to speak")
+        gap = float(options.get(CONF_DIALOGUE_GAP, DEFAULT_DIALOGUE_GAP))
+        # Lines of one dialogue must not supersede each other
+        line_options = {
+            key: value
+            for key, value in options.items()
+            if key not in (CONF_SPEAKERS, CONF_DIALOGUE_GAP, CONF_SUPERSEDE)
+        }
+
+        async def _async_get_line(voice: str | None, text: str) -> bytes:
+            if voice:
+                line = line_options | {ATTR_VOICE: voice}
+            else:
+                line = line_options
+            endpoint, data, params, api_key = await self.build_tts_request(text, line)
+            params = params | {"output_format": SOURCE_FORMAT}
+            return await self._async_get_audio(endpoint, data, params, api_key, line)
+
+        tasks = [
+            asyncio.ensure_future(_async_get_line(voice, text)) for voice, text in lines
+        ]
+        try:
+            clips = await asyncio.gather(*tasks)
+        except BaseException:
+            # One failed line fails the dialogue, stop synthesizing the others
+            for task in tasks:
+                task.cancel()
+            raise
+        _LOGGER.debug("Joining %s dialogue lines", len(clips))
+
+        pcm = join_pcm(clips, gap, SOURCE_RATE)
+        if (post_processing := self._get_post_processing()) is not None:
+            with span("post_process"):
+                return "wav", await self._async_post_process(pcm, post_processing)
+        return "wav", await self.hass.async_add_executor_job(
+            pcm_to_wav, pcm, SOURCE_RATE
+        )
+
+    async def _async_get_long_form_audio(
+        self, message: str, options: dict | None
+    ) -> tuple[str, bytes]:
+        """Synthesize a long message chunk by chunk and join the chunks.
+
+        Chunks are requested as PCM, one after the other and stitched to the
+        ones before them. Finished chunks are kept in a job folder, so a retry
+        of the message only requests the chunks that are still missing.
+        """
+        chunks = split_long_form(message, LONG_FORM_CHUNK_CHARS)
+        # The configured model and latency level are pinned for the whole
+        # message, adaptive latency would pick them per chunk and per retry,
+        # mixing voices and keying a retry to another job
+        model, optimize_latency = (await self.get_tts_options(options or {}))[3:5]
+        options = (options or {}) | {
+            CONF_MODEL: model,
+            CONF_OPTIMIZE_LATENCY: optimize_latency,
+        }
+        requests = [await self.build_tts_request(chunk, options) for chunk in chunks]
+        endpoint, data, params, _ = requests[0]
+        # The job and its clip are keyed by the request of the whole message
+        whole = data | {"text": message}
+        params = params | {"output_format": SOURCE_FORMAT}
+        post_processing = self._get_post_processing()
+        key = cache_key(
+            endpoint, whole, params | {CONF_POST_PROCESSING: post_processing}
+        )
+        if self.audio_cache is not None:
+            with span("cache_read", long_form=True):
+                audio = await self.audio_cache.async_get(key)
+            if audio is not None:
+                _LOGGER.debug("Serving a long message from the audio cache")
+                return "wav", audio
+
+        job = await self.hass.async_add_executor_job(
+            self.long_form.open, cache_key(endpoint, whole, params).hex(), chunks
+        )
+        missing = job.missing
+        _LOGGER.debug(
+            "Synthesizing %s of the %s chunks of a long message",
+            len(missing),
+            len(chunks),
+        )
+        for index in missing:
+            endpoint, data, params, api_key = requests[index]
+            if previous := job.previous_request_ids(index):
+                data = data | {"previous_request_ids": previous}
+            params = params | {"output_format": SOURCE_FORMAT}
+            for attempt in range(1, CHUNK_ATTEMPTS + 1):
+                try:
+                    with span("long_form_chunk", index=index, attempt=attempt):
+                        spool = await self._async_synthesize(
+                            endpoint, data, params, api_key, options
+                        )
+                    break
+                except (httpx.TransportError, httpx.HTTPStatusError) as err:
+                    # Finished chunks are kept, only this one is tried again
+                    if attempt == CHUNK_ATTEMPTS or (
+                        isinstance(err, httpx.HTTPStatusError)
+                        and err.response.status_code < 500
+                    ):
+                        raise
+                    _LOGGER.debug("Retrying chunk %s of a long message: %s", index, err)
+                    await asyncio.sleep(RETRY_DELAY * attempt)
+            try:
+                # Written from the buffer or the temporary file as they are
+                await self.hass.async_add_executor_job(
+                    job.save_chunk, index, spool.request_id, await spool.async_open()
+                )
+            finally:
+                spool.close()
+
+        pcm = join_pcm(
+            await self.hass.async_add_executor_job(job.read_chunks), 0, SOURCE_RATE
+        )
+        if post_processing is not None:
+            with span("post_process"):
+                audio = await self._async_post_process(pcm, post_processing)
+        else:
+            audio = await self.hass.async_add_executor_job(pcm_to_wav, pcm, SOURCE_RATE)
+        if self.audio_cache is not None:
+            with span("cache_write", long_form=True):
+                await self.audio_cache.async_put(key, audio)
+            self._remember_phrase(endpoint, whole, key, "wav")
+        await self.hass.async_add_executor_job(job.remove)
+        return "wav", audio
+
+    def _get_post_processing(self) -> dict | None:
+        """Return the post-processing settings, or None if disabled."""
+        options = self.config_entry.options if self.config_entry else {}
+        if not options.get(CONF_POST_PROCESSING, DEFAULT_POST_PROCESSING):
+            return None
+        return {
+            CONF_SAMPLE_RATE: int(options.get(CONF_SAMPLE_RATE, DEFAULT_SAMPLE_RATE)),
+            CONF_TARGET_LOUDNESS: float(
+                options.get(CONF_TARGET_LOUDNESS, DEFAULT_TARGET_LOUDNESS)
+            ),
+        }
+
+    async def _async_post_process(self, pcm: bytes, settings: dict) -> bytes:
+        """Trim, normalize and resample PCM in the process pool."""
+        start = time.monotonic()
+        audio, timings = await self.hass.loop.run_in_executor(
+            async_get_process_pool(self.hass),
+            process_audio,
+            pcm,
+            SOURCE_RATE,
+            settings[CONF_SAMPLE_RATE],
+            settings[CONF_TARGET_LOUDNESS],
+        )
+        # Time spent waiting for a worker and copying the audio between processes
+        timings["pool"] = max(0.0, time.monotonic() - start - sum(timings.values()))
+
+        for stage, seconds in timings.items():
+            total, count = self.post_processing_timings.get(stage, (0.0, 0))
+            self.post_processing_timings[stage] = (total + seconds, count + 1)
+        _LOGGER.debug(
+            "Post-processed %s bytes of PCM into %s bytes: %s",
+            len(pcm),
+            len(audio),
+            ", ".join(
+                f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in timings.items()
+            ),
+        )
+        return audio
+
+    async def _async_timed_post(
+        self, endpoint: str, data: dict, params: dict, api_key: str
+    ) -> AudioSpool:
+        """Post a synthesis request and record its time to first audio."""
+        spool = await self.post(endpoint, data, params, api_key=api_key)
+        self.latency_controller.observe(
+            data["model_id"],
+            params["optimize_streaming_latency"],
+            len(data["text"]),
+            dt_util.now().hour,
+            spool.first_byte,
+        )
+        return spool
+
+    async def _async_run_request(
+        self,
+        request: Callable[[], Awaitable[AudioSpool]],
+        deadline: float | None,
+        supersede: str | None,
+    ) -> AudioSpool:
+        """Run a synthesis request in a concurrency slot.
+
+        The request is abandoned, and its HTTP stream closed, when the caller is
+        cancelled, when the deadline passes, or when a newer request is made
+        with the same supersede key.
+        """
+
+        queued = True
+
+        async def _async_in_slot() -> AudioSpool:
+            nonlocal queued
+            with span("queue"):
+                await self._slots.acquire()
+            queued = False
+            try:
+                return await request()
+            finally:
+                self._slots.release()
+
+        task = asyncio.ensure_future(_async_in_slot())
+        if supersede:
+            if (previous := self._pending.get(supersede)) is not None:
+                _LOGGER.debug("Superseding pending synthesis for %s", supersede)
+                previous.cancel()
+            self._pending[supersede] = task
+
+        spool = None
+        try:
+            async with asyncio.timeout(float(deadline) if deadline else None):
+                spool = await task
+            result, spool = spool, None
+            return result
+        except TimeoutError as err:
+            raise DeadlineExceededError(
+                f"Synthesis did not finish within {deadline} seconds", queued
+            ) from err
+        except asyncio.CancelledError:
+            if task.cancelled() and not asyncio.current_task().cancelling():
+                raise HomeAssistantError(
+                    f"Synthesis was superseded by a newer message for {supersede}"
+                ) from None
+            raise
+        finally:
+            if supersede and self._pending.get(supersede) is task:
+                del self._pending[supersede]
+            if spool is not None:
+                # The audio arrived as the deadline passed, nobody will read it
+                spool.close()
+
+    async def stream_tts_audio(
+        self,
+        message: str,
+        options: dict | None = None,
+        output_format: str | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Yield text-to-speech audio chunks as the streaming endpoint sends them.
+
+        The audio is MP3 unless another ElevenLabs output format is given. As
+        for `get_tts_audio`, a cached clip is served from the audio cache, the
+        request goes through the circuit breaker and fails over to the next
+        endpoint, and the clip is cached once it was streamed whole.
+        """
+        endpoint, data, params, api_key = await self.build_tts_request(message, options)
+        if output_format:
+            params = params | {"output_format": output_format}
+        key = cache_key(endpoint, data, params)
+        extension = "mp3" if "output_format" not in params else None
+        if self.audio_cache is not None:
+            with span("cache_read", streaming=True):
+                audio = await self.audio_cache.async_get(key)
+            if audio is not None:
+                _LOGGER.debug("Streaming TTS from the audio cache")
+                if extension:
+                    self._remember_phrase(endpoint, data, key, extension)
+                yield audio
+                return
+
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("ElevenLabs is degraded, not sending the request")
+        headers = self.get_headers(api_key, audio=True)
+        content = orjson.dumps(data)
+        chunks: list[bytes] = []
+        first_byte = 0.0
+
+        async def _async_send(base_url: str) -> httpx.Response:
+            nonlocal first_byte
+            start = time.monotonic()
+            response = await self._async_send_streaming(
+                self.session.build_request(
+                    "POST",
+                    f"{base_url}/v1/{endpoint}/stream",
+                    headers=headers,
+                    content=content,
+                    params=params,
+                    timeout=httpx.Timeout(60),
+                )
+            )
+            # Only the time ElevenLabs took to answer counts, not the wait for
+            # a slot or how fast the chunks are consumed
+            first_byte = time.monotonic() - start
+            return response
+
+        try:
+            async with self._slots:
+                response = await self._async_failover(_async_send)
+                try:
+                    async for chunk in response.aiter_bytes():
+                        chunks.append(chunk)
+                        yield chunk
+                finally:
+                    await response.aclose()
+        except BaseException as err:
+            self._record_failure(err)
+            raise
+        self.breaker.record_success(first_byte)
+
+        if self.audio_cache is not None:
+            with span("cache_write", streaming=True):
+                await self.audio_cache.async_put(key, b"".join(chunks))
+            if extension:
+                self._remember_phrase(endpoint, data, key, extension)
+
+    async def build_tts_request(
+        self, message: str, options: dict | None = None
+    ) -> tuple[str, dict, dict, str]:
+        """Build the endpoint, body, query params and API key for a TTS request."""
+        with span("resolve_options"):
+            tts_options = await self.get_tts_options(options)
         voice_id, stability, similarity, model, optimize_latency, api_key = tts_options[
             :6
         ]
 
+        if self.config_entry and self.config_entry.options.get(
+            CONF_ADAPTIVE_LATENCY, DEFAULT_ADAPTIVE_LATENCY
+        ):
+            # Settings given in the call options are pinned, the rest is chosen
+            options = options or {}
+            pinned_level = options.get(CONF_OPTIMIZE_LATENCY)
+            model, optimize_latency = self.latency_controller.choose(
+                len(message),
+                dt_util.now().hour,
+                options.get(CONF_PRIORITY, DEFAULT_PRIORITY),
+                options.get(CONF_MODEL),
+                int(pinned_level) if pinned_level is not None else None,
+            )
+
+        # Languages without local rules are still normalized by ElevenLabs
+        if (normalized := self._normalize_text(message, options)) is not None:
+            message = normalized
+
         endpoint = f"text-to-speech/{voice_id}"
         data = {
             "text": message,
@@ -142,18 +959,36 @@ class ElevenLabsClient:
             },
         }
 
-        if model == "eleven_multilingual_v2":
+        self.metadata.validate(model, message)
+        if len(tts_options) > 6:
             style, use_speaker_boost = tts_options[6:]
+        else:
+            # Adaptive latency may have picked a model with style settings
+            style, use_speaker_boost = self._get_style_options(
+                options or {}, self.metadata.get_voice_settings(voice_id)
+            )
+        if self.metadata.supports_style(model):
             data["voice_settings"]["style"] = style
+        if self.metadata.supports_speaker_boost(model):
             data["voice_settings"]["use_speaker_boost"] = use_speaker_boost
 
+        if self.pronunciation_locators:
+            data["pronunciation_dictionary_locators"] = self.pronunciation_locators
+        if normalized is not None:
+            data["apply_text_normalization"] = "off"
+
         params = {"optimize_streaming_latency": optimize_latency}
-        _LOGGER.debug("Requesting TTS from %s", endpoint)
-        _LOGGER.debug("Request data: %s", data)
-        _LOGGER.debug("Request params: %s", params)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            # The message itself is left out, it can be long and private
+            _LOGGER.debug(
+                "Requesting TTS from %s: %s chars with %s, params %s",
+                endpoint,
+                len(message),
+                model,
+                params,
+            )
 
-        resp = await self.post(endpoint, data, params, api_key=api_key)
-        return "mp3", resp.content
+        return endpoint, data, params, api_key
 
     async def get_tts_options(
         self, options: dict
@@ -163,8 +998,8 @@ class ElevenLabsClient:
         if not options:
             options = {}
 
-        if options.get(ATTR_AUDIO_OUTPUT, "mp3") != "mp3":
-            raise ValueError("Only MP3 output is supported.")
+        if options.get(ATTR_AUDIO_OUTPUT, "mp3") not in AUDIO_OUTPUTS:
+            raise ValueError("Only MP3 and WAV output are supported.")
 
         # Get the voice from options, or fall back to the configured default voice
         voice_opt = (
@@ -173,19 +1008,10 @@ class ElevenLabsClient:
             or DEFAULT_VOICE
         )
 
-        # Get the stability, similarity, model, and optimize latency from options,
-        # or fall back to the configured default values
-        stability = (
-            options.get(CONF_STABILITY)
-            or self.config_entry.options.get(CONF_STABILITY)
-            or DEFAULT_STABILITY
-        )
-
-        similarity = (
-            options.get(CONF_SIMILARITY)
-            or self.config_entry.options.get(CONF_SIMILARITY)
-            or DEFAULT_SIMILARITY
-        )
+        # Get the voice ID by name from the TTS service
+        with span("voice_lookup"):
+            voice = await self._async_lookup_voice(voice_opt)
+        voice_id = voice.voice_id
 
         model = (
             options.get(CONF_MODEL)
@@ -193,10 +1019,37 @@ class ElevenLabsClient:
             or DEFAULT_MODEL
         )
 
-        optimize_latency = (
-            options.get(CONF_OPTIMIZE_LATENCY)
-            or self.config_entry.options.get(CONF_OPTIMIZE_LATENCY)
-            or DEFAULT_OPTIMIZE_LATENCY
+        # The voice's own defaults apply to settings configured nowhere else
+        voice_settings = None
+        keys = [CONF_STABILITY, CONF_SIMILARITY]
+        if self.metadata.supports_style(model):
+            keys.append(CONF_STYLE)
+        if any(
+            options.get(key) is None and self.config_entry.options.get(key) is None
+            for key in keys
+        ):
+            voice_settings = await self.metadata.async_get_voice_settings(voice_id)
+
+        # Get the stability, similarity and optimize latency from options, or
+        # fall back to the configured default values
+        stability = _first_set(
+            options.get(CONF_STABILITY),
+            self.config_entry.options.get(CONF_STABILITY),
+            voice_settings.stability if voice_settings else None,
+            DEFAULT_STABILITY,
+        )
+
+        similarity = _first_set(
+            options.get(CONF_SIMILARITY),
+            self.config_entry.options.get(CONF_SIMILARITY),
+            voice_settings.similarity_boost if voice_settings else None,
+            DEFAULT_SIMILARITY,
+        )
+
+        optimize_latency = _first_set(
+            options.get(CONF_OPTIMIZE_LATENCY),
+            self.config_entry.options.get(CONF_OPTIMIZE_LATENCY),
+            DEFAULT_OPTIMIZE_LATENCY,
         )
 
         api_key = (
@@ -208,39 +1061,8 @@ class ElevenLabsClient:
         # Convert optimize_latency to an integer
         optimize_latency = int(optimize_latency)
 
-        # Get the voice ID by name from the TTS service
-
-        voice = await self.get_voice_by_name_or_id(voice_opt)
-        voice_id = voice.get("voice_id", None)
-
-        # If voice_id is not found, refresh the list of voices and try again
-        if not voice_id:
-            _LOGGER.debug("Could not find voice, refreshing voices")
-            await self.get_voices()
-            voice = await self.get_voice_by_name_or_id(voice_opt)
-            voice_id = voice.get("voice_id", None)
-
-            # If voice_id is still not found, log a warning
-            #  and use the first available voice
-            if not voice_id:
-                _LOGGER.warning(
-                    "Could not find voice with name %s, available voices: %s",
-                    voice,
-                    [voice["name"] for voice in self._voices],
-                )
-                voice_id = self._voices[0]["voice_id"]
-
-        if model == "eleven_multilingual_v2":
-            style = (
-                options.get(CONF_STYLE)
-                or self.config_entry.options.get(CONF_STYLE)
-                or DEFAULT_STYLE
-            )
-            use_speaker_boost = (
-                options.get(CONF_USE_SPEAKER_BOOST)
-                or self.config_entry.options.get(CONF_USE_SPEAKER_BOOST)
-                or DEFAULT_USE_SPEAKER_BOOST
-            )
+        if self.metadata.supports_style(model):
+            style, use_speaker_boost = self._get_style_options(options, voice_settings)
             return (
                 voice_id,
                 stability,
@@ -260,3 +1082,83 @@ class ElevenLabsClient:
             optimize_latency,
             api_key,
         )
+
+    def _normalize_text(self, message: str, options: dict | None) -> str | None:
+        """Return the message normalized locally, None if left to ElevenLabs."""
+        if (
+            not self.config_entry
+            or self.config_entry.options.get(
+                CONF_TEXT_NORMALIZATION, DEFAULT_TEXT_NORMALIZATION
+            )
+            != TEXT_NORMALIZATION_LOCAL
+        ):
+            return None
+        with span("normalize_text"):
+            return normalize_text(message, (options or {}).get(ATTR_LANGUAGE) or "en")
+
+    async def _async_lookup_voice(self, voice_opt: str) -> VoiceRecord:
+        """Return a voice, refreshing the catalog if it is unknown."""
+        voice = await self.get_voice_by_name_or_id(voice_opt)
+
+        # If the voice is not found, refresh the list of voices and try again
+        if voice is None:
+            _LOGGER.debug("Could not find voice, refreshing voices")
+            await self.get_voices()
+            voice = await self.get_voice_by_name_or_id(voice_opt)
+
+            # If the voice is still not found, log a warning
+            #  and use the first available voice
+            if voice is None:
+                _LOGGER.warning(
+                    "Could not find voice with name %s, using %s from %s voices",
+                    voice_opt,
+                    self.catalog.first(),
+                    len(self.catalog),
+                )
+                if (voice := self.catalog.first()) is None:
+                    raise HomeAssistantError("No ElevenLabs voices are available")
+        return voice
+
+    def _get_style_options(
+        self, options: dict, voice_settings: VoiceSettings | None = None
+    ) -> tuple[float, bool]:
+        """Get the style and speaker boost settings."""
+        style = _first_set(
+            options.get(CONF_STYLE),
+            self.config_entry.options.get(CONF_STYLE),
+            voice_settings.style if voice_settings else None,
+            DEFAULT_STYLE,
+        )
+        use_speaker_boost = _first_set(
+            options.get(CONF_USE_SPEAKER_BOOST),
+            self.config_entry.options.get(CONF_USE_SPEAKER_BOOST),
+            DEFAULT_USE_SPEAKER_BOOST,
+        )
+        return style, use_speaker_boost
+
+
+class _HttpTrace:
+    """Record connection and time to first byte spans from httpcore events."""
+
+    def __init__(self, trace: Trace) -> None:
+        self._trace = trace
+        self._started: dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        """Handle an httpcore trace event."""
+        now = time.perf_counter()
+        step, _, stage = event_name.rpartition(".")
+        if step in ("connection.connect_tcp", "connection.start_tls"):
+            if stage == "started":
+                self._started[step] = now
+            elif stage == "complete" and step in self._started:
+                name = "connect" if step == "connection.connect_tcp" else "tls"
+                self._trace.add_span(name, self._started[step], now)
+        elif step.endswith(".send_request_headers") and stage == "started":
+            self._started["request"] = now
+        elif (
+            step.endswith(".receive_response_headers")
+            and stage == "complete"
+            and "request" in self._started
+        ):
+            self._trace.add_span("ttfb", self._started["request"], now)
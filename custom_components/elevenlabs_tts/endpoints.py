@@ -0,0 +1,169 @@
+"""Choice of the API endpoint requests are sent to.
+
+Several base URLs of the API can be configured, such as a regional or data
+residency endpoint next to the global one. Each is probed in the background
+and requests go to the healthy one with the lowest round trip time. An
+endpoint that cannot be reached is skipped for a while, the next one in line
+taking its requests.
+"""
+
+import asyncio
+from collections.abc import Callable
+import logging
+import time
+
+import httpx
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds a probe may take before the endpoint counts as unreachable
+PROBE_TIMEOUT = 5.0
+# Weight of a new probe in the average round trip time of an endpoint
+LATENCY_SMOOTHING = 0.3
+# Seconds an endpoint that failed is skipped, unless all of them failed
+ENDPOINT_RETRY_SECONDS = 30.0
+# Gateway errors of one endpoint that another one may not have
+FAILOVER_STATUSES = {502, 503, 504}
+
+
+def parse_base_urls(value: str) -> list[str]:
+    """Return the base URLs of a comma separated option, without trailing slash."""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+class Endpoint:
+    """A base URL of the API and how it behaved lately."""
+
+    __slots__ = ("url", "latency", "failed_at")
+
+    def __init__(self, url: str) -> None:
+        """Initialize an endpoint not probed yet."""
+        self.url = url
+        # Average round trip time of the probes in seconds, None until probed
+        self.latency: float | None = None
+        # Monotonic time of the last failure, None while healthy
+        self.failed_at: float | None = None
+
+    def is_healthy(self, now: float) -> bool:
+        """Return True if the endpoint did not fail recently."""
+        return self.failed_at is None or now - self.failed_at >= ENDPOINT_RETRY_SECONDS
+
+
+class EndpointPool:
+    """The configured endpoints, healthiest and fastest first."""
+
+    def __init__(self, urls: list[str]) -> None:
+        """Initialize the pool, in the configured order until probed."""
+        if not urls:
+            raise ValueError("At least one base URL is needed")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self._listeners: list[Callable[[], None]] = []
+        # Rounded latencies last reported to the listeners
+        self._reported: dict[str, float | None] = {}
+
+    def __len__(self) -> int:
+        """Return the number of endpoints."""
+        return len(self.endpoints)
+
+    def async_add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call a listener when the report changes, return a function removing it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def ordered(self) -> list[Endpoint]:
+        """Return the endpoints in the order requests should try them.
+
+        Healthy endpoints come first by round trip time, those not probed yet
+        after the probed ones, then the failed ones from the oldest failure.
+        """
+        if len(self.endpoints) == 1:
+            return self.endpoints
+        now = time.monotonic()
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.is_healthy(now)]
+        failed = [
+            endpoint for endpoint in self.endpoints if not endpoint.is_healthy(now)
+        ]
+        healthy.sort(
+            key=lambda endpoint: (endpoint.latency is None, endpoint.latency or 0.0)
+        )
+        failed.sort(key=lambda endpoint: endpoint.failed_at)
+        return healthy + failed
+
+    def best(self) -> Endpoint:
+        """Return the endpoint requests are sent to first."""
+        return self.ordered()[0]
+
+    def record_success(self, endpoint: Endpoint) -> None:
+        """Mark an endpoint healthy again after it answered."""
+        if endpoint.failed_at is not None:
+            _LOGGER.info("ElevenLabs endpoint %s is reachable again", endpoint.url)
+            endpoint.failed_at = None
+            self._notify()
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        """Skip an endpoint for a while after it could not be reached."""
+        was_healthy = endpoint.failed_at is None
+        endpoint.failed_at = time.monotonic()
+        if was_healthy and len(self.endpoints) > 1:
+            _LOGGER.warning(
+                "ElevenLabs endpoint %s is unreachable, using %s",
+                endpoint.url,
+                self.best().url,
+            )
+        self._notify()
+
+    def observe(self, endpoint: Endpoint, seconds: float) -> None:
+        """Add the round trip time of a probe to the average of an endpoint."""
+        if endpoint.latency is None:
+            endpoint.latency = seconds
+        else:
+            endpoint.latency += LATENCY_SMOOTHING * (seconds - endpoint.latency)
+
+    async def async_probe(self, session: httpx.AsyncClient) -> None:
+        """Measure the round trip time of every endpoint at once.
+
+        Any HTTP response counts, the probe is not authenticated and only
+        checks that the endpoint answers.
+        """
+
+        async def _async_probe(endpoint: Endpoint) -> None:
+            start = time.monotonic()
+            try:
+                response = await session.head(endpoint.url, timeout=PROBE_TIMEOUT)
+            except httpx.TransportError as err:
+                _LOGGER.debug("Probe of %s failed: %s", endpoint.url, err)
+                self.record_failure(endpoint)
+                return
+            if response.status_code in FAILOVER_STATUSES:
+                self.record_failure(endpoint)
+                return
+            self.observe(endpoint, time.monotonic() - start)
+            self.record_success(endpoint)
+
+        await asyncio.gather(*(_async_probe(endpoint) for endpoint in self.endpoints))
+        self._notify()
+
+    def report(self) -> dict[str, float | None]:
+        """Return the round trip time of the endpoints in milliseconds.
+
+        Rounded to 10 ms so that listeners are not called for jitter, None for
+        an endpoint not probed yet or unreachable.
+        """
+        now = time.monotonic()
+        return {
+            endpoint.url: (
+                round(endpoint.latency * 1000, -1)
+                if endpoint.latency is not None and endpoint.is_healthy(now)
+                else None
+            )
+            for endpoint in self.ordered()
+        }
+
+    def _notify(self) -> None:
+        """Call the listeners if the report changed."""
+        report = self.report()
+        if report == self._reported and list(report) == list(self._reported):
+            return
+        self._reported = report
+        for listener in self._listeners:
+            listener()
@@ -0,0 +1,161 @@
+"""Index of the clips in the ElevenLabs history, reused instead of paid again.
+
+ElevenLabs keeps the clips an account generated in its history. Their text,
+voice, model and settings are synced into an index persisted between starts.
+A sync only pages through the items newer than the newest one already known,
+so after the first one it reads a page at most.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .elevenlabs import ElevenLabsClient
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Items per page of the history, the most the API returns
+HISTORY_PAGE_SIZE = 1000
+# Seconds to wait before saving the index after an item was dropped
+SAVE_DELAY = 60
+# Voice settings closer than this are the same, the API rounds them
+SETTINGS_TOLERANCE = 1e-6
+
+
+def settings_match(requested: dict, generated: dict) -> bool:
+    """Return True if a clip was generated with the requested voice settings.
+
+    Settings left out of the request, because the model ignores them, are
+    not compared.
+    """
+    for name, value in requested.items():
+        if (other := generated.get(name)) is None:
+            return False
+        if isinstance(value, bool) or isinstance(other, bool):
+            if bool(value) != bool(other):
+                return False
+        elif abs(float(value) - float(other)) > SETTINGS_TOLERANCE:
+            return False
+    return True
+
+
+class HistoryIndex:
+    """Exact lookups of history items by text, voice, model and settings."""
+
+    def __init__(self, client: "ElevenLabsClient", entry_id: str) -> None:
+        """Initialize an empty index."""
+        self._client = client
+        self._store = Store(
+            client.hass, STORAGE_VERSION, f"{DOMAIN}.history.{entry_id}"
+        )
+        # {(voice_id, model_id, text): [(history item ID, voice settings)]}
+        self._items: dict[tuple[str, str, str], list[tuple[str, dict]]] = {}
+        self._ids: set[str] = set()
+        # Creation time of the newest item synced, in seconds since the epoch
+        self._newest = 0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of items indexed."""
+        return len(self._ids)
+
+    def _add(self, item_id: str, key: tuple[str, str, str], settings: dict) -> None:
+        """Index an item."""
+        if item_id in self._ids:
+            return
+        self._ids.add(item_id)
+        self._items.setdefault(key, []).append((item_id, settings))
+
+    def _add_from_api(self, item: dict) -> None:
+        """Index an item of the history, if it holds a finished MP3 clip."""
+        if item.get("state", "created") != "created":
+            return
+        if item.get("content_type", "audio/mpeg") != "audio/mpeg":
+            return
+        if not all(item.get(field) for field in ("voice_id", "model_id", "text")):
+            return
+        self._add(
+            item["history_item_id"],
+            (item["voice_id"], item["model_id"], item["text"]),
+            item.get("settings") or {},
+        )
+
+    def _as_dict(self) -> dict:
+        """Return the index as stored."""
+        return {
+            "newest": self._newest,
+            "items": [
+                [item_id, *key, settings]
+                for key, items in self._items.items()
+                for item_id, settings in items
+            ],
+        }
+
+    async def async_load(self) -> None:
+        """Load the index synced before."""
+        if (stored := await self._store.async_load()) is None:
+            return
+        self._newest = stored["newest"]
+        for item_id, voice_id, model_id, text, settings in stored["items"]:
+            self._add(item_id, (voice_id, model_id, text), settings)
+        _LOGGER.debug("Loaded %s history items", len(self))
+
+    async def async_sync(self) -> int:
+        """Index the items added to the history since the last sync.
+
+        Returns the number of items added.
+        """
+        async with self._lock:
+            before = len(self)
+            newest = self._newest
+            params: dict = {"page_size": HISTORY_PAGE_SIZE}
+            while True:
+                page = await self._client.get("history", params=params)
+                items = page.get("history") or []
+                # Items are listed newest first
+                for item in items:
+                    newest = max(newest, item.get("date_unix", 0))
+                    self._add_from_api(item)
+                if (
+                    not page.get("has_more")
+                    or not items
+                    or items[-1].get("date_unix", 0) <= self._newest
+                ):
+                    break
+                params["start_after_history_item_id"] = page["last_history_item_id"]
+
+            added = len(self) - before
+            if added or newest != self._newest:
+                self._newest = newest
+                await self._store.async_save(self._as_dict())
+            _LOGGER.debug("Synced %s new history items", added)
+            return added
+
+    def find(
+        self, voice_id: str, model_id: str, text: str, settings: dict
+    ) -> str | None:
+        """Return the ID of an item generated from the same request."""
+        for item_id, generated in self._items.get((voice_id, model_id, text), []):
+            if settings_match(settings, generated):
+                return item_id
+        return None
+
+    def discard(self, item_id: str) -> None:
+        """Drop an item no longer in the history."""
+        if item_id not in self._ids:
+            return
+        self._ids.discard(item_id)
+        for key, items in self._items.items():
+            if any(other == item_id for other, _ in items):
+                if not (items := [item for item in items if item[0] != item_id]):
+                    del self._items[key]
+                else:
+                    self._items[key] = items
+                break
+        self._store.async_delay_save(self._as_dict, SAVE_DELAY)
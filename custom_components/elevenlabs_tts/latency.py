@@ -0,0 +1,172 @@
+"""Adaptive choice of model and streaming latency level per request."""
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Models the controller chooses from, highest quality first
+ADAPTIVE_MODELS = [
+    "eleven_multilingual_v2",
+    "eleven_turbo_v2_5",
+    "eleven_flash_v2_5",
+]
+LATENCY_LEVELS = range(5)
+
+# Seconds until the first audio arrives that each priority class aims for
+PRIORITY_URGENT = "urgent"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+DEFAULT_PRIORITY = PRIORITY_NORMAL
+LATENCY_TARGETS = {
+    PRIORITY_URGENT: 0.6,
+    PRIORITY_NORMAL: 1.0,
+    PRIORITY_LOW: 2.0,
+}
+# Seconds of waiting each priority class accepts per second of speech on top of
+# its target, a long message plays long enough for its wait to matter less
+WAIT_ALLOWANCE = {
+    PRIORITY_URGENT: 0.0,
+    PRIORITY_NORMAL: 0.05,
+    PRIORITY_LOW: 0.1,
+}
+# Characters spoken per second, to tell the duration of a message
+CHARS_PER_SECOND = 15
+
+# Upper bounds of the message length buckets, in characters
+LENGTH_BUCKETS = (60, 200, 600)
+# Hours of the day are grouped in blocks of this size
+HOURS_PER_BUCKET = 6
+# Weight of each new observation in the moving average
+SMOOTHING = 0.2
+
+# Estimates of the time to first audio used before anything was observed:
+# seconds before the first chunk, seconds added per character of the message,
+# and the share of that time saved per latency level
+PRIOR_FIRST_AUDIO = {
+    "eleven_multilingual_v2": 0.9,
+    "eleven_turbo_v2_5": 0.35,
+    "eleven_flash_v2_5": 0.2,
+}
+PRIOR_PER_CHAR = {
+    "eleven_multilingual_v2": 0.0005,
+    "eleven_turbo_v2_5": 0.0003,
+    "eleven_flash_v2_5": 0.0002,
+}
+PRIOR_LEVEL_SPEEDUP = 0.05
+
+
+def latency_target(priority: str, length: int) -> float:
+    """Return the seconds to first audio acceptable for a message."""
+    if priority not in LATENCY_TARGETS:
+        priority = DEFAULT_PRIORITY
+    return (
+        LATENCY_TARGETS[priority] + WAIT_ALLOWANCE[priority] * length / CHARS_PER_SECOND
+    )
+
+
+def _length_bucket(length: int) -> int:
+    """Return the bucket of a message length."""
+    for bucket, limit in enumerate(LENGTH_BUCKETS):
+        if length <= limit:
+            return bucket
+    return len(LENGTH_BUCKETS)
+
+
+class LatencyController:
+    """Pick the model and latency level expected to meet a latency target.
+
+    Observed times to first audio are kept as moving averages per model,
+    latency level, message length bucket and time of day. The controller
+    prefers quality: it picks the best model, at the lowest latency level,
+    whose estimate meets the target of the request's priority class and
+    length, and falls back to the fastest estimate when nothing does.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the controller."""
+        # {(model, level, length bucket, hour bucket): (average seconds, count)}
+        self._history: dict[tuple[str, int, int, int], tuple[float, int]] = {}
+
+    def observe(
+        self, model: str, level: int, length: int, hour: int, seconds: float
+    ) -> None:
+        """Record the seconds a request took to return its first audio."""
+        key = (model, level, _length_bucket(length), hour // HOURS_PER_BUCKET)
+        if (previous := self._history.get(key)) is None:
+            self._history[key] = (seconds, 1)
+        else:
+            average, count = previous
+            self._history[key] = (
+                average + SMOOTHING * (seconds - average),
+                count + 1,
+            )
+
+    def estimate(self, model: str, level: int, length: int, hour: int) -> float:
+        """Return the expected time to first audio of a request."""
+        bucket = _length_bucket(length)
+        if (
+            observed := self._history.get(
+                (model, level, bucket, hour // HOURS_PER_BUCKET)
+            )
+        ) or (observed := self._combined(model, level, bucket)):
+            return observed[0]
+
+        first_audio = PRIOR_FIRST_AUDIO.get(
+            model, PRIOR_FIRST_AUDIO["eleven_turbo_v2_5"]
+        ) + length * PRIOR_PER_CHAR.get(model, PRIOR_PER_CHAR["eleven_turbo_v2_5"])
+        return first_audio * (1 - PRIOR_LEVEL_SPEEDUP * level)
+
+    def _combined(
+        self, model: str, level: int, bucket: int
+    ) -> tuple[float, int] | None:
+        """Return the average over all times of day, weighted by count."""
+        total = count = 0
+        for (h_model, h_level, h_bucket, _), (average, n) in self._history.items():
+            if (h_model, h_level, h_bucket) == (model, level, bucket):
+                total += average * n
+                count += n
+        return (total / count, count) if count else None
+
+    def choose(
+        self,
+        length: int,
+        hour: int,
+        priority: str = DEFAULT_PRIORITY,
+        model: str | None = None,
+        level: int | None = None,
+    ) -> tuple[str, int]:
+        """Return the model and latency level for a request.
+
+        A model or level passed in is pinned and only the other one is chosen.
+        """
+        target = latency_target(priority, length)
+        candidates = [
+            (candidate_model, candidate_level)
+            for candidate_model in ([model] if model else ADAPTIVE_MODELS)
+            for candidate_level in ([level] if level is not None else LATENCY_LEVELS)
+        ]
+        estimates = {
+            candidate: self.estimate(*candidate, length, hour)
+            for candidate in candidates
+        }
+
+        for candidate in candidates:
+            if estimates[candidate] <= target:
+                reason = "best quality within target"
+                break
+        else:
+            candidate = min(candidates, key=estimates.get)
+            reason = "no choice meets the target, using the fastest"
+
+        _LOGGER.debug(
+            "Chose %s at latency level %s for %s chars (%s, target %.2fs, "
+            "estimate %.2fs): %s",
+            candidate[0],
+            candidate[1],
+            length,
+            priority,
+            target,
+            estimates[candidate],
+            reason,
+        )
+        return candidate
@@ -0,0 +1,182 @@
+"""Long messages synthesized chunk by chunk, resumable after a failure.
+
+A long message is split at sentence ends into chunks requested one after the
+other, each one passing the request IDs of the chunks before it so ElevenLabs
+keeps the prosody continuous. The audio and request ID of every finished chunk
+are written to a job folder, so a retry of the message, even after a restart,
+only requests the chunks that are missing.
+
+All methods of the job classes do blocking I/O and are meant to be called from
+executor threads.
+"""
+
+import logging
+import os
+import re
+import shutil
+import time
+from typing import IO
+
+import orjson
+
+_LOGGER = logging.getLogger(__name__)
+
+JOBS_FOLDER = "long_form"
+STATE_FILE = "state.json"
+# Attempts at a chunk before the message fails, and seconds between them
+CHUNK_ATTEMPTS = 3
+RETRY_DELAY = 1.0
+# ElevenLabs stitches a request to at most this many previous requests
+MAX_PREVIOUS_REQUESTS = 3
+
+# A sentence ends with its punctuation and the spaces after it, or a line break
+_SENTENCE_END = re.compile(r"(?<=[.!?…;:])\s+|\n+")
+
+
+def split_long_form(message: str, max_chars: int) -> list[str]:
+    """Split a message into chunks of at most `max_chars` characters.
+
+    Chunks end at a sentence end when possible, a longer sentence is cut
+    between words, and a longer word is cut anywhere.
+    """
+    chunks: list[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(message):
+        if not (sentence := sentence.strip()):
+            continue
+        pieces = [sentence]
+        if len(sentence) > max_chars:
+            pieces = []
+            for word in sentence.split():
+                while len(word) > max_chars:
+                    pieces.append(word[:max_chars])
+                    word = word[max_chars:]
+                if pieces and len(pieces[-1]) + 1 + len(word) <= max_chars:
+                    pieces[-1] = f"{pieces[-1]} {word}"
+                else:
+                    pieces.append(word)
+        for piece in pieces:
+            if current and len(current) + 1 + len(piece) <= max_chars:
+                current = f"{current} {piece}"
+            else:
+                if current:
+                    chunks.append(current)
+                current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class LongFormJob:
+    """The chunks of one message and those already synthesized."""
+
+    def __init__(self, path: str, chunks: list[str]) -> None:
+        """Open the job in its folder, keeping the chunks already finished."""
+        self.path = path
+        self.chunks = chunks
+        # Request ID of each chunk, None until it was synthesized
+        self.request_ids: list[str | None] = [None] * len(chunks)
+        try:
+            with open(os.path.join(path, STATE_FILE), "rb") as file:
+                state = orjson.loads(file.read())
+        except (OSError, orjson.JSONDecodeError):
+            state = None
+        if state is not None and state["chunks"] == chunks:
+            self.request_ids = [
+                request_id if os.path.exists(self._chunk_path(index)) else None
+                for index, request_id in enumerate(state["request_ids"])
+            ]
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+            self._save_state()
+
+    @property
+    def missing(self) -> list[int]:
+        """Return the indexes of the chunks not synthesized yet."""
+        return [index for index, done in enumerate(self.request_ids) if done is None]
+
+    def previous_request_ids(self, index: int) -> list[str]:
+        """Return the request IDs of the chunks right before a chunk."""
+        previous = self.request_ids[max(0, index - MAX_PREVIOUS_REQUESTS) : index]
+        # Stitching only works along an unbroken run of finished chunks
+        ids: list[str] = []
+        for request_id in reversed(previous):
+            if not request_id:
+                break
+            ids.insert(0, request_id)
+        return ids
+
+    def _chunk_path(self, index: int) -> str:
+        """Return the path of the audio of a chunk."""
+        return os.path.join(self.path, f"{index:04d}.pcm")
+
+    def _save_state(self) -> None:
+        """Write the chunks and request IDs, replacing the previous state."""
+        tmp_path = os.path.join(self.path, f"{STATE_FILE}.tmp")
+        with open(tmp_path, "wb") as file:
+            file.write(
+                orjson.dumps({"chunks": self.chunks, "request_ids": self.request_ids})
+            )
+        os.replace(tmp_path, os.path.join(self.path, STATE_FILE))
+
+    def save_chunk(
+        self,
+        index: int,
+        request_id: str | None,
+        audio: bytes | memoryview | IO[bytes],
+    ) -> None:
+        """Keep the audio of a finished chunk, given as bytes or a file.
+
+        A chunk whose response had no request ID is recorded with an empty one.
+        """
+        tmp_path = f"{self._chunk_path(index)}.tmp"
+        with open(tmp_path, "wb") as file:
+            if isinstance(audio, (bytes, memoryview)):
+                file.write(audio)
+            else:
+                shutil.copyfileobj(audio, file)
+        os.replace(tmp_path, self._chunk_path(index))
+        self.request_ids[index] = request_id or ""
+        self._save_state()
+
+    def read_chunks(self) -> list[bytes]:
+        """Return the audio of all chunks, in order."""
+        clips = []
+        for index in range(len(self.chunks)):
+            with open(self._chunk_path(index), "rb") as file:
+                clips.append(file.read())
+        return clips
+
+    def remove(self) -> None:
+        """Delete the job once its clip was put together."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class LongFormJobs:
+    """The folder holding the jobs of long messages in progress."""
+
+    def __init__(self, path: str) -> None:
+        """Initialize the jobs kept in a folder."""
+        self.path = path
+
+    def open(self, job_id: str, chunks: list[str]) -> LongFormJob:
+        """Return the job of a message, resuming it if it was started before."""
+        return LongFormJob(os.path.join(self.path, job_id), chunks)
+
+    def purge(self, max_age: float) -> None:
+        """Delete the jobs not touched for `max_age` seconds."""
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.path, name)
+            try:
+                modified = os.path.getmtime(os.path.join(path, STATE_FILE))
+            except OSError:
+                modified = 0
+            if now - modified > max_age:
+                _LOGGER.debug("Deleting abandoned long-form job %s", name)
+                shutil.rmtree(path, ignore_errors=True)
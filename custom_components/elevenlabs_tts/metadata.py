@@ -0,0 +1,195 @@
+"""Cached model capabilities and voice default settings."""
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.exceptions import HomeAssistantError
+import httpx
+
+if TYPE_CHECKING:
+    from .elevenlabs import ElevenLabsClient
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds before the model list and a voice's default settings are refetched
+MODELS_TTL = 24 * 3600
+VOICE_SETTINGS_TTL = 3600
+# Seconds before fetching the model list again after it failed
+MODELS_RETRY = 300
+
+# Models known to accept style and speaker boost before the list is fetched
+STYLE_MODELS = {"eleven_multilingual_v2"}
+
+
+class InvalidRequestError(HomeAssistantError):
+    """Error to indicate ElevenLabs would reject a request."""
+
+
+class ModelInfo:
+    """The capabilities of a model used to build and check requests."""
+
+    __slots__ = (
+        "model_id",
+        "can_do_text_to_speech",
+        "can_use_style",
+        "can_use_speaker_boost",
+        "max_characters",
+    )
+
+    def __init__(
+        self,
+        model_id: str,
+        can_do_text_to_speech: bool = True,
+        can_use_style: bool = False,
+        can_use_speaker_boost: bool = False,
+        max_characters: int | None = None,
+    ) -> None:
+        """Initialize the model info."""
+        self.model_id = model_id
+        self.can_do_text_to_speech = can_do_text_to_speech
+        self.can_use_style = can_use_style
+        self.can_use_speaker_boost = can_use_speaker_boost
+        self.max_characters = max_characters
+
+    @classmethod
+    def from_api(cls, model: dict) -> "ModelInfo":
+        """Keep the used fields of a model returned by the API."""
+        return cls(
+            model["model_id"],
+            bool(model.get("can_do_text_to_speech", True)),
+            bool(model.get("can_use_style")),
+            bool(model.get("can_use_speaker_boost")),
+            model.get("max_characters_request_subscribed_user")
+            or model.get("max_characters_request_free_user"),
+        )
+
+
+class VoiceSettings:
+    """The default settings of a voice."""
+
+    __slots__ = ("stability", "similarity_boost", "style", "use_speaker_boost")
+
+    def __init__(
+        self,
+        stability: float | None = None,
+        similarity_boost: float | None = None,
+        style: float | None = None,
+        use_speaker_boost: bool | None = None,
+    ) -> None:
+        """Initialize the settings."""
+        self.stability = stability
+        self.similarity_boost = similarity_boost
+        self.style = style
+        self.use_speaker_boost = use_speaker_boost
+
+    @classmethod
+    def from_api(cls, settings: dict) -> "VoiceSettings":
+        """Keep the used fields of voice settings returned by the API."""
+        return cls(
+            settings.get("stability"),
+            settings.get("similarity_boost"),
+            settings.get("style"),
+            settings.get("use_speaker_boost"),
+        )
+
+
+class MetadataCache:
+    """Model capabilities and voice settings, refetched once they expire.
+
+    Checks only read what is already cached, so they never wait on the
+    network. An expired model list is refreshed in the background.
+    """
+
+    def __init__(self, client: "ElevenLabsClient") -> None:
+        """Initialize an empty cache."""
+        self._client = client
+        self._models: dict[str, ModelInfo] = {}
+        # Time of the last attempt to fetch the model list, 0 if never tried
+        self._models_fetched = 0.0
+        self._models_refresh: asyncio.Task | None = None
+        # {voice_id: (fetched at, settings)}
+        self._voice_settings: dict[str, tuple[float, VoiceSettings]] = {}
+
+    async def async_refresh_models(self) -> None:
+        """Fetch the model list."""
+        self._models_fetched = time.monotonic()
+        models = await self._client.get("models")
+        self._models = {
+            model["model_id"]: ModelInfo.from_api(model) for model in models
+        }
+        _LOGGER.debug("Fetched %s models", len(self._models))
+
+    def _refresh_models_if_expired(self) -> None:
+        """Start refreshing the model list in the background once it expired."""
+        ttl = MODELS_TTL if self._models else MODELS_RETRY
+        if not self._models_fetched or time.monotonic() - self._models_fetched < ttl:
+            return
+        if self._models_refresh is not None and not self._models_refresh.done():
+            return
+
+        async def _async_refresh() -> None:
+            try:
+                await self.async_refresh_models()
+            except httpx.HTTPError as err:
+                _LOGGER.debug("Could not refresh the model list: %s", err)
+
+        self._models_refresh = self._client.hass.async_create_background_task(
+            _async_refresh(), "elevenlabs_tts model refresh"
+        )
+
+    def get_model(self, model_id: str) -> ModelInfo | None:
+        """Return the cached capabilities of a model."""
+        self._refresh_models_if_expired()
+        return self._models.get(model_id)
+
+    def supports_style(self, model_id: str) -> bool:
+        """Return True if the model accepts the style setting."""
+        if (model := self.get_model(model_id)) is None:
+            return model_id in STYLE_MODELS
+        return model.can_use_style
+
+    def supports_speaker_boost(self, model_id: str) -> bool:
+        """Return True if the model accepts the speaker boost setting."""
+        if (model := self.get_model(model_id)) is None:
+            return model_id in STYLE_MODELS
+        return model.can_use_speaker_boost
+
+    def validate(self, model_id: str, message: str) -> None:
+        """Raise if ElevenLabs would reject the request, as far as is known."""
+        if not self._models:
+            return
+        if (model := self.get_model(model_id)) is None:
+            raise InvalidRequestError(
+                f"Unknown model {model_id}, available models: {', '.join(self._models)}"
+            )
+        if not model.can_do_text_to_speech:
+            raise InvalidRequestError(f"Model {model_id} does not do text to speech")
+        if model.max_characters and len(message) > model.max_characters:
+            raise InvalidRequestError(
+                f"Message of {len(message)} characters is longer than the "
+                f"{model.max_characters} accepted by {model_id}"
+            )
+
+    def get_voice_settings(self, voice_id: str) -> VoiceSettings | None:
+        """Return the cached default settings of a voice, even if expired."""
+        if (cached := self._voice_settings.get(voice_id)) is None:
+            return None
+        return cached[1]
+
+    async def async_get_voice_settings(self, voice_id: str) -> VoiceSettings:
+        """Return the default settings of a voice, fetching them once expired."""
+        cached = self._voice_settings.get(voice_id)
+        if cached is not None and time.monotonic() - cached[0] < VOICE_SETTINGS_TTL:
+            return cached[1]
+        try:
+            settings = VoiceSettings.from_api(
+                await self._client.get(f"voices/{voice_id}/settings")
+            )
+        except httpx.HTTPError as err:
+            # Keep what is known, do not ask again for every message
+            _LOGGER.debug("Could not fetch settings of voice %s: %s", voice_id, err)
+            settings = cached[1] if cached else VoiceSettings()
+        self._voice_settings[voice_id] = (time.monotonic(), settings)
+        return settings
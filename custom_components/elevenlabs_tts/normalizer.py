@@ -0,0 +1,493 @@
+"""Local expansion of numbers, money, dates, times and units into speakable text.
+
+Each language has a rule table: number words, decimal and unit names, and how
+times and dates are read. The tokens of all rules are matched in one pass by
+a regular expression compiled once per language, so a message is normalized
+in microseconds and always the same way, which ElevenLabs' own normalization
+then no longer needs to do.
+"""
+
+from collections.abc import Callable
+import datetime
+import re
+
+# Numbers from this one on are left as digits
+MAX_NUMBER = 10**15
+# Spaces that group the digits of a number by thousands, as in "10 000"
+GROUP_SPACES = " \u00a0\u202f"
+
+_EN_ONES = (
+    "zero one two three four five six seven eight nine ten eleven twelve "
+    "thirteen fourteen fifteen sixteen seventeen eighteen nineteen"
+).split()
+_EN_TENS = "_ _ twenty thirty forty fifty sixty seventy eighty ninety".split()
+_EN_SCALES = ((10**12, "trillion"), (10**9, "billion"), (10**6, "million"))
+_EN_ORDINALS = {
+    "one": "first",
+    "two": "second",
+    "three": "third",
+    "five": "fifth",
+    "eight": "eighth",
+    "nine": "ninth",
+    "twelve": "twelfth",
+}
+_EN_MONTHS = (
+    "January February March April May June July August September October "
+    "November December"
+).split()
+
+_DE_ONES = (
+    "null eins zwei drei vier fünf sechs sieben acht neun zehn elf zwölf "
+    "dreizehn vierzehn fünfzehn sechzehn siebzehn achtzehn neunzehn"
+).split()
+_DE_TENS = "_ _ zwanzig dreißig vierzig fünfzig sechzig siebzig achtzig neunzig".split()
+_DE_SCALES = (
+    (10**12, "Billion", "Billionen"),
+    (10**9, "Milliarde", "Milliarden"),
+    (10**6, "Million", "Millionen"),
+)
+_DE_DATIVE = re.compile(r"\b(?:am|vom|zum|bis|dem|ab)\s+$", re.IGNORECASE)
+_DE_MONTHS = (
+    "Januar Februar März April Mai Juni Juli August September Oktober "
+    "November Dezember"
+).split()
+
+
+def en_cardinal(number: int) -> str:
+    """Return the English words of a whole number below MAX_NUMBER."""
+    if number < 20:
+        return _EN_ONES[number]
+    if number < 100:
+        tens, ones = divmod(number, 10)
+        return _EN_TENS[tens] + (f"-{_EN_ONES[ones]}" if ones else "")
+    if number < 1000:
+        hundreds, rest = divmod(number, 100)
+        return f"{_EN_ONES[hundreds]} hundred" + (
+            f" {en_cardinal(rest)}" if rest else ""
+        )
+    for scale, name in (*_EN_SCALES, (1000, "thousand")):
+        if number >= scale:
+            high, rest = divmod(number, scale)
+            return f"{en_cardinal(high)} {name}" + (
+                f" {en_cardinal(rest)}" if rest else ""
+            )
+    raise ValueError(number)
+
+
+def en_ordinal(number: int) -> str:
+    """Return the English ordinal words of a whole number."""
+    words = en_cardinal(number)
+    head, sep, last = words.rpartition("-" if "-" in words else " ")
+    if last in _EN_ORDINALS:
+        last = _EN_ORDINALS[last]
+    elif last.endswith("y"):
+        last = f"{last[:-1]}ieth"
+    else:
+        last = f"{last}th"
+    return f"{head}{sep}{last}"
+
+
+def en_year(year: int) -> str:
+    """Return an English year read in pairs of digits, as people say it."""
+    high, low = divmod(year, 100)
+    if year < 1000 or 2000 <= year < 2010 or low == 0 and year % 1000 == 0:
+        return en_cardinal(year)
+    if low == 0:
+        return f"{en_cardinal(high)} hundred"
+    if low < 10:
+        return f"{en_cardinal(high)} oh {en_cardinal(low)}"
+    return f"{en_cardinal(high)} {en_cardinal(low)}"
+
+
+def en_time(hours: int, minutes: int, seconds: int | None) -> str:
+    """Return an English clock time."""
+    if hours % 24 == 0 and minutes == 0:
+        words = "midnight"
+    elif hours % 24 == 0:
+        # Nobody says "zero fifteen" for a quarter past midnight
+        words = f"{en_time(12, minutes, None)} a.m."
+    elif minutes == 0:
+        words = f"{en_cardinal(hours)} o'clock"
+    elif minutes < 10:
+        words = f"{en_cardinal(hours)} oh {en_cardinal(minutes)}"
+    else:
+        words = f"{en_cardinal(hours)} {en_cardinal(minutes)}"
+    if seconds:
+        unit = "second" if seconds == 1 else "seconds"
+        words = f"{words} and {en_cardinal(seconds)} {unit}"
+    return words
+
+
+def en_decade(number: int, suffix: str) -> str:
+    """Return an English decade, such as "the nineties" for "90s"."""
+    words = en_year(number) if number >= 100 else en_cardinal(number)
+    if words.endswith("y"):
+        return f"{words[:-1]}ies"
+    return f"{words}s"
+
+
+def en_date(year: int, month: int, day: int, before: str) -> str:
+    """Return an English calendar date."""
+    return f"{_EN_MONTHS[month - 1]} {en_ordinal(day)}, {en_year(year)}"
+
+
+def de_cardinal(number: int) -> str:
+    """Return the German words of a whole number below MAX_NUMBER."""
+    if number < 20:
+        return _DE_ONES[number]
+    if number < 100:
+        tens, ones = divmod(number, 10)
+        if not ones:
+            return _DE_TENS[tens]
+        return f"{'ein' if ones == 1 else _DE_ONES[ones]}und{_DE_TENS[tens]}"
+    if number < 1000:
+        hundreds, rest = divmod(number, 100)
+        return (
+            f"{'ein' if hundreds == 1 else _DE_ONES[hundreds]}hundert"
+            f"{de_cardinal(rest) if rest else ''}"
+        )
+    if number < 10**6:
+        thousands, rest = divmod(number, 1000)
+        prefix = "ein" if thousands == 1 else de_cardinal(thousands)
+        return f"{prefix}tausend{de_cardinal(rest) if rest else ''}"
+    for scale, singular, plural in _DE_SCALES:
+        if number >= scale:
+            high, rest = divmod(number, scale)
+            name = f"eine {singular}" if high == 1 else f"{de_cardinal(high)} {plural}"
+            return name + (f" {de_cardinal(rest)}" if rest else "")
+    raise ValueError(number)
+
+
+def de_ordinal(number: int) -> str:
+    """Return the German ordinal of a whole number, as in "der dritte"."""
+    if number == 1:
+        return "erste"
+    if number == 3:
+        return "dritte"
+    if number == 7:
+        return "siebte"
+    if number == 8:
+        return "achte"
+    return f"{de_cardinal(number)}{'te' if number < 20 else 'ste'}"
+
+
+def de_year(year: int) -> str:
+    """Return a German year, read in hundreds before 2000."""
+    if 1100 <= year < 2000:
+        high, low = divmod(year, 100)
+        return f"{de_cardinal(high)}hundert{de_cardinal(low) if low else ''}"
+    return de_cardinal(year)
+
+
+def de_time(hours: int, minutes: int, seconds: int | None) -> str:
+    """Return a German clock time."""
+    words = f"{'ein' if hours == 1 else de_cardinal(hours)} Uhr"
+    if minutes:
+        words = f"{words} {de_cardinal(minutes)}"
+    if seconds:
+        unit = "Sekunde" if seconds == 1 else "Sekunden"
+        words = f"{words} und {de_cardinal(seconds)} {unit}"
+    return words
+
+
+def de_decade(number: int, suffix: str) -> str:
+    """Return a German decade, such as "neunziger" for "90er"."""
+    return f"{de_year(number) if number >= 100 else de_cardinal(number)}{suffix}"
+
+
+def de_date(year: int, month: int, day: int, before: str) -> str:
+    """Return a German calendar date, in the dative after "am" and the like."""
+    ending = "n" if _DE_DATIVE.search(before) else "r"
+    return f"{de_ordinal(day)}{ending} {_DE_MONTHS[month - 1]} {de_year(year)}"
+
+
+class LanguageRules:
+    """How one language reads numbers, units, times and dates."""
+
+    __slots__ = (
+        "cardinal",
+        "time",
+        "date",
+        "decade",
+        "minus",
+        "point",
+        "conjunction",
+        "decimal_separators",
+        "thousands_separator",
+        "units",
+        "currencies",
+        "pattern",
+    )
+
+    def __init__(
+        self,
+        cardinal: Callable[[int], str],
+        time: Callable[[int, int, int | None], str],
+        date: Callable[[int, int, int, str], str],
+        decade: Callable[[int, str], str],
+        decade_suffix: str,
+        short_decades: bool,
+        minus: str,
+        point: str,
+        conjunction: str,
+        decimal_separators: str,
+        thousands_separator: str,
+        units: dict[str, tuple[str, str]],
+        currencies: dict[str, tuple[str, str, str, str]],
+    ) -> None:
+        """Initialize the rules and compile their pattern."""
+        self.cardinal = cardinal
+        self.time = time
+        self.date = date
+        self.decade = decade
+        self.minus = minus
+        self.point = point
+        # Joins the main unit and the cents of an amount of money
+        self.conjunction = conjunction
+        self.decimal_separators = decimal_separators
+        self.thousands_separator = thousands_separator
+        # {unit symbol: (read with the number one, name after other numbers)}
+        self.units = units
+        # {currency symbol: (one, plural, one cent, plural of the cents)}
+        self.currencies = currencies
+        # Longest symbols first, so that "kWh" is not read as "kW". A single
+        # letter is only a unit after a space, "1990s" is no number of seconds,
+        # while symbols such as "°C" and "%" attach to the number.
+        symbols = sorted([*units, *currencies], key=len, reverse=True)
+        unit_pattern = "|".join(
+            (
+                rf"(?<=\s){re.escape(unit)}"
+                if len(unit) == 1 and unit.isalpha()
+                else re.escape(unit)
+            )
+            for unit in symbols
+        )
+        # "30s" is more likely seconds than a decade unless written "'30s"
+        short_decade = "[1-9]0" if short_decades else "(?<=['’])[1-9]0"
+        currency_pattern = "|".join(re.escape(symbol) for symbol in currencies)
+        # A number right after a currency symbol is only read with it
+        currency_chars = "".join(re.escape(symbol) for symbol in currencies)
+        self.pattern = re.compile(
+            r"(?P<date>\b\d{4}-\d{2}-\d{2}\b)"
+            r"|(?P<time>\b\d{1,2}:\d{2}(?::\d{2})?\b)"
+            # Decades, "the 1990s" or "the '80s"
+            rf"|['’]?\b(?P<decade>\d{{3}}0|{short_decade})(?P<suffix>{decade_suffix})\b"
+            # Amounts after their currency symbol, "$5" or "-€3.50"
+            rf"|(?<![\w.,:/\-−])(?P<sign>[-−])?(?P<currency>{currency_pattern})\s?"
+            r"(?P<amount>[-−]?\d+(?:[.,]\d+)*)(?![-−:/]\d)(?!\w)"
+            # Ranges, fractions and the like are left alone
+            rf"|(?P<number>(?<![\w.,:/\-−{currency_chars}])[-−]?"
+            # "10 000" is one number, "555 123 4567" is not
+            rf"(?:\d{{1,3}}(?:[{GROUP_SPACES}]\d{{3}})+(?:[.,]\d+)?"
+            rf"(?![{GROUP_SPACES}]?\d)|\d+(?:[.,]\d+)*)(?![-−:/]\d))"
+            rf"(?:\s?(?P<unit>{unit_pattern}))?(?!\w)"
+            # Entity IDs such as "light.living_room" are left alone
+            r"|(?P<state>(?<!\.)\b[^\W\d_]+(?:_[^\W\d_]+)+\b(?!\.\w))"
+        )
+
+    def parse_number(self, text: str) -> tuple[int, str] | None:
+        """Return the whole part and the decimal digits of a number.
+
+        None if the separators make it ambiguous, such as a version number.
+        """
+        text = re.sub(f"[{GROUP_SPACES}]", "", text)
+        parts = re.split(r"([.,])", text)
+        digits, separators = parts[::2], parts[1::2]
+        decimals = ""
+        # "1,234" is a thousand in English, "1.234" is one in German
+        grouped = all(len(group) == 3 for group in digits[1:])
+        if separators and separators[-1] in self.decimal_separators:
+            if separators[-1] != self.thousands_separator or not grouped:
+                decimals = digits.pop()
+                separators.pop()
+        if any(separator != self.thousands_separator for separator in separators):
+            return None
+        if any(len(group) != 3 for group in digits[1:]):
+            return None
+        whole = int("".join(digits))
+        if whole >= MAX_NUMBER:
+            return None
+        return whole, decimals
+
+    def number(self, text: str) -> tuple[str, bool] | None:
+        """Return the words of a number, and whether it is exactly one."""
+        negative = text[0] in "-−"
+        if (parsed := self.parse_number(text.lstrip("-−"))) is None:
+            return None
+        whole, decimals = parsed
+        words = self.cardinal(whole)
+        if decimals:
+            spoken = " ".join(self.cardinal(int(digit)) for digit in decimals)
+            words = f"{words} {self.point} {spoken}"
+        if negative:
+            words = f"{self.minus} {words}"
+        return words, whole == 1 and not decimals.strip("0") and not negative
+
+    def money(self, text: str, symbol: str) -> str | None:
+        """Return the words of an amount of money, reading two decimals as cents."""
+        negative = text[0] in "-−"
+        if (parsed := self.parse_number(text.lstrip("-−"))) is None:
+            return None
+        whole, decimals = parsed
+        one, plural, cent_one, cent_plural = self.currencies[symbol]
+        if decimals and len(decimals) != 2:
+            return f"{self.number(text)[0]} {plural}"
+        cents = int(decimals or 0)
+        words = one if whole == 1 else f"{self.cardinal(whole)} {plural}"
+        if cents:
+            spoken = cent_one if cents == 1 else f"{self.cardinal(cents)} {cent_plural}"
+            words = spoken if not whole else f"{words} {self.conjunction} {spoken}"
+        return f"{self.minus} {words}" if negative else words
+
+    def expand(self, match: re.Match) -> str:
+        """Return the speakable text of a matched token."""
+        token = match.group()
+        if (date := match.group("date")) is not None:
+            year, month, day = (int(part) for part in date.split("-"))
+            try:
+                datetime.date(year, month, day)
+            except ValueError:
+                return token
+            before = match.string[max(0, match.start() - 8) : match.start()]
+            return self.date(year, month, day, before)
+        if (time := match.group("time")) is not None:
+            parts = [int(part) for part in time.split(":")]
+            if parts[0] > 24 or any(part > 59 for part in parts[1:]):
+                return token
+            return self.time(parts[0], parts[1], parts[2] if len(parts) > 2 else None)
+        if (decade := match.group("decade")) is not None:
+            return self.decade(int(decade), match.group("suffix"))
+        if (state := match.group("state")) is not None:
+            return state.replace("_", " ")
+        if (currency := match.group("currency")) is not None:
+            amount = (match.group("sign") or "") + match.group("amount")
+            return self.money(amount, currency) or token
+        unit = match.group("unit")
+        if unit in self.currencies:
+            return self.money(match.group("number"), unit) or token
+        if (number := self.number(match.group("number"))) is None:
+            return token
+        words, is_one = number
+        if unit is None:
+            return words
+        one, plural = self.units[unit]
+        return one if is_one else f"{words} {plural}"
+
+
+_EN_UNITS = {
+    "°C": ("one degree Celsius", "degrees Celsius"),
+    "°F": ("one degree Fahrenheit", "degrees Fahrenheit"),
+    "°": ("one degree", "degrees"),
+    "%": ("one percent", "percent"),
+    "kWh": ("one kilowatt hour", "kilowatt hours"),
+    "Wh": ("one watt hour", "watt hours"),
+    "kW": ("one kilowatt", "kilowatts"),
+    "W": ("one watt", "watts"),
+    "V": ("one volt", "volts"),
+    "km/h": ("one kilometer per hour", "kilometers per hour"),
+    "mph": ("one mile per hour", "miles per hour"),
+    "m/s": ("one meter per second", "meters per second"),
+    "km": ("one kilometer", "kilometers"),
+    "cm": ("one centimeter", "centimeters"),
+    "mm": ("one millimeter", "millimeters"),
+    "m": ("one meter", "meters"),
+    "kg": ("one kilogram", "kilograms"),
+    "g": ("one gram", "grams"),
+    "lb": ("one pound", "pounds"),
+    "L": ("one liter", "liters"),
+    "ml": ("one milliliter", "milliliters"),
+    "hPa": ("one hectopascal", "hectopascals"),
+    "ppm": ("one part per million", "parts per million"),
+    "µg/m³": ("one microgram per cubic meter", "micrograms per cubic meter"),
+    "dB": ("one decibel", "decibels"),
+    "lx": ("one lux", "lux"),
+    "min": ("one minute", "minutes"),
+    "h": ("one hour", "hours"),
+    "s": ("one second", "seconds"),
+}
+
+_DE_UNITS = {
+    "°C": ("ein Grad Celsius", "Grad Celsius"),
+    "°F": ("ein Grad Fahrenheit", "Grad Fahrenheit"),
+    "°": ("ein Grad", "Grad"),
+    "%": ("ein Prozent", "Prozent"),
+    "kWh": ("eine Kilowattstunde", "Kilowattstunden"),
+    "Wh": ("eine Wattstunde", "Wattstunden"),
+    "kW": ("ein Kilowatt", "Kilowatt"),
+    "W": ("ein Watt", "Watt"),
+    "V": ("ein Volt", "Volt"),
+    "km/h": ("ein Kilometer pro Stunde", "Kilometer pro Stunde"),
+    "m/s": ("ein Meter pro Sekunde", "Meter pro Sekunde"),
+    "km": ("ein Kilometer", "Kilometer"),
+    "cm": ("ein Zentimeter", "Zentimeter"),
+    "mm": ("ein Millimeter", "Millimeter"),
+    "m": ("ein Meter", "Meter"),
+    "kg": ("ein Kilogramm", "Kilogramm"),
+    "g": ("ein Gramm", "Gramm"),
+    "L": ("ein Liter", "Liter"),
+    "l": ("ein Liter", "Liter"),
+    "ml": ("ein Milliliter", "Milliliter"),
+    "hPa": ("ein Hektopascal", "Hektopascal"),
+    "ppm": ("ein ppm", "ppm"),
+    "µg/m³": ("ein Mikrogramm pro Kubikmeter", "Mikrogramm pro Kubikmeter"),
+    "dB": ("ein Dezibel", "Dezibel"),
+    "lx": ("ein Lux", "Lux"),
+    "min": ("eine Minute", "Minuten"),
+    "h": ("eine Stunde", "Stunden"),
+    "s": ("eine Sekunde", "Sekunden"),
+}
+
+_EN_CURRENCIES = {
+    "$": ("one dollar", "dollars", "one cent", "cents"),
+    "€": ("one euro", "euros", "one cent", "cents"),
+    "£": ("one pound", "pounds", "one penny", "pence"),
+}
+
+_DE_CURRENCIES = {
+    "€": ("ein Euro", "Euro", "ein Cent", "Cent"),
+    "$": ("ein Dollar", "Dollar", "ein Cent", "Cent"),
+    "£": ("ein Pfund", "Pfund", "ein Penny", "Pence"),
+}
+
+RULES = {
+    "en": LanguageRules(
+        cardinal=en_cardinal,
+        time=en_time,
+        date=en_date,
+        decade=en_decade,
+        decade_suffix="s",
+        short_decades=False,
+        minus="minus",
+        point="point",
+        conjunction="and",
+        decimal_separators=".",
+        thousands_separator=",",
+        units=_EN_UNITS,
+        currencies=_EN_CURRENCIES,
+    ),
+    "de": LanguageRules(
+        cardinal=de_cardinal,
+        time=de_time,
+        date=de_date,
+        decade=de_decade,
+        decade_suffix="ern?",
+        short_decades=True,
+        minus="minus",
+        point="Komma",
+        conjunction="und",
+        decimal_separators=".,",
+        thousands_separator=".",
+        units=_DE_UNITS,
+        currencies=_DE_CURRENCIES,
+    ),
+}
+
+
+def normalize_text(text: str, language: str) -> str | None:
+    """Return the text with its tokens spelled out, None without rules.
+
+    Only the base of a language tag is used, "en-GB" reads like "en".
+    """
+    if (rules := RULES.get(language.split("-")[0].split("_")[0].lower())) is None:
+        return None
+    return rules.pattern.sub(rules.expand, text)
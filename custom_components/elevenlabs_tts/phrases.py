@@ -0,0 +1,220 @@
+"""Fuzzy index over the texts of cached clips, for playback while offline.
+
+Texts are compared as sets of words with the Jaccard similarity. A lookup
+only reads the postings of the rarest words of the query: a phrase at least
+`threshold` similar shares one of its `n - ceil(threshold * n) + 1` rarest
+words, so common words are never read. Postings are split by the number of
+words of the phrases: sizes that can score best are read first, newest phrases
+first, and sizes that cannot reach the threshold or beat the best match so far
+are skipped. At most MAX_CANDIDATES phrases are compared per lookup, so among
+very many similar phrases a close one rather than the closest may be served.
+Phrases whose clips were evicted from the cache are removed when a lookup
+finds them, and the lookup is repeated for the next best phrase.
+"""
+
+from collections.abc import Iterable
+import logging
+import math
+import os
+import re
+import threading
+
+import orjson
+
+_LOGGER = logging.getLogger(__name__)
+
+PHRASE_FILE = "phrases.jsonl"
+# Share of the logged phrases no longer in the cache that rewrites the log
+STALE_RATE = 0.25
+# Phrases compared per lookup, bounding its time on a large index
+MAX_CANDIDATES = 256
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Return the text lowercased, with punctuation and spacing collapsed."""
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def tokens(normalized: str) -> frozenset[str]:
+    """Return the distinct words of a normalized text."""
+    return frozenset(normalized.split())
+
+
+class Phrase:
+    """A cached clip and the text it speaks."""
+
+    __slots__ = ("text", "voice_id", "key", "extension", "tokens")
+
+    def __init__(self, text: str, voice_id: str, key: bytes, extension: str) -> None:
+        """Initialize the phrase."""
+        self.text = text
+        self.voice_id = voice_id
+        self.key = key
+        self.extension = extension
+        self.tokens = tokens(normalize(text))
+
+
+class PhraseIndex:
+    """Cached phrases by voice, searchable by similarity.
+
+    The index lives in memory and is rebuilt from an append-only log on start.
+    `add` and `find` run on the event loop, `load` and `append` do blocking I/O.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        """Initialize an empty index, logged to `path` if given."""
+        self._path = path
+        self._lock = threading.Lock()
+        # {cache key: phrase} in insertion order
+        self._phrases: dict[bytes, Phrase] = {}
+        # {(voice_id, normalized text): phrase}
+        self._exact: dict[tuple[str, str], Phrase] = {}
+        # {(voice_id, word, words in the phrase): phrases in insertion order}
+        self._postings: dict[tuple[str, str, int], list[Phrase]] = {}
+        # {(voice_id, word): phrases holding it, of any size}
+        self._counts: dict[tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        """Return the number of phrases."""
+        return len(self._phrases)
+
+    def add(
+        self, text: str, voice_id: str, key: bytes, extension: str
+    ) -> Phrase | None:
+        """Index a cached clip, return the new phrase or None if already known."""
+        if key in self._phrases:
+            return None
+        phrase = Phrase(text, voice_id, key, extension)
+        self._phrases[key] = phrase
+        self._exact[(voice_id, normalize(text))] = phrase
+        size = len(phrase.tokens)
+        for token in phrase.tokens:
+            self._postings.setdefault((voice_id, token, size), []).append(phrase)
+            self._counts[(voice_id, token)] = self._counts.get((voice_id, token), 0) + 1
+        return phrase
+
+    def remove(self, key: bytes) -> None:
+        """Forget the phrase of a clip no longer in the cache."""
+        if (phrase := self._phrases.pop(key, None)) is None:
+            return
+        exact = (phrase.voice_id, normalize(phrase.text))
+        if self._exact.get(exact) is phrase:
+            del self._exact[exact]
+        size = len(phrase.tokens)
+        for token in phrase.tokens:
+            postings = self._postings[(phrase.voice_id, token, size)]
+            postings.remove(phrase)
+            if not postings:
+                del self._postings[(phrase.voice_id, token, size)]
+            if not (count := self._counts[(phrase.voice_id, token)] - 1):
+                del self._counts[(phrase.voice_id, token)]
+            else:
+                self._counts[(phrase.voice_id, token)] = count
+
+    def find(
+        self, text: str, voice_id: str, threshold: float
+    ) -> tuple[Phrase, float] | None:
+        """Return the phrase of a voice most similar to a text, and its score.
+
+        Only phrases at least `threshold` similar are returned.
+        """
+        normalized = normalize(text)
+        if (phrase := self._exact.get((voice_id, normalized))) is not None:
+            return phrase, 1.0
+        if not (words := tokens(normalized)):
+            return None
+
+        size = len(words)
+        rarest = sorted(words, key=lambda word: self._counts.get((voice_id, word), 0))
+        # Rounded so that 0.7 * 10 counts as 7 rather than a little over it
+        least = math.ceil(round(threshold * size, 9))
+        prefix = rarest[: size - least + 1]
+        # Sets of too different sizes cannot be similar enough, the best score
+        # of a size is the ratio of the smaller set to the larger one
+        bounds = sorted(
+            (
+                (min(size, other) / max(size, other), other)
+                for other in range(least, math.floor(size / threshold) + 1)
+            ),
+            reverse=True,
+        )
+        best: Phrase | None = None
+        best_score = threshold
+        seen: set[Phrase] = set()
+        budget = MAX_CANDIDATES
+        for bound, other in bounds:
+            if best is not None and bound <= best_score:
+                break
+            for word in prefix:
+                for phrase in reversed(self._postings.get((voice_id, word, other), ())):
+                    if phrase in seen:
+                        continue
+                    if not budget:
+                        return (best, best_score) if best is not None else None
+                    budget -= 1
+                    seen.add(phrase)
+                    common = len(words & phrase.tokens)
+                    score = common / (size + other - common)
+                    if score > best_score or best is None and score == best_score:
+                        best, best_score = phrase, score
+        if best is None:
+            return None
+        return best, best_score
+
+    def load(self, live_keys: Iterable[bytes] | None = None) -> None:
+        """Read the log, keeping the phrases whose clips are still cached.
+
+        The log is rewritten without the others once they are a large share.
+        """
+        if self._path is None or not os.path.exists(self._path):
+            return
+        live = set(live_keys) if live_keys is not None else None
+        logged = 0
+        with open(self._path, "rb") as log:
+            for line in log:
+                try:
+                    record = orjson.loads(line)
+                    key = bytes.fromhex(record["key"])
+                except (orjson.JSONDecodeError, KeyError, ValueError):
+                    # A line cut short by a crash
+                    continue
+                logged += 1
+                if live is None or key in live:
+                    self.add(record["text"], record["voice"], key, record["ext"])
+        _LOGGER.debug("Loaded %s of %s logged phrases", len(self), logged)
+        if logged and (logged - len(self)) / logged >= STALE_RATE:
+            self._rewrite()
+
+    def _rewrite(self) -> None:
+        """Replace the log with the phrases in the index."""
+        temp_path = f"{self._path}.tmp"
+        with self._lock:
+            with open(temp_path, "wb") as log:
+                log.writelines(
+                    self._record(phrase) for phrase in self._phrases.values()
+                )
+            os.replace(temp_path, self._path)
+
+    def append(self, phrase: Phrase) -> None:
+        """Append a phrase to the log."""
+        if self._path is None:
+            return
+        with self._lock, open(self._path, "ab") as log:
+            log.write(self._record(phrase))
+
+    @staticmethod
+    def _record(phrase: Phrase) -> bytes:
+        """Return the log line of a phrase."""
+        return (
+            orjson.dumps(
+                {
+                    "text": phrase.text,
+                    "voice": phrase.voice_id,
+                    "key": phrase.key.hex(),
+                    "ext": phrase.extension,
+                }
+            )
+            + b"\n"
+        )
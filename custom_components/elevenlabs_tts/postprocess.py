@@ -0,0 +1,158 @@
+"""Post-processing of synthesized clips: silence trimming, gain, resampling.
+
+ElevenLabs is asked for raw 16-bit PCM, which is processed with the standard
+library in a separate process and returned as a WAV file. Every function here
+except `async_get_process_pool` runs in the worker processes.
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import io
+import math
+import multiprocessing
+import sys
+import time
+import wave
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import DATA_PROCESS_POOL, DOMAIN
+
+# Output format requested from ElevenLabs when post-processing is enabled
+SOURCE_FORMAT = "pcm_24000"
+SOURCE_RATE = 24000
+SAMPLE_WIDTH = 2
+# Samples quieter than this many dBFS are silence
+SILENCE_DB = -50.0
+# Seconds of silence kept before and after the speech
+SILENCE_PADDING = 0.05
+# Largest gain applied to quiet clips, in dB
+MAX_GAIN_DB = 20.0
+FULL_SCALE = 32767
+POOL_WORKERS = 2
+
+
+def trim_silence(samples: array, rate: int) -> array:
+    """Remove the silence before and after the speech."""
+    threshold = FULL_SCALE * 10 ** (SILENCE_DB / 20)
+    first = next(
+        (i for i, sample in enumerate(samples) if abs(sample) >= threshold), None
+    )
+    if first is None:
+        return array("h")
+    last = next(
+        i
+        for i in range(len(samples) - 1, first - 1, -1)
+        if abs(samples[i]) >= threshold
+    )
+    padding = int(SILENCE_PADDING * rate)
+    return samples[max(0, first - padding) : last + 1 + padding]
+
+
+def normalize_gain(samples: array, loudness: float) -> array:
+    """Scale the clip to an RMS loudness in dBFS, without clipping."""
+    if not samples:
+        return samples
+    rms = math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+    if rms == 0:
+        return samples
+    gain = 10 ** ((loudness - 20 * math.log10(rms / FULL_SCALE)) / 20)
+    peak = max(abs(min(samples)), max(samples))
+    gain = min(gain, 10 ** (MAX_GAIN_DB / 20), FULL_SCALE / peak)
+    return array("h", [int(sample * gain) for sample in samples])
+
+
+def resample(samples: array, source_rate: int, rate: int) -> array:
+    """Change the sample rate with linear interpolation."""
+    if source_rate == rate or not samples:
+        return samples
+    step = source_rate / rate
+    last = len(samples) - 1
+    resampled = array("h", bytes(SAMPLE_WIDTH * int(len(samples) / step)))
+    for i in range(len(resampled)):
+        position = i * step
+        j = int(position)
+        nxt = samples[j + 1] if j < last else samples[j]
+        resampled[i] = int(samples[j] + (nxt - samples[j]) * (position - j))
+    return resampled
+
+
+def encode_wav(samples: array, rate: int) -> bytes:
+    """Wrap mono 16-bit samples in a WAV file."""
+    if sys.byteorder == "big":
+        samples = array("h", samples)
+        samples.byteswap()
+    return pcm_to_wav(samples.tobytes(), rate)
+
+
+def pcm_to_wav(pcm: bytes, rate: int) -> bytes:
+    """Wrap little-endian mono 16-bit PCM in a WAV file."""
+    with io.BytesIO() as buffer:
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(SAMPLE_WIDTH)
+            wav.setframerate(rate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+
+def process_audio(
+    pcm: bytes, source_rate: int, rate: int, loudness: float
+) -> tuple[bytes, dict[str, float]]:
+    """Post-process little-endian PCM and return a WAV file and stage timings."""
+    samples = array("h")
+    samples.frombytes(pcm[: len(pcm) - len(pcm) % SAMPLE_WIDTH])
+    if sys.byteorder == "big":
+        samples.byteswap()
+
+    timings: dict[str, float] = {}
+    start = time.perf_counter()
+    samples = trim_silence(samples, source_rate)
+    timings["trim"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    samples = normalize_gain(samples, loudness)
+    timings["gain"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    samples = resample(samples, source_rate, rate)
+    timings["resample"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    wav = encode_wav(samples, rate)
+    timings["encode"] = time.perf_counter() - start
+    return wav, timings
+
+
+@callback
+def async_get_process_pool(hass: HomeAssistant) -> ProcessPoolExecutor:
+    """Return the post-processing pool, started on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PROCESS_POOL not in domain_data:
+        # Forking a process running the event loop and its threads is unsafe
+        pool = ProcessPoolExecutor(
+            max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+
+        @callback
+        def _async_shutdown(event: Event) -> None:
+            domain_data.pop(DATA_PROCESS_POOL, None)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # The pool is kept with the function removing its stop listener
+        domain_data[DATA_PROCESS_POOL] = (
+            pool,
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown),
+        )
+    return domain_data[DATA_PROCESS_POOL][0]
+
+
+@callback
+def async_shutdown_process_pool(hass: HomeAssistant) -> None:
+    """Stop the post-processing pool, if it was started."""
+    if (started := hass.data.get(DOMAIN, {}).pop(DATA_PROCESS_POOL, None)) is None:
+        return
+    pool, remove_listener = started
+    remove_listener()
+    pool.shutdown(wait=False, cancel_futures=True)
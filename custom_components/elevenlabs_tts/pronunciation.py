@@ -0,0 +1,160 @@
+"""Pronunciation dictionaries synced from a local lexicon file."""
+
+import hashlib
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util.yaml import load_yaml
+import orjson
+import voluptuous as vol
+
+from .const import DOMAIN, MAX_PRONUNCIATION_DICTIONARIES
+from .elevenlabs import ElevenLabsClient
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+RULE_SCHEMA = vol.All(
+    {
+        vol.Required("string"): str,
+        vol.Exclusive("alias", "replacement"): str,
+        vol.Exclusive("phoneme", "replacement"): str,
+        vol.Optional("alphabet", default="ipa"): vol.In(["ipa", "cmu-arpabet"]),
+    },
+    vol.Any(
+        vol.Schema({vol.Required("alias"): str}, extra=vol.ALLOW_EXTRA),
+        vol.Schema({vol.Required("phoneme"): str}, extra=vol.ALLOW_EXTRA),
+    ),
+)
+
+# dictionary name: [rule, ...]
+LEXICON_SCHEMA = vol.Schema({str: [RULE_SCHEMA]})
+
+
+def _to_api_rule(rule: dict) -> dict:
+    """Convert a lexicon file rule to the API rule format."""
+    if "alias" in rule:
+        return {
+            "type": "alias",
+            "string_to_replace": rule["string"],
+            "alias": rule["alias"],
+        }
+    return {
+        "type": "phoneme",
+        "string_to_replace": rule["string"],
+        "phoneme": rule["phoneme"],
+        "alphabet": rule["alphabet"],
+    }
+
+
+def _rules_hash(rules: list[dict]) -> str:
+    """Return a stable hash of a dictionary's rules."""
+    return hashlib.sha256(orjson.dumps(rules, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class PronunciationDictionaries:
+    """Keep ElevenLabs pronunciation dictionaries in sync with a lexicon file.
+
+    The stored state maps each dictionary name to its remote ID, version, content
+    hash and rules. Unchanged dictionaries are never re-uploaded, and changed
+    ones only have their added and removed rules sent.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, client: ElevenLabsClient, entry_id: str, path: str
+    ) -> None:
+        """Initialize the dictionaries."""
+        self.hass = hass
+        self._client = client
+        self._path = hass.config.path(path)
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.pronunciation.{entry_id}")
+        # {name: {"id": str, "version_id": str, "hash": str, "rules": [dict]}}
+        self._synced: dict[str, dict] = {}
+
+    async def async_sync(self) -> None:
+        """Upload changed dictionaries and point the client at the results.
+
+        The client speaks with the dictionaries of the last sync until this
+        one succeeds, and each dictionary is switched as soon as it uploaded.
+        """
+        self._synced = await self._store.async_load() or {}
+        self._client.pronunciation_locators = self.locators
+        lexicon = LEXICON_SCHEMA(
+            await self.hass.async_add_executor_job(load_yaml, self._path) or {}
+        )
+
+        for name in list(self._synced):
+            if name not in lexicon:
+                _LOGGER.debug("Dropping pronunciation dictionary %s", name)
+                del self._synced[name]
+
+        for name, rules in lexicon.items():
+            api_rules = [_to_api_rule(rule) for rule in rules]
+            rules_hash = _rules_hash(api_rules)
+            synced = self._synced.get(name)
+            if synced and synced["hash"] == rules_hash:
+                continue
+
+            if synced:
+                result = await self._async_update(synced, api_rules)
+            else:
+                _LOGGER.debug("Uploading pronunciation dictionary %s", name)
+                result = await self._client.post_json(
+                    "pronunciation-dictionaries/add-from-rules",
+                    {"name": name, "rules": api_rules},
+                )
+            self._synced[name] = {
+                "id": result["id"],
+                "version_id": result["version_id"],
+                "hash": rules_hash,
+                "rules": api_rules,
+            }
+            await self._store.async_save(self._synced)
+            self._client.pronunciation_locators = self.locators
+
+        await self._store.async_save(self._synced)
+        self._client.pronunciation_locators = self.locators
+        if len(self._synced) > MAX_PRONUNCIATION_DICTIONARIES:
+            _LOGGER.warning(
+                "Only the first %s pronunciation dictionaries are used",
+                MAX_PRONUNCIATION_DICTIONARIES,
+            )
+
+    async def _async_update(self, synced: dict, api_rules: list[dict]) -> dict:
+        """Send only the rules that changed since the last sync."""
+        old = {rule["string_to_replace"]: rule for rule in synced["rules"]}
+        new = {rule["string_to_replace"]: rule for rule in api_rules}
+        removed = [string for string, rule in old.items() if new.get(string) != rule]
+        added = [rule for string, rule in new.items() if old.get(string) != rule]
+        _LOGGER.debug(
+            "Updating pronunciation dictionary %s: %s removed, %s added",
+            synced["id"],
+            len(removed),
+            len(added),
+        )
+
+        result = {"id": synced["id"], "version_id": synced["version_id"]}
+        if removed:
+            result = await self._client.post_json(
+                f"pronunciation-dictionaries/{synced['id']}/remove-rules",
+                {"rule_strings": removed},
+            )
+        if added:
+            result = await self._client.post_json(
+                f"pronunciation-dictionaries/{synced['id']}/add-rules",
+                {"rules": added},
+            )
+        return result
+
+    @property
+    def locators(self) -> list[dict]:
+        """Return the locators to send with each TTS request."""
+        return [
+            {
+                "pronunciation_dictionary_id": synced["id"],
+                "version_id": synced["version_id"],
+            }
+            for synced in self._synced.values()
+        ][:MAX_PRONUNCIATION_DICTIONARIES]
@@ -0,0 +1,86 @@
+"""Sensors of the in-memory audio cache."""
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import PERCENTAGE, UnitOfInformation
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .cache import MemoryCacheBackend
+from .const import DOMAIN
+from .elevenlabs import ElevenLabsClient
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the memory cache sensors, if the memory tier is enabled."""
+    client: ElevenLabsClient = hass.data[DOMAIN][config_entry.entry_id]
+    if (memory := client.memory_cache) is None:
+        return
+    async_add_entities(
+        [
+            MemoryCacheHitRatioSensor(config_entry, memory),
+            MemoryCacheSizeSensor(config_entry, memory),
+        ]
+    )
+
+
+class MemoryCacheSensor(SensorEntity):
+    """A measurement of the in-memory audio cache, polled."""
+
+    _key: str
+
+    def __init__(self, config_entry: ConfigEntry, memory: MemoryCacheBackend) -> None:
+        """Initialize the sensor."""
+        self._memory = memory
+        self._attr_unique_id = f"{config_entry.entry_id}-{self._key}"
+
+
+class MemoryCacheHitRatioSensor(MemoryCacheSensor):
+    """Share of the audio cache lookups served from memory."""
+
+    _key = "memory_cache_hit_ratio"
+    _attr_name = "ElevenLabs TTS memory cache hit ratio"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 1
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the hit ratio in percent, unknown before any lookup."""
+        if (ratio := self._memory.hit_ratio) is None:
+            return None
+        return ratio * 100
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the lookup counts."""
+        return {"hits": self._memory.hits, "misses": self._memory.misses}
+
+
+class MemoryCacheSizeSensor(MemoryCacheSensor):
+    """Bytes of audio held in memory."""
+
+    _key = "memory_cache_size"
+    _attr_name = "ElevenLabs TTS memory cache size"
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_native_unit_of_measurement = UnitOfInformation.BYTES
+    _attr_suggested_unit_of_measurement = UnitOfInformation.MEBIBYTES
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self) -> int:
+        """Return the bytes of audio held."""
+        return self._memory.size
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the clips held and the budget in use."""
+        return {"clips": len(self._memory), "limit": self._memory.limit}
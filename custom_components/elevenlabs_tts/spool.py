@@ -0,0 +1,212 @@
+"""Bounded-memory buffering of synthesis responses.
+
+Responses are read into a buffer preallocated from their length, and moved to
+a temporary file when they grow past a threshold or when the responses in
+flight already hold the memory budget shared by all entries. New requests wait
+while the budget is used up. Once spooled, chunks are collected and written to
+the file in batches, so a long response does not cost an executor job per
+chunk. The buffer is only given back to the budget once the spool is closed,
+after the audio was handed on.
+"""
+
+import asyncio
+import logging
+import tempfile
+from typing import IO
+
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_MEMORY_BUDGET, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bytes of a response held in memory before it is spooled to a temporary file
+SPOOL_THRESHOLD = 1024 * 1024
+# Bytes held in memory by all responses in flight
+MEMORY_BUDGET = 8 * 1024 * 1024
+# Bytes first allocated for a response of unknown length
+INITIAL_BUFFER_SIZE = 64 * 1024
+# Bytes of chunks collected before they are written to the temporary file
+SPOOL_WRITE_BATCH = 256 * 1024
+
+
+class MemoryBudget:
+    """Bytes of response buffers held in memory, shared by all requests."""
+
+    def __init__(self, limit: int = MEMORY_BUDGET) -> None:
+        """Initialize an unused budget."""
+        self.limit = limit
+        self.used = 0
+        self._room = asyncio.Event()
+        self._room.set()
+
+    def try_acquire(self, size: int) -> bool:
+        """Take bytes from the budget if they fit, without waiting."""
+        if self.used + size > self.limit:
+            return False
+        self.used += size
+        if self.used >= self.limit:
+            self._room.clear()
+        return True
+
+    def release(self, size: int) -> None:
+        """Give bytes back and wake the requests waiting for room."""
+        self.used -= size
+        if self.used < self.limit:
+            self._room.set()
+
+    async def async_wait_for_room(self) -> None:
+        """Wait until the budget is not used up, before sending a request."""
+        await self._room.wait()
+
+
+def async_get_memory_budget(hass: HomeAssistant) -> MemoryBudget:
+    """Return the memory budget shared by all entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_MEMORY_BUDGET not in domain_data:
+        domain_data[DATA_MEMORY_BUDGET] = MemoryBudget()
+    return domain_data[DATA_MEMORY_BUDGET]
+
+
+class AudioSpool:
+    """The body of one response, in memory or in a temporary file."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        budget: MemoryBudget,
+        expected_size: int | None = None,
+        threshold: int = SPOOL_THRESHOLD,
+    ) -> None:
+        """Initialize an empty spool, allocated on the first write."""
+        self.hass = hass
+        self._budget = budget
+        self._expected_size = expected_size
+        self._threshold = threshold
+        self._buffer: bytearray | None = None
+        # Bytes of the budget held by the buffer
+        self._reserved = 0
+        self._file: IO[bytes] | None = None
+        # Chunks not written to the temporary file yet
+        self._pending: list[bytes] = []
+        self._pending_size = 0
+        self.size = 0
+        # ID ElevenLabs gave the request, later requests can be stitched to it
+        self.request_id: str | None = None
+        # Seconds from sending the request to its first chunk of audio
+        self.first_byte: float | None = None
+
+    @property
+    def spooled(self) -> bool:
+        """Return True if the audio was moved to a temporary file."""
+        return self._file is not None
+
+    async def async_write(self, chunk: bytes) -> None:
+        """Append a chunk of the response."""
+        if self._file is None and not self._fits(len(chunk)):
+            await self._async_spool()
+        if self._file is not None:
+            self._pending.append(chunk)
+            self._pending_size += len(chunk)
+            if self._pending_size >= SPOOL_WRITE_BATCH:
+                await self._async_flush()
+        else:
+            self._buffer[self.size : self.size + len(chunk)] = chunk
+        self.size += len(chunk)
+
+    def _fits(self, length: int) -> bool:
+        """Make room in the buffer for a chunk, return False to spool instead."""
+        needed = self.size + length
+        if self._buffer is not None and needed <= len(self._buffer):
+            return True
+        if needed > self._threshold:
+            return False
+        if self._buffer is None and self._expected_size:
+            capacity = max(needed, self._expected_size)
+        else:
+            capacity = max(needed, 2 * self._reserved, INITIAL_BUFFER_SIZE)
+        capacity = min(capacity, self._threshold)
+        if not self._budget.try_acquire(capacity - self._reserved):
+            return False
+        buffer = bytearray(capacity)
+        if self._buffer is not None:
+            buffer[: self.size] = memoryview(self._buffer)[: self.size]
+        self._buffer = buffer
+        self._reserved = capacity
+        return True
+
+    async def _async_spool(self) -> None:
+        """Move the buffered audio to a temporary file and free the buffer."""
+        _LOGGER.debug("Spooling response of over %s bytes to disk", self.size)
+
+        def _create() -> IO[bytes]:
+            spool = tempfile.TemporaryFile()
+            if self._buffer is not None:
+                spool.write(memoryview(self._buffer)[: self.size])
+            return spool
+
+        self._file = await self.hass.async_add_executor_job(_create)
+        self._buffer = None
+        self._release()
+
+    async def _async_flush(self) -> None:
+        """Write the pending chunks to the temporary file in one job."""
+        if not self._pending:
+            return
+        chunks = self._pending
+        self._pending = []
+        self._pending_size = 0
+        await self.hass.async_add_executor_job(self._file.writelines, chunks)
+
+    def view(self) -> memoryview:
+        """Return the audio held in memory without copying it."""
+        if self._file is not None:
+            raise ValueError("The audio was spooled to a file")
+        if self._buffer is None:
+            return memoryview(b"")
+        return memoryview(self._buffer)[: self.size]
+
+    async def async_open(self) -> memoryview | IO[bytes]:
+        """Return the audio without copying it.
+
+        That is a view of the buffer, or the temporary file rewound to its
+        start. Either is only valid until the spool is closed.
+        """
+        if self._file is None:
+            return self.view()
+        await self._async_flush()
+        await self.hass.async_add_executor_job(self._file.seek, 0)
+        return self._file
+
+    async def async_read(self) -> bytes:
+        """Return the audio as bytes, copied once.
+
+        The buffer keeps its share of the budget until the spool is closed, so
+        the caller closes it once done with the copy.
+        """
+        if self._file is None:
+            return bytes(self.view())
+
+        await self._async_flush()
+
+        def _read() -> bytes:
+            self._file.seek(0)
+            return self._file.read()
+
+        return await self.hass.async_add_executor_job(_read)
+
+    def close(self) -> None:
+        """Free the buffer or delete the temporary file."""
+        self._buffer = None
+        self._pending = []
+        self._pending_size = 0
+        self._release()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _release(self) -> None:
+        """Give the memory of the buffer back to the budget."""
+        if self._reserved:
+            self._budget.release(self._reserved)
+            self._reserved = 0
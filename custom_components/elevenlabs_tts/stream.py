@@ -0,0 +1,227 @@
+"""Progressive audio streaming to networked media players."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+import logging
+import secrets
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_STREAMS, DOMAIN, STREAM_BUFFER_SIZE, STREAM_LINGER_SECONDS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StreamEvictedError(Exception):
+    """Error to indicate the requested audio is no longer in the buffer."""
+
+
+class AudioStreamBuffer:
+    """A bounded ring buffer holding one in-progress synthesis.
+
+    Any number of readers can follow the writer. Offsets are absolute byte
+    positions in the clip, so a reader joining late starts from offset 0 and
+    replays everything still held in the ring.
+    """
+
+    def __init__(self, max_bytes: int = STREAM_BUFFER_SIZE) -> None:
+        """Initialize the buffer, it grows with the clip up to `max_bytes`."""
+        self._ring = bytearray()
+        self._max_bytes = max_bytes
+        self._written = 0
+        self._done = False
+        self._error: Exception | None = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def start_offset(self) -> int:
+        """Return the oldest absolute offset still held in the ring."""
+        return max(0, self._written - self._max_bytes)
+
+    @property
+    def written(self) -> int:
+        """Return the number of bytes written so far."""
+        return self._written
+
+    @property
+    def done(self) -> bool:
+        """Return True once the writer has finished."""
+        return self._done
+
+    async def write(self, chunk: bytes) -> None:
+        """Append a chunk, dropping the oldest audio when the ring is full."""
+        if (room := self._max_bytes - len(self._ring)) > 0:
+            # Short clips never allocate the whole ring
+            self._ring += chunk[:room]
+            self._written += min(len(chunk), room)
+            chunk = chunk[room:]
+
+        if chunk:
+            if len(chunk) > self._max_bytes:
+                self._written += len(chunk) - self._max_bytes
+                chunk = chunk[-self._max_bytes :]
+            pos = self._written % self._max_bytes
+            first = min(len(chunk), self._max_bytes - pos)
+            self._ring[pos : pos + first] = chunk[:first]
+            self._ring[: len(chunk) - first] = chunk[first:]
+            self._written += len(chunk)
+
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def close(self, error: Exception | None = None) -> None:
+        """Mark the stream finished, optionally with the error that ended it."""
+        self._done = True
+        self._error = error
+        async with self._changed:
+            self._changed.notify_all()
+
+    def read(self, offset: int) -> bytes:
+        """Return the bytes from an absolute offset up to the write position."""
+        if offset < self.start_offset:
+            raise StreamEvictedError(f"Offset {offset} was dropped from the buffer")
+
+        size = self._written - offset
+        pos = offset % self._max_bytes
+        first = min(size, self._max_bytes - pos)
+        return bytes(self._ring[pos : pos + first]) + bytes(self._ring[: size - first])
+
+    async def iter_from(self, offset: int = 0) -> AsyncIterator[bytes]:
+        """Yield audio from an absolute offset until the writer finishes."""
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: self._written > offset or self._done
+                )
+            if self._written > offset:
+                chunk = self.read(offset)
+                offset += len(chunk)
+                yield chunk
+            elif self._error is not None:
+                raise self._error
+            else:
+                return
+
+
+class AudioStreamManager:
+    """Track the in-progress streams served by the audio view."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the manager."""
+        self.hass = hass
+        self._streams: dict[str, AudioStreamBuffer] = {}
+        # Tasks filling the streams, and the timers dropping finished ones
+        self._tasks: set[asyncio.Task] = set()
+        self._expirations: dict[str, CALLBACK_TYPE] = {}
+
+    def get(self, stream_id: str) -> AudioStreamBuffer | None:
+        """Return the buffer for a stream, if it is still available."""
+        return self._streams.get(stream_id)
+
+    @callback
+    def async_start(self, chunks: AsyncIterator[bytes]) -> str:
+        """Start filling a new stream from the chunks and return its ID."""
+        stream_id = secrets.token_urlsafe(16)
+        buffer = AudioStreamBuffer()
+        self._streams[stream_id] = buffer
+        task = self.hass.async_create_background_task(
+            self._async_fill(stream_id, buffer, chunks),
+            f"{DOMAIN} stream {stream_id}",
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return stream_id
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop filling the streams and drop them, with their linger timers."""
+        for task in self._tasks:
+            task.cancel()
+        for cancel in self._expirations.values():
+            cancel()
+        self._expirations.clear()
+        self._streams.clear()
+
+    async def _async_fill(
+        self, stream_id: str, buffer: AudioStreamBuffer, chunks: AsyncIterator[bytes]
+    ) -> None:
+        """Copy the upstream chunks into the buffer."""
+        error = None
+        try:
+            async with aclosing(chunks):
+                async for chunk in chunks:
+                    await buffer.write(chunk)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error("Streaming synthesis %s failed: %s", stream_id, err)
+            error = err
+        finally:
+            # Players stop waiting however the stream ended, even if cancelled
+            await buffer.close(error)
+        _LOGGER.debug("Stream %s finished after %s bytes", stream_id, buffer.written)
+
+        @callback
+        def _async_expire(_now) -> None:
+            self._streams.pop(stream_id, None)
+            self._expirations.pop(stream_id, None)
+
+        self._expirations[stream_id] = async_call_later(
+            self.hass, STREAM_LINGER_SECONDS, _async_expire
+        )
+
+
+@callback
+def async_get_stream_manager(hass: HomeAssistant) -> AudioStreamManager:
+    """Return the stream manager, registering the audio view on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_STREAMS not in domain_data:
+        domain_data[DATA_STREAMS] = AudioStreamManager(hass)
+        hass.http.register_view(ElevenLabsStreamView(domain_data[DATA_STREAMS]))
+    return domain_data[DATA_STREAMS]
+
+
+@callback
+def async_shutdown_streams(hass: HomeAssistant) -> None:
+    """Stop the streams in progress and drop the finished ones, if any."""
+    if (manager := hass.data.get(DOMAIN, {}).get(DATA_STREAMS)) is not None:
+        manager.async_shutdown()
+
+
+class ElevenLabsStreamView(HomeAssistantView):
+    """Serve in-progress audio with chunked transfer."""
+
+    url = "/api/elevenlabs_tts/stream/{stream_id}.mp3"
+    name = "api:elevenlabs_tts:stream"
+    # Media players cannot authenticate, the stream ID is an unguessable token
+    requires_auth = False
+
+    def __init__(self, manager: AudioStreamManager) -> None:
+        """Initialize the view."""
+        self._manager = manager
+
+    async def get(self, request: web.Request, stream_id: str) -> web.StreamResponse:
+        """Stream the audio from the start, following the writer."""
+        buffer = self._manager.get(stream_id)
+        if buffer is None:
+            return web.Response(status=404)
+        if buffer.start_offset > 0:
+            # The start of the clip has already been dropped from the ring
+            return web.Response(status=410)
+
+        response = web.StreamResponse(headers={"Content-Type": "audio/mpeg"})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        try:
+            async for chunk in buffer.iter_from(0):
+                await response.write(chunk)
+        except StreamEvictedError:
+            _LOGGER.warning("Player fell too far behind stream %s", stream_id)
+            return response
+        except Exception:  # pylint: disable=broad-except
+            # The synthesis failed mid-stream, end the response early
+            return response
+        await response.write_eof()
+        return response
@@ -0,0 +1,276 @@
+"""Tracing of syntheses: a request ID and timed spans for each announcement.
+
+A trace is only recorded when a hook is registered or debug logging is on.
+Otherwise `Tracer.trace` and `span` return a shared no-op context manager, so
+the instrumented code pays one context variable lookup per span.
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager, nullcontext
+from contextvars import ContextVar, Token
+import logging
+from logging.handlers import RotatingFileHandler
+import secrets
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+import orjson
+
+_LOGGER = logging.getLogger(__name__)
+
+# Size of the trace file before it is rotated, and rotated files kept
+TRACE_FILE_SIZE = 5 * 1024 * 1024
+TRACE_FILE_BACKUPS = 3
+
+_NOOP = nullcontext()
+_current_trace: ContextVar["Trace | None"] = ContextVar(
+    "elevenlabs_tts_trace", default=None
+)
+
+
+class Span:
+    """A timed step of a trace, in seconds from the start of the trace."""
+
+    __slots__ = ("name", "start", "end", "attributes")
+
+    def __init__(
+        self, name: str, start: float, end: float, attributes: dict[str, Any]
+    ) -> None:
+        """Initialize the span."""
+        self.name = name
+        self.start = start
+        self.end = end
+        self.attributes = attributes
+
+
+class Trace:
+    """The spans of one synthesis."""
+
+    __slots__ = (
+        "request_id",
+        "name",
+        "attributes",
+        "started",
+        "wall_start",
+        "duration",
+        "error",
+        "spans",
+    )
+
+    def __init__(self, name: str, attributes: dict[str, Any]) -> None:
+        """Start the trace."""
+        self.request_id = secrets.token_hex(8)
+        self.name = name
+        self.attributes = attributes
+        self.started = time.perf_counter()
+        self.wall_start = time.time()
+        self.duration = 0.0
+        self.error: str | None = None
+        self.spans: list[Span] = []
+
+    def add_span(
+        self, name: str, start: float, end: float | None = None, **attributes: Any
+    ) -> None:
+        """Add a span from perf_counter timestamps, ending now by default."""
+        if end is None:
+            end = time.perf_counter()
+        self.spans.append(
+            Span(name, start - self.started, end - self.started, attributes)
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the trace as a JSON serializable dict."""
+        return {
+            "request_id": self.request_id,
+            "name": self.name,
+            "start": self.wall_start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "error": self.error,
+            "attributes": self.attributes,
+            "spans": [
+                {
+                    "name": span.name,
+                    "offset_ms": round(span.start * 1000, 3),
+                    "duration_ms": round((span.end - span.start) * 1000, 3),
+                    **span.attributes,
+                }
+                for span in self.spans
+            ],
+        }
+
+
+def current_trace() -> Trace | None:
+    """Return the trace of the running synthesis, if it is traced."""
+    return _current_trace.get()
+
+
+class _SpanContext:
+    """Time the enclosed block as a span."""
+
+    __slots__ = ("_trace", "_name", "_attributes", "_start")
+
+    def __init__(self, trace: Trace, name: str, attributes: dict[str, Any]) -> None:
+        self._trace = trace
+        self._name = name
+        self._attributes = attributes
+        self._start = 0.0
+
+    def __enter__(self) -> Trace:
+        self._start = time.perf_counter()
+        return self._trace
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self._attributes["error"] = exc_type.__name__
+        self._trace.add_span(self._name, self._start, **self._attributes)
+
+
+def span(name: str, **attributes: Any) -> AbstractContextManager:
+    """Time a block as a span of the current trace, a no-op without one."""
+    if (trace := _current_trace.get()) is None:
+        return _NOOP
+    return _SpanContext(trace, name, attributes)
+
+
+class TraceHook(ABC):
+    """Receives finished traces, on the event loop."""
+
+    @abstractmethod
+    def handle(self, trace: Trace) -> None:
+        """Export a finished trace without blocking."""
+
+    def close(self) -> None:
+        """Release the resources of the hook."""
+
+
+class JsonlTraceHook(TraceHook):
+    """Append traces as JSON lines to a rotating local file."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        path: str,
+        max_bytes: int = TRACE_FILE_SIZE,
+        backups: int = TRACE_FILE_BACKUPS,
+    ) -> None:
+        """Initialize the hook, the file is opened on the first trace."""
+        self.hass = hass
+        self._handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, delay=True
+        )
+
+    def handle(self, trace: Trace) -> None:
+        """Write the trace from the executor."""
+        record = logging.makeLogRecord({"msg": orjson.dumps(trace.as_dict()).decode()})
+        # handle() holds the handler lock, so concurrent writes and rollovers
+        # from several executor threads do not interleave
+        self.hass.async_add_executor_job(self._handler.handle, record)
+
+    def close(self) -> None:
+        """Close the file."""
+        self._handler.close()
+
+
+class OpenTelemetryTraceHook(TraceHook):
+    """Hand traces to the OpenTelemetry tracer provider set up in this process.
+
+    Requires the `opentelemetry-api` package, raises ImportError without it.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the hook."""
+        # pylint: disable-next=import-outside-toplevel
+        from opentelemetry import trace as otel_trace
+
+        self._otel_trace = otel_trace
+        self._tracer = otel_trace.get_tracer(__name__)
+
+    def handle(self, trace: Trace) -> None:
+        """Replay the trace as OpenTelemetry spans."""
+        start_ns = int(trace.wall_start * 1e9)
+        root = self._tracer.start_span(
+            f"elevenlabs_tts.{trace.name}",
+            start_time=start_ns,
+            attributes={"elevenlabs.request_id": trace.request_id, **trace.attributes},
+        )
+        context = self._otel_trace.set_span_in_context(root)
+        for child in trace.spans:
+            otel_span = self._tracer.start_span(
+                child.name,
+                context=context,
+                start_time=start_ns + int(child.start * 1e9),
+                attributes=child.attributes,
+            )
+            otel_span.end(end_time=start_ns + int(child.end * 1e9))
+        if trace.error:
+            root.set_status(
+                self._otel_trace.Status(self._otel_trace.StatusCode.ERROR, trace.error)
+            )
+        root.end(end_time=start_ns + int(trace.duration * 1e9))
+
+
+class _TraceContext:
+    """Make a trace current for the enclosed block and export it afterwards."""
+
+    __slots__ = ("_tracer", "_trace", "_token")
+
+    def __init__(self, tracer: "Tracer", trace: Trace) -> None:
+        self._tracer = tracer
+        self._trace = trace
+        self._token: Token | None = None
+
+    def __enter__(self) -> Trace:
+        self._token = _current_trace.set(self._trace)
+        return self._trace
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_trace.reset(self._token)
+        self._trace.duration = time.perf_counter() - self._trace.started
+        if exc_type is not None:
+            self._trace.error = exc_type.__name__
+        self._tracer.finish(self._trace)
+
+
+class Tracer:
+    """Start traces and pass them to the registered hooks."""
+
+    def __init__(self) -> None:
+        """Initialize the tracer without hooks."""
+        self.hooks: list[TraceHook] = []
+
+    def trace(self, name: str, **attributes: Any) -> AbstractContextManager:
+        """Trace the enclosed block, a no-op when tracing is off.
+
+        A trace started while another one is current is folded into it.
+        """
+        if (not self.hooks and not _LOGGER.isEnabledFor(logging.DEBUG)) or (
+            _current_trace.get() is not None
+        ):
+            return _NOOP
+        return _TraceContext(self, Trace(name, attributes))
+
+    def finish(self, trace: Trace) -> None:
+        """Export a finished trace."""
+        for hook in self.hooks:
+            try:
+                hook.handle(trace)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error exporting trace %s", trace.request_id)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Trace %s %s took %.1f ms: %s",
+                trace.request_id,
+                trace.name,
+                trace.duration * 1000,
+                ", ".join(
+                    f"{span.name} {(span.end - span.start) * 1000:.1f} ms"
+                    for span in trace.spans
+                ),
+            )
+
+    def close(self) -> None:
+        """Close and remove the hooks."""
+        for hook in self.hooks:
+            hook.close()
+        self.hooks.clear()
@@ -1,27 +1,66 @@
+from contextlib import aclosing
 import logging
 
 from homeassistant.components.tts import (
     ATTR_AUDIO_OUTPUT,
+    ATTR_LANGUAGE,
     ATTR_VOICE,
     TextToSpeechEntity,
     TtsAudioType,
     Voice,
+    async_get_media_source_audio,
+    generate_media_source_id,
+)
+from homeassistant.components.media_player import (
+    ATTR_MEDIA_CONTENT_ID,
+    ATTR_MEDIA_CONTENT_TYPE,
+    DOMAIN as MEDIA_PLAYER_DOMAIN,
+    SERVICE_PLAY_MEDIA,
+    MediaType,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_API_KEY
-from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_ENTITY_ID, CONF_API_KEY, CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.network import get_url
+import httpx
+import voluptuous as vol
 
+from .announcements import AnnouncementQueue
+from .breaker import CircuitOpenError
+from .bundle import export_bundle, import_bundle
+from .cache import AudioCache
 from .const import (
+    ATTR_LOOKAHEAD,
+    ATTR_MEDIA_PLAYER_ENTITY_ID,
+    ATTR_SATELLITE,
+    CONF_DEADLINE,
+    CONF_DIALOGUE_GAP,
+    CONF_FALLBACK_TTS,
     CONF_MODEL,
     CONF_OPTIMIZE_LATENCY,
+    CONF_PRIORITY,
     CONF_SIMILARITY,
+    CONF_SPEAKERS,
     CONF_STABILITY,
     CONF_STYLE,
+    CONF_SUPERSEDE,
     CONF_USE_SPEAKER_BOOST,
+    DEFAULT_LOOKAHEAD,
+    DEFAULT_WYOMING_PORT,
+    DEFAULT_WYOMING_RATE,
     DOMAIN,
+    SERVICE_EXPORT_CACHE,
+    SERVICE_IMPORT_CACHE,
+    SERVICE_QUEUE_SPEAK,
+    SERVICE_STREAM_SPEAK,
+    SERVICE_WYOMING_SPEAK,
 )
-from .elevenlabs import ElevenLabsClient
+from .elevenlabs import DeadlineExceededError, ElevenLabsClient
+from .stream import ElevenLabsStreamView, async_get_stream_manager
+from .wyoming import PCM_RATES, async_get_satellite_host, async_stream_to_wyoming
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,6 +78,53 @@ async def async_setup_entry(
         ]
     )
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_STREAM_SPEAK,
+        {
+            vol.Required("message"): cv.string,
+            vol.Required(ATTR_MEDIA_PLAYER_ENTITY_ID): cv.entity_ids,
+            vol.Optional("options", default={}): dict,
+        },
+        "async_stream_speak",
+    )
+    platform.async_register_entity_service(
+        SERVICE_QUEUE_SPEAK,
+        {
+            vol.Required("messages"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Required(ATTR_MEDIA_PLAYER_ENTITY_ID): cv.entity_ids,
+            vol.Optional("options", default={}): dict,
+            vol.Optional(ATTR_LOOKAHEAD, default=DEFAULT_LOOKAHEAD): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=10)
+            ),
+        },
+        "async_queue_speak",
+    )
+    platform.async_register_entity_service(
+        SERVICE_WYOMING_SPEAK,
+        {
+            vol.Required("message"): cv.string,
+            vol.Exclusive(CONF_HOST, "satellite"): cv.string,
+            vol.Exclusive(ATTR_SATELLITE, "satellite"): cv.entity_id,
+            vol.Optional(CONF_PORT, default=DEFAULT_WYOMING_PORT): cv.port,
+            vol.Optional("rate", default=DEFAULT_WYOMING_RATE): vol.All(
+                vol.Coerce(int), vol.In(PCM_RATES)
+            ),
+            vol.Optional("options", default={}): dict,
+        },
+        "async_wyoming_speak",
+    )
+    platform.async_register_entity_service(
+        SERVICE_EXPORT_CACHE,
+        {vol.Required("path"): cv.string},
+        "async_export_cache",
+    )
+    platform.async_register_entity_service(
+        SERVICE_IMPORT_CACHE,
+        {vol.Required("path"): cv.string},
+        "async_import_cache",
+    )
+
 
 class ElevenLabsProvider(TextToSpeechEntity):
     """The ElevenLabs TTS API provider."""
@@ -50,6 +136,8 @@ class ElevenLabsProvider(TextToSpeechEntity):
         self._name = "ElevenLabs TTS"
 
         self._attr_unique_id = f"{config_entry.entry_id}-tts"
+        # {media player entity IDs: their announcement queue}
+        self._queues: dict[tuple[str, ...], AnnouncementQueue] = {}
 
     @property
     def default_language(self) -> str:
@@ -112,13 +200,165 @@ class ElevenLabsProvider(TextToSpeechEntity):
             CONF_OPTIMIZE_LATENCY,
             CONF_API_KEY,
             ATTR_AUDIO_OUTPUT,
+            CONF_DEADLINE,
+            CONF_SUPERSEDE,
+            CONF_PRIORITY,
+            CONF_SPEAKERS,
+            CONF_DIALOGUE_GAP,
         ]
 
+    async def async_added_to_hass(self) -> None:
+        """Follow the circuit breaker state."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._client.breaker.async_add_listener(self._async_breaker_changed)
+        )
+        self.async_on_remove(
+            self._client.endpoints.async_add_listener(self.async_write_ha_state)
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop the queued announcements."""
+        for queue in self._queues.values():
+            queue.async_cancel()
+
+    @callback
+    def _async_breaker_changed(self, state: str) -> None:
+        """Update the circuit breaker attribute."""
+        self.async_write_ha_state()
+
     async def async_get_tts_audio(
         self, message: str, language: str, options: dict | None = None
     ) -> TtsAudioType:
         """Load TTS from the ElevenLabs API."""
-        return await self._client.get_tts_audio(message, options)
+        try:
+            # The language picks the rules of the local text normalization
+            return await self._client.get_tts_audio(
+                message, (options or {}) | {ATTR_LANGUAGE: language}
+            )
+        except (
+            CircuitOpenError,
+            DeadlineExceededError,
+            httpx.TransportError,
+            httpx.HTTPStatusError,
+        ) as err:
+            if not (fallback := self._config_entry.options.get(CONF_FALLBACK_TTS)):
+                raise
+            # Client errors such as an unknown voice are not an outage
+            if (
+                isinstance(err, httpx.HTTPStatusError)
+                and err.response.status_code < 500
+            ):
+                raise
+            _LOGGER.info("Using %s instead of ElevenLabs: %s", fallback, err)
+            return await async_get_media_source_audio(
+                self.hass,
+                generate_media_source_id(
+                    self.hass, message, engine=fallback, language=language
+                ),
+            )
+
+    async def async_stream_speak(
+        self, message: str, media_player_entity_id: list[str], options: dict
+    ) -> None:
+        """Play a message on media players while it is still being generated."""
+        manager = async_get_stream_manager(self.hass)
+        stream_id = manager.async_start(self._client.stream_tts_audio(message, options))
+        url = get_url(self.hass) + ElevenLabsStreamView.url.format(stream_id=stream_id)
+        _LOGGER.debug("Streaming %s to %s", url, media_player_entity_id)
+
+        await self.hass.services.async_call(
+            MEDIA_PLAYER_DOMAIN,
+            SERVICE_PLAY_MEDIA,
+            {
+                ATTR_ENTITY_ID: media_player_entity_id,
+                ATTR_MEDIA_CONTENT_ID: url,
+                ATTR_MEDIA_CONTENT_TYPE: MediaType.MUSIC,
+            },
+            blocking=True,
+        )
+
+    async def async_wyoming_speak(
+        self,
+        message: str,
+        host: str | None = None,
+        port: int = DEFAULT_WYOMING_PORT,
+        rate: int = DEFAULT_WYOMING_RATE,
+        options: dict | None = None,
+        satellite: str | None = None,
+    ) -> None:
+        """Stream a message as raw PCM to the sound service of a Wyoming satellite.
+
+        The satellite is given by host, or by one of its entities in the Wyoming
+        integration. Chunks are forwarded as ElevenLabs sends them, at the
+        satellite's rate, so nothing is written to a file, fetched by URL or
+        converted again.
+        """
+        if satellite is not None:
+            host = async_get_satellite_host(self.hass, satellite)
+        elif host is None:
+            raise HomeAssistantError(
+                f"Either {CONF_HOST} or {ATTR_SATELLITE} is needed"
+            )
+        audio = self._client.stream_tts_audio(message, options, f"pcm_{rate}")
+        try:
+            async with aclosing(audio):
+                await async_stream_to_wyoming(audio, host, port, rate)
+        except (OSError, TimeoutError) as err:
+            raise HomeAssistantError(
+                f"Could not stream to the Wyoming service at {host}:{port}: {err}"
+            ) from err
+        except httpx.HTTPError as err:
+            raise HomeAssistantError(f"ElevenLabs streaming failed: {err}") from err
+
+    async def async_queue_speak(
+        self,
+        messages: list[str],
+        media_player_entity_id: list[str],
+        options: dict,
+        lookahead: int,
+    ) -> None:
+        """Queue messages to play back to back on media players."""
+        key = tuple(sorted(media_player_entity_id))
+        if (queue := self._queues.get(key)) is None:
+            queue = self._queues[key] = AnnouncementQueue(self.hass, list(key))
+        queue.lookahead = lookahead
+        queue.async_add(
+            [
+                generate_media_source_id(
+                    self.hass, message, engine=self.entity_id, options=options
+                )
+                for message in messages
+            ]
+        )
+
+    async def _async_get_bundle_target(self, path: str) -> tuple[AudioCache, str]:
+        """Return the local audio cache and the resolved path of a bundle."""
+        cache = self._client.audio_cache and self._client.audio_cache.local_cache
+        if cache is None:
+            raise HomeAssistantError("The local audio cache is disabled")
+        path = self.hass.config.path(path)
+        if not await self.hass.async_add_executor_job(
+            self.hass.config.is_allowed_path, path
+        ):
+            raise HomeAssistantError(f"Access to {path} is not allowed")
+        return cache, path
+
+    async def async_export_cache(self, path: str) -> None:
+        """Export the local audio cache to a bundle file."""
+        cache, path = await self._async_get_bundle_target(path)
+        try:
+            await self.hass.async_add_executor_job(export_bundle, cache, path)
+        except OSError as err:
+            raise HomeAssistantError(f"Could not export to {path}: {err}") from err
+
+    async def async_import_cache(self, path: str) -> None:
+        """Import a bundle file into the local audio cache."""
+        cache, path = await self._async_get_bundle_target(path)
+        try:
+            await self.hass.async_add_executor_job(import_bundle, cache, path)
+        except (OSError, ValueError) as err:
+            raise HomeAssistantError(f"Could not import {path}: {err}") from err
 
     def async_get_supported_voices(self, language: str) -> list[Voice] | None:
         """Return a list of supported voices for a language."""
@@ -132,4 +372,16 @@ class ElevenLabsProvider(TextToSpeechEntity):
     @property
     def extra_state_attributes(self) -> dict:
         """Return provider attributes."""
-        return {"provider": self._name}
+        attributes = {
+            "provider": self._name,
+            "circuit_breaker": self._client.breaker.state,
+        }
+        if len(self._client.endpoints) > 1:
+            # Round trip time of each endpoint in ms, the one in use first
+            attributes["endpoints"] = self._client.endpoints.report()
+        if timings := self._client.post_processing_timings:
+            attributes["post_processing_ms"] = {
+                stage: round(total / count * 1000, 1)
+                for stage, (total, count) in timings.items()
+            }
+        return attributes
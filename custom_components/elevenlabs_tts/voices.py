@@ -0,0 +1,162 @@
+"""Compact in-memory index of the ElevenLabs voice catalog."""
+
+from collections.abc import Iterable, Iterator
+import logging
+
+from homeassistant.components.tts import Voice
+import orjson
+
+from .const import LEGACY_VOICE_SUFFIX
+
+_LOGGER = logging.getLogger(__name__)
+
+# Voices requested per page of the catalog
+VOICES_PAGE_SIZE = 100
+
+
+class VoiceRecord:
+    """The fields of a voice the integration uses."""
+
+    __slots__ = ("voice_id", "name", "is_legacy", "labels")
+
+    def __init__(
+        self,
+        voice_id: str,
+        name: str,
+        is_legacy: bool = False,
+        labels: tuple[tuple[str, str], ...] = (),
+    ) -> None:
+        """Initialize the record."""
+        self.voice_id = voice_id
+        self.name = name
+        self.is_legacy = is_legacy
+        self.labels = labels
+
+    @classmethod
+    def from_api(cls, voice: dict) -> "VoiceRecord":
+        """Keep the used fields of a voice returned by the API."""
+        return cls(
+            voice["voice_id"],
+            voice["name"],
+            bool(voice.get("is_legacy")),
+            tuple(sorted((voice.get("labels") or {}).items())),
+        )
+
+    @property
+    def display_name(self) -> str:
+        """Return the name shown to users."""
+        if self.is_legacy:
+            return self.name + LEGACY_VOICE_SUFFIX
+        return self.name
+
+    def __eq__(self, other: object) -> bool:
+        """Return True if both records hold the same fields."""
+        if not isinstance(other, VoiceRecord):
+            return NotImplemented
+        return (self.voice_id, self.name, self.is_legacy, self.labels) == (
+            other.voice_id,
+            other.name,
+            other.is_legacy,
+            other.labels,
+        )
+
+    def __repr__(self) -> str:
+        """Return a representation for logs."""
+        return f"VoiceRecord({self.voice_id!r}, {self.name!r})"
+
+
+def parse_voices_page(content: bytes) -> tuple[list[VoiceRecord], str | None]:
+    """Parse a page of the voices API and return its voices and the next token.
+
+    Runs in the executor, the catalog of a large account is several megabytes.
+    """
+    page = orjson.loads(content)
+    voices = [VoiceRecord.from_api(voice) for voice in page.get("voices", [])]
+    next_page_token = page.get("next_page_token") if page.get("has_more") else None
+    return voices, next_page_token
+
+
+class VoiceCatalog:
+    """Voices by ID and by name, updated in place from a fresh download."""
+
+    def __init__(self) -> None:
+        """Initialize an empty catalog."""
+        # Insertion ordered, the first voice is the fallback one
+        self._by_id: dict[str, VoiceRecord] = {}
+        # {name: voice_id of the first voice with that name}
+        self._by_name: dict[str, str] = {}
+        self._tts_voices: list[Voice] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of voices."""
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[VoiceRecord]:
+        """Iterate over the voices in catalog order."""
+        return iter(self._by_id.values())
+
+    def first(self) -> VoiceRecord | None:
+        """Return the first voice of the catalog."""
+        return next(iter(self._by_id.values()), None)
+
+    def get(self, identifier: str) -> VoiceRecord | None:
+        """Return a voice by name or ID."""
+        if (voice_id := self._by_name.get(identifier)) is not None:
+            return self._by_id[voice_id]
+        return self._by_id.get(identifier)
+
+    @property
+    def tts_voices(self) -> list[Voice]:
+        """Return the voices as offered to Home Assistant."""
+        if self._tts_voices is None:
+            self._tts_voices = [
+                Voice(voice_id=voice.voice_id, name=voice.display_name)
+                for voice in self._by_id.values()
+            ]
+        return self._tts_voices
+
+    def apply(self, voices: Iterable[VoiceRecord]) -> tuple[int, int, int]:
+        """Update the catalog to a complete download of it.
+
+        Unchanged voices keep their record. Returns the number of voices added,
+        changed and removed.
+        """
+        added = changed = 0
+        seen: set[str] = set()
+        for voice in voices:
+            seen.add(voice.voice_id)
+            if (current := self._by_id.get(voice.voice_id)) is None:
+                self._by_id[voice.voice_id] = voice
+                self._by_name.setdefault(voice.name, voice.voice_id)
+                added += 1
+            elif current != voice:
+                self._by_id[voice.voice_id] = voice
+                if current.name != voice.name:
+                    self._unindex_name(current)
+                    self._by_name.setdefault(voice.name, voice.voice_id)
+                changed += 1
+
+        removed = [voice_id for voice_id in self._by_id if voice_id not in seen]
+        for voice_id in removed:
+            self._unindex_name(self._by_id.pop(voice_id))
+
+        if added or changed or removed:
+            self._tts_voices = None
+            _LOGGER.debug(
+                "Voice catalog has %s voices: %s added, %s changed, %s removed",
+                len(self._by_id),
+                added,
+                changed,
+                len(removed),
+            )
+        return added, changed, len(removed)
+
+    def _unindex_name(self, voice: VoiceRecord) -> None:
+        """Point a name at another voice holding it, if any."""
+        if self._by_name.get(voice.name) != voice.voice_id:
+            return
+        del self._by_name[voice.name]
+        for other in self._by_id.values():
+            if other.name == voice.name and other.voice_id != voice.voice_id:
+                self._by_name[voice.name] = other.voice_id
+                break
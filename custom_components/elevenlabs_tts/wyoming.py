@@ -0,0 +1,130 @@
+"""Streaming of synthesized PCM to Wyoming sound services.
+
+A Wyoming event is a JSON header line, followed by `payload_length` bytes of
+payload. A clip is sent as `audio-start`, one `audio-chunk` per piece of PCM
+as ElevenLabs sends it, then `audio-stop`, so a satellite starts playing
+before the synthesis is over.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+import logging
+import socket
+import time
+
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+import orjson
+
+_LOGGER = logging.getLogger(__name__)
+
+# Domain of the integration connecting Home Assistant to Wyoming satellites
+WYOMING_DOMAIN = "wyoming"
+# Sample rates ElevenLabs can stream raw PCM at
+PCM_RATES = [16000, 22050, 24000, 44100]
+# Bytes per sample and channels of the PCM ElevenLabs streams
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+# Seconds to connect to a sound service
+CONNECT_TIMEOUT = 5.0
+# Seconds to wait for a sound service to confirm the clip was played
+PLAYED_TIMEOUT = 60.0
+
+
+def encode_event(
+    event_type: str, data: dict | None = None, payload: bytes | None = None
+) -> bytes:
+    """Return the header line of an event, without its payload."""
+    header: dict = {"type": event_type}
+    if data:
+        header["data"] = data
+    if payload:
+        header["payload_length"] = len(payload)
+    return orjson.dumps(header) + b"\n"
+
+
+@callback
+def async_get_satellite_host(hass: HomeAssistant, entity_id: str) -> str:
+    """Return the host of the Wyoming satellite an entity belongs to."""
+    if (
+        (entity := er.async_get(hass).async_get(entity_id)) is None
+        or entity.config_entry_id is None
+        or (entry := hass.config_entries.async_get_entry(entity.config_entry_id))
+        is None
+        or entry.domain != WYOMING_DOMAIN
+    ):
+        raise HomeAssistantError(f"{entity_id} is not an entity of a Wyoming satellite")
+    return entry.data[CONF_HOST]
+
+
+async def async_read_event(reader: asyncio.StreamReader) -> tuple[str, dict, bytes]:
+    """Read the type, data and payload of the next event."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("The Wyoming connection was closed")
+    header = orjson.loads(line)
+    data = header.get("data") or {}
+    if data_length := header.get("data_length"):
+        data = data | orjson.loads(await reader.readexactly(data_length))
+    payload = b""
+    if payload_length := header.get("payload_length"):
+        payload = await reader.readexactly(payload_length)
+    return header["type"], data, payload
+
+
+async def async_stream_to_wyoming(
+    audio: AsyncIterator[bytes],
+    host: str,
+    port: int,
+    rate: int,
+) -> None:
+    """Send PCM chunks to a Wyoming sound service as they arrive.
+
+    Chunks are cut at a sample boundary, a byte left over is sent with the
+    next chunk. Returns once the service confirmed the clip was played, or
+    closed the connection, waiting PLAYED_TIMEOUT seconds at most.
+    """
+    format_data = {"rate": rate, "width": SAMPLE_WIDTH, "channels": CHANNELS}
+    async with asyncio.timeout(CONNECT_TIMEOUT):
+        reader, writer = await asyncio.open_connection(host, port)
+    start = time.monotonic()
+    try:
+        if (sock := writer.get_extra_info("socket")) is not None:
+            # Small chunks go out right away instead of waiting for more
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer.write(encode_event("audio-start", format_data))
+        carry = b""
+        sent = 0
+        async for chunk in audio:
+            chunk = carry + chunk
+            cut = len(chunk) - len(chunk) % SAMPLE_WIDTH
+            chunk, carry = chunk[:cut], chunk[cut:]
+            if not chunk:
+                continue
+            writer.write(encode_event("audio-chunk", format_data, chunk))
+            writer.write(chunk)
+            await writer.drain()
+            if not sent:
+                _LOGGER.debug(
+                    "First audio chunk sent to %s:%s after %.0f ms",
+                    host,
+                    port,
+                    (time.monotonic() - start) * 1000,
+                )
+            sent += len(chunk)
+        writer.write(encode_event("audio-stop"))
+        await writer.drain()
+        _LOGGER.debug("Sent %s bytes of PCM to %s:%s", sent, host, port)
+
+        try:
+            async with asyncio.timeout(PLAYED_TIMEOUT):
+                while (await async_read_event(reader))[0] != "played":
+                    pass
+        except (ConnectionError, TimeoutError, asyncio.IncompleteReadError):
+            # Older services close the connection or never confirm
+            _LOGGER.debug("%s:%s did not confirm the clip was played", host, port)
+    finally:
+        writer.close()
+        await writer.wait_closed()
@@ -5,6 +5,45 @@ import pytest
 pytest_plugins = "pytest_homeassistant_custom_component"
 
 
+def pytest_addoption(parser):
+    """Add the options of the load harness."""
+    group = parser.getgroup("load", "load harness")
+    group.addoption("--load", action="store_true", help="run the load tests")
+    group.addoption(
+        "--load-levels",
+        default="1,2,5,10,25,50,100,200,400",
+        help="comma separated concurrency levels to ramp through",
+    )
+    group.addoption(
+        "--load-latency",
+        type=float,
+        default=0.2,
+        help="seconds the mock API waits before answering",
+    )
+    group.addoption(
+        "--load-payload",
+        type=int,
+        default=64 * 1024,
+        help="bytes of audio returned by the mock API",
+    )
+    group.addoption("--load-report", help="write the load report as JSON to a file")
+
+
+def pytest_configure(config):
+    """Register the marker of the load tests."""
+    config.addinivalue_line("markers", "load: load test, only run with --load")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the load tests unless asked for."""
+    if config.getoption("--load"):
+        return
+    skip = pytest.mark.skip(reason="load test, run with --load")
+    for item in items:
+        if "load" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations):
     yield
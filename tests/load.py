@@ -0,0 +1,265 @@
+"""Load harness driving the TTS entity against a local stand-in of the API.
+
+Each step sends a burst of concurrent syntheses through the real entity and
+client while a sampler measures how late the event loop wakes up, the
+resident memory and the open sockets of the process.
+"""
+
+import asyncio
+from dataclasses import asdict, dataclass
+import os
+import resource
+import threading
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from custom_components.elevenlabs_tts.tts import ElevenLabsProvider
+
+# Seconds between two wake ups of the event loop lag sampler
+SAMPLE_INTERVAL = 0.01
+# Highest p99 event loop lag, in seconds, a recommended limit may cause
+LAG_BUDGET = 0.05
+# Highest p95 latency a recommended limit may cause, relative to one call
+LATENCY_BUDGET = 2.0
+# Bounds of the maximum concurrent requests option
+MIN_LIMIT = 1
+MAX_LIMIT = 50
+# Bytes written per chunk of a mock response
+CHUNK_SIZE = 4096
+
+
+@dataclass
+class StepResult:
+    """The measurements of one concurrency level."""
+
+    concurrency: int
+    calls: int
+    errors: int
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    latency_max: float
+    lag_p99: float
+    lag_max: float
+    rss_mb: float
+    open_sockets: int
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return the nearest rank percentile of the values, 0 without values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def rss_mb() -> float:
+    """Return the resident memory of the process in megabytes."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak rather than current usage, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def open_sockets() -> int:
+    """Return the number of sockets open in the process, 0 if unknown."""
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return 0
+    count = 0
+    for fd in fds:
+        try:
+            count += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            continue
+    return count
+
+
+class MockApi:
+    """A stand-in of the synthesis endpoint with a set latency and clip size.
+
+    Serves from its own thread and event loop, so the lag measured on the
+    loop of Home Assistant is caused by the integration alone.
+    """
+
+    def __init__(self, latency: float, payload_size: int) -> None:
+        """Initialize the stand-in."""
+        self.latency = latency
+        self.payload = os.urandom(payload_size)
+        self._loop = asyncio.new_event_loop()
+        self._server: TestServer | None = None
+        self._thread = threading.Thread(target=self._serve, name="mock_api")
+        self._ready = threading.Event()
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/text-to-speech/{voice_id}", self._handle_tts)
+        app.router.add_get("/v1/voices/{voice_id}/settings", self._handle_settings)
+        return app
+
+    async def _handle_tts(self, request: web.Request) -> web.StreamResponse:
+        await request.read()
+        await asyncio.sleep(self.latency)
+        response = web.StreamResponse(headers={"Content-Type": "audio/mpeg"})
+        await response.prepare(request)
+        for start in range(0, len(self.payload), CHUNK_SIZE):
+            await response.write(self.payload[start : start + CHUNK_SIZE])
+        await response.write_eof()
+        return response
+
+    async def _handle_settings(self, request: web.Request) -> web.Response:
+        return web.json_response({"stability": 0.5, "similarity_boost": 0.75})
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._server = TestServer(self._app())
+        self._loop.run_until_complete(self._server.start_server(access_log=None))
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._server.close())
+        self._loop.close()
+
+    @property
+    def base_url(self) -> str:
+        """Return the base URL to configure the client with."""
+        return str(self._server.make_url("")).rstrip("/")
+
+    def start(self) -> None:
+        """Start listening on a local port."""
+        self._thread.start()
+        self._ready.wait()
+
+    def close(self) -> None:
+        """Stop the server and its thread."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+class Sampler:
+    """Measure event loop lag, memory and sockets while a step runs."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        """Initialize the sampler."""
+        self.interval = interval
+        self.lags: list[float] = []
+        self.rss_mb = 0.0
+        self.open_sockets = 0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+            self.rss_mb = max(self.rss_mb, rss_mb())
+            self.open_sockets = max(self.open_sockets, open_sockets())
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def run_step(
+    provider: ElevenLabsProvider, concurrency: int, rounds: int
+) -> StepResult:
+    """Send rounds of concurrent syntheses with unique messages."""
+    latencies: list[float] = []
+    errors = 0
+
+    async def _call(message: str) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await provider.async_get_tts_audio(message, "en", {})
+        except Exception:  # pylint: disable=broad-except
+            errors += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    sampler = Sampler()
+    sampler.start()
+    try:
+        for round_number in range(rounds):
+            await asyncio.gather(
+                *(
+                    _call(f"Step {concurrency} round {round_number} call {number}")
+                    for number in range(concurrency)
+                )
+            )
+    finally:
+        await sampler.stop()
+
+    return StepResult(
+        concurrency=concurrency,
+        calls=concurrency * rounds,
+        errors=errors,
+        latency_p50=percentile(latencies, 0.5),
+        latency_p95=percentile(latencies, 0.95),
+        latency_p99=percentile(latencies, 0.99),
+        latency_max=max(latencies, default=0.0),
+        lag_p99=percentile(sampler.lags, 0.99),
+        lag_max=max(sampler.lags, default=0.0),
+        rss_mb=sampler.rss_mb,
+        open_sockets=sampler.open_sockets,
+    )
+
+
+def recommend_limit(results: list[StepResult]) -> int:
+    """Return the highest concurrency that stayed within the budgets.
+
+    A step is within budget without errors, with a p99 event loop lag under
+    LAG_BUDGET and a p95 latency under LATENCY_BUDGET times the median
+    latency of the first step. The result is kept in the option's bounds.
+    """
+    if not results:
+        return MIN_LIMIT
+    baseline = results[0].latency_p50
+    within = [
+        result.concurrency
+        for result in results
+        if not result.errors
+        and result.lag_p99 <= LAG_BUDGET
+        and result.latency_p95 <= baseline * LATENCY_BUDGET
+    ]
+    return min(MAX_LIMIT, max(within, default=MIN_LIMIT))
+
+
+def format_report(results: list[StepResult], latency: float, payload: int) -> str:
+    """Return a table of the steps and the recommended limit."""
+    lines = [
+        f"Mock API latency {latency * 1000:.0f} ms, clips of {payload} bytes",
+        f"{'conc':>5} {'calls':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'lag p99':>8} {'lag max':>8} {'rss MB':>7} {'socks':>6}",
+    ]
+    for result in results:
+        lines.append(
+            f"{result.concurrency:>5} {result.calls:>6} {result.errors:>4} "
+            f"{result.latency_p50 * 1000:>8.1f} {result.latency_p95 * 1000:>8.1f} "
+            f"{result.latency_p99 * 1000:>8.1f} {result.lag_p99 * 1000:>8.1f} "
+            f"{result.lag_max * 1000:>8.1f} {result.rss_mb:>7.1f} "
+            f"{result.open_sockets:>6}"
+        )
+    lines.append(f"Recommended max_concurrent_requests: {recommend_limit(results)}")
+    return "\n".join(lines)
+
+
+def report_as_dict(results: list[StepResult]) -> dict:
+    """Return the steps and the recommended limit as a JSON serializable dict."""
+    return {
+        "steps": [asdict(result) for result in results],
+        "recommended_max_concurrent_requests": recommend_limit(results),
+    }
@@ -0,0 +1,84 @@
+import asyncio
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant, ServiceCall
+import pytest
+
+from custom_components.elevenlabs_tts.announcements import AnnouncementQueue
+
+
+@pytest.mark.asyncio
+async def test_queue_synthesizes_ahead(hass: HomeAssistant):
+    """Test the next clips are generated while the current one plays."""
+    events: list[str] = []
+    hass.states.async_set("media_player.kitchen", "idle")
+
+    async def _resolve(hass, media_source_id, target):
+        events.append(f"synthesize {media_source_id}")
+        await asyncio.sleep(0.01)
+
+    async def _play_media(call: ServiceCall) -> None:
+        media = call.data["media_content_id"]
+        events.append(f"play {media}")
+        hass.states.async_set("media_player.kitchen", "playing")
+
+        async def _finish():
+            await asyncio.sleep(0.05)
+            events.append(f"finish {media}")
+            hass.states.async_set("media_player.kitchen", "idle")
+
+        hass.async_create_task(_finish())
+
+    hass.services.async_register("media_player", "play_media", _play_media)
+
+    queue = AnnouncementQueue(hass, ["media_player.kitchen"])
+    queue.lookahead = 1
+    with patch(
+        "custom_components.elevenlabs_tts.announcements.media_source.async_resolve_media",
+        side_effect=_resolve,
+    ):
+        queue.async_add(["one", "two"])
+        queue.async_add(["three"])
+        await queue._worker
+        await hass.async_block_till_done()
+
+    assert [event for event in events if event.startswith("play")] == [
+        "play one",
+        "play two",
+        "play three",
+    ]
+    # Each clip is generated before the previous one stops playing, and never
+    # more than one clip ahead
+    assert events.index("synthesize two") < events.index("finish one")
+    assert events.index("synthesize three") < events.index("finish two")
+    assert events.index("synthesize three") > events.index("play one")
+    # A clip only starts once the previous one finished
+    assert events.index("finish one") < events.index("play two")
+
+
+@pytest.mark.asyncio
+async def test_queue_continues_after_failures(hass: HomeAssistant):
+    """Test a failed synthesis or playback only skips that announcement."""
+    played: list[str] = []
+    hass.states.async_set("media_player.kitchen", "idle")
+
+    async def _resolve(hass, media_source_id, target):
+        if media_source_id == "broken":
+            raise ValueError("unexpected")
+
+    async def _play_media(call: ServiceCall) -> None:
+        if call.data["media_content_id"] == "unplayable":
+            raise RuntimeError("player offline")
+        played.append(call.data["media_content_id"])
+
+    hass.services.async_register("media_player", "play_media", _play_media)
+
+    queue = AnnouncementQueue(hass, ["media_player.kitchen"])
+    with patch(
+        "custom_components.elevenlabs_tts.announcements.media_source.async_resolve_media",
+        side_effect=_resolve,
+    ), patch("custom_components.elevenlabs_tts.announcements.START_TIMEOUT", 0):
+        queue.async_add(["broken", "unplayable", "last"])
+        await queue._worker
+
+    assert played == ["last"]
@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks.hotpath import REFERENCE, async_run_cases, compare
+
+
+@pytest.mark.asyncio
+async def test_benchmark_cases_run(hass):
+    """Test every benchmark case runs without the network."""
+    results = await async_run_cases(hass, min_time=0, repeat=1, rounds=1)
+
+    assert REFERENCE in results
+    assert "voice_lookup_name[10000]" in results
+    assert "build_request[adaptive]" in results
+    assert all(result > 0 for result in results.values())
+
+
+def test_compare_flags_slowdowns():
+    """Test cases are compared relative to the reference of their run."""
+    baseline = {REFERENCE: 100.0, "fast": 10.0, "slow": 10.0}
+    # The whole machine is twice as slow, only "slow" regressed on top of that
+    results = {REFERENCE: 200.0, "fast": 22.0, "slow": 30.0, "new": 5.0}
+
+    assert compare(results, baseline, threshold=0.25) == [
+        ("fast", 0.11, 0.1, False),
+        ("slow", 0.15, 0.1, True),
+        ("new", 0.025, None, False),
+    ]
+
+
+def test_compare_per_case_thresholds():
+    """Test noisy cases tolerate more than the default threshold."""
+    baseline = {REFERENCE: 100.0, "voice_lookup_id[10]": 10.0, "other": 10.0}
+    results = {REFERENCE: 100.0, "voice_lookup_id[10]": 13.0, "other": 13.0}
+
+    assert [row[3] for row in compare(results, baseline, threshold=0.25)] == [
+        False,
+        True,
+    ]
+    # A higher default applies to every case
+    assert not any(row[3] for row in compare(results, baseline, threshold=0.5))
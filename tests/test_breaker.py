@@ -0,0 +1,61 @@
+from unittest.mock import Mock, patch
+
+from custom_components.elevenlabs_tts.breaker import (
+    BREAKER_RESET_SECONDS,
+    BREAKER_SLOW_SECONDS,
+    CircuitBreaker,
+)
+
+
+def test_breaker_opens_on_failures():
+    """Test the breaker opens once enough requests failed and fails fast."""
+    breaker = CircuitBreaker()
+    listener = Mock()
+    breaker.async_add_listener(listener)
+
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_success(0.5)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    listener.assert_called_once_with("open")
+    assert not breaker.allow_request()
+
+
+def test_breaker_opens_on_slow_requests():
+    """Test requests breaching the latency objective open the breaker."""
+    breaker = CircuitBreaker()
+    for _ in range(5):
+        breaker.record_success(BREAKER_SLOW_SECONDS + 1)
+    assert breaker.state == "open"
+
+
+def test_breaker_half_open_probe():
+    """Test a single probe is let through and closes the breaker on success."""
+    breaker = CircuitBreaker()
+    with patch("custom_components.elevenlabs_tts.breaker.time.monotonic") as now:
+        now.return_value = 1000.0
+        for _ in range(5):
+            breaker.record_failure()
+        assert breaker.state == "open"
+
+        now.return_value += BREAKER_RESET_SECONDS + 1
+        assert breaker.allow_request()
+        assert breaker.state == "half_open"
+        assert not breaker.allow_request()
+
+        # A failed probe opens the breaker again
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow_request()
+
+        now.return_value += BREAKER_RESET_SECONDS + 1
+        assert breaker.allow_request()
+        breaker.record_success(0.5)
+        assert breaker.state == "closed"
+        assert breaker.allow_request()
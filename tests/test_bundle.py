@@ -0,0 +1,65 @@
+import tarfile
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.elevenlabs_tts.bundle import export_bundle, import_bundle
+from custom_components.elevenlabs_tts.cache import AudioCache
+
+
+def test_export_import_round_trip(tmp_path):
+    """Test a bundle deduplicates clips and restores every key."""
+    source = AudioCache(str(tmp_path / "source"), 1024**2)
+    source.put(b"a" * 16, b"shared clip")
+    source.put(b"b" * 16, b"shared clip")
+    source.put(b"c" * 16, b"other clip")
+    bundle = str(tmp_path / "bundle.tar")
+
+    with patch.object(source, "get", wraps=source.get) as get:
+        assert export_bundle(source, bundle) == 3
+    # Each clip is read once
+    assert get.call_count == 3
+    with tarfile.open(bundle) as archive:
+        names = archive.getnames()
+    assert names[0] == "manifest.json"
+    assert len(names) == 3  # the manifest and two distinct blobs
+
+    target = AudioCache(str(tmp_path / "target"), 1024**2)
+    assert import_bundle(target, bundle) == 3
+    assert target.get(b"a" * 16) == b"shared clip"
+    assert target.get(b"b" * 16) == b"shared clip"
+    assert target.get(b"c" * 16) == b"other clip"
+    source.close()
+    target.close()
+
+
+def test_import_skips_corrupted_blobs(tmp_path):
+    """Test blobs whose content does not match their hash are not imported."""
+    source = AudioCache(str(tmp_path / "source"), 1024**2)
+    source.put(b"a" * 16, b"clip")
+    bundle = str(tmp_path / "bundle.tar")
+    export_bundle(source, bundle)
+    source.close()
+
+    with open(bundle, "r+b") as file:
+        content = file.read()
+        file.seek(content.rindex(b"clip"))
+        file.write(b"clop")
+
+    target = AudioCache(str(tmp_path / "target"), 1024**2)
+    assert import_bundle(target, bundle) == 0
+    assert target.get(b"a" * 16) is None
+    target.close()
+
+
+def test_import_rejects_other_files(tmp_path):
+    """Test a tar file without a manifest is refused."""
+    bundle = tmp_path / "bundle.tar"
+    (tmp_path / "notes.txt").write_text("hello")
+    with tarfile.open(bundle, "w") as archive:
+        archive.add(tmp_path / "notes.txt", arcname="notes.txt")
+
+    target = AudioCache(str(tmp_path / "target"), 1024**2)
+    with pytest.raises(ValueError):
+        import_bundle(target, str(bundle))
+    target.close()
@@ -0,0 +1,234 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import os
+import time
+from unittest.mock import patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from homeassistant.const import CONF_API_KEY
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.elevenlabs_tts import _async_setup_audio_cache, cache
+from custom_components.elevenlabs_tts.cache import (
+    AudioCache,
+    LayeredCache,
+    LocalCacheBackend,
+    MemoryCacheBackend,
+    RemoteCacheBackend,
+    cache_key,
+)
+from custom_components.elevenlabs_tts.const import DOMAIN
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+
+
+def test_cache_key_is_canonical():
+    """Test the key ignores dict ordering but not content."""
+    key = cache_key("text-to-speech/1", {"text": "Hi", "model_id": "m"}, {"o": 0})
+
+    assert key == cache_key(
+        "text-to-speech/1", {"model_id": "m", "text": "Hi"}, {"o": 0}
+    )
+    assert key != cache_key(
+        "text-to-speech/1", {"text": "Hi!", "model_id": "m"}, {"o": 0}
+    )
+    assert len(key) == 16
+
+
+def test_put_get_and_reopen(tmp_path):
+    """Test clips survive closing and reopening the cache."""
+    audio_cache = AudioCache(str(tmp_path), 1024**2)
+    audio_cache.put(b"k" * 16, b"first clip")
+    audio_cache.put(b"j" * 16, b"second clip")
+    audio_cache.put(b"k" * 16, b"replaced clip")
+
+    assert audio_cache.get(b"k" * 16) == b"replaced clip"
+    assert audio_cache.get(b"x" * 16) is None
+    audio_cache.close()
+
+    audio_cache = AudioCache(str(tmp_path), 1024**2)
+    assert len(audio_cache) == 2
+    assert audio_cache.get(b"j" * 16) == b"second clip"
+    assert audio_cache.get(b"k" * 16) == b"replaced clip"
+    audio_cache.close()
+
+
+def test_index_grows(tmp_path):
+    """Test the index is resized as entries are added."""
+    audio_cache = AudioCache(str(tmp_path), 1024**2)
+    keys = [i.to_bytes(16, "little") for i in range(1, 2001)]
+    for key in keys:
+        audio_cache.put(key, key)
+
+    assert len(audio_cache) == 2000
+    assert all(audio_cache.get(key) == key for key in keys)
+    audio_cache.close()
+
+
+@pytest.mark.parametrize("segment_size", [64])
+def test_compaction_keeps_recently_read_clips(tmp_path, segment_size):
+    """Test compaction evicts old clips but copies forward ones read since."""
+    with patch.object(cache, "SEGMENT_SIZE", segment_size), patch.object(
+        cache.time, "time", return_value=1000
+    ) as mock_time:
+        audio_cache = AudioCache(str(tmp_path), 200)
+        audio_cache.put(b"a" * 16, b"a" * 40)
+        audio_cache.put(b"b" * 16, b"b" * 40)
+        audio_cache.put(b"c" * 16, b"c" * 40)
+        audio_cache.put(b"d" * 16, b"d" * 40)
+        first_segment = os.path.join(str(tmp_path), "segment_00000000.dat")
+        os.utime(first_segment, (1500, 1500))
+
+        # Reading "a" after its segment was written gives it a second chance
+        mock_time.return_value = 2000
+        audio_cache.get(b"a" * 16)
+        assert audio_cache.needs_compaction()
+        audio_cache.compact()
+
+        assert not os.path.exists(first_segment)
+        assert audio_cache.get(b"a" * 16) == b"a" * 40
+        assert audio_cache.get(b"b" * 16) is None
+        assert audio_cache.get(b"d" * 16) == b"d" * 40
+        audio_cache.close()
+
+
+def test_size_waits_for_writers(tmp_path):
+    """Test the size is not read while a clip is being stored."""
+    audio_cache = AudioCache(str(tmp_path), 1024)
+    with ThreadPoolExecutor(1) as executor:
+        with audio_cache._lock:
+            future = executor.submit(audio_cache.needs_compaction)
+            with pytest.raises(FutureTimeoutError):
+                future.result(timeout=0.05)
+        assert future.result() is False
+    audio_cache.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_is_opt_in(hass):
+    """Test no audio is cached, on disk or in memory, unless a size is set."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_API_KEY: "key"})
+    client = ElevenLabsClient(hass, config_entry=entry)
+    await _async_setup_audio_cache(hass, entry, client)
+
+    assert client.audio_cache is None
+    assert client.memory_cache is None
+    assert not os.path.exists(hass.config.path(DOMAIN))
+
+
+@pytest.fixture
+async def remote_cache_server(socket_enabled):
+    """Run a local stand-in for an S3-style object store."""
+    objects = {}
+    delay = {"seconds": 0}
+
+    async def handle_get(request):
+        await asyncio.sleep(delay["seconds"])
+        if request.match_info["name"] not in objects:
+            return web.Response(status=404)
+        return web.Response(body=objects[request.match_info["name"]])
+
+    async def handle_put(request):
+        objects[request.match_info["name"]] = await request.read()
+        server.content_types[request.match_info["name"]] = request.content_type
+        return web.Response(status=200)
+
+    app = web.Application()
+    app.router.add_get("/bucket/{name}", handle_get)
+    app.router.add_put("/bucket/{name}", handle_put)
+    server = TestServer(app)
+    await server.start_server()
+    server.objects = objects
+    server.content_types = {}
+    server.delay = delay
+    yield server
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_backend_round_trip(hass, remote_cache_server):
+    """Test clips are uploaded in the background and read back."""
+    url = str(remote_cache_server.make_url("/bucket"))
+    backend = RemoteCacheBackend(hass, url, timeout=1)
+    key = b"k" * 16
+
+    assert await backend.async_get(key) is None
+    await backend.async_put(key, b"clip")
+    await backend.async_close()
+
+    assert remote_cache_server.objects[key.hex()] == b"clip"
+    assert remote_cache_server.content_types[key.hex()] == "application/octet-stream"
+    assert await backend.async_get(key) == b"clip"
+
+
+@pytest.mark.asyncio
+async def test_remote_backend_timeout_is_a_miss(hass, remote_cache_server):
+    """Test a slow remote server is treated as a miss within the timeout."""
+    url = str(remote_cache_server.make_url("/bucket"))
+    backend = RemoteCacheBackend(hass, url, timeout=0.05)
+    remote_cache_server.objects[(b"k" * 16).hex()] = b"clip"
+    remote_cache_server.delay["seconds"] = 1
+
+    start = time.monotonic()
+    assert await backend.async_get(b"k" * 16) is None
+    assert time.monotonic() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_layered_cache_reads_through(hass, tmp_path, remote_cache_server):
+    """Test a remote hit is copied into the local cache."""
+    local = LocalCacheBackend(hass, AudioCache(str(tmp_path), 1024**2))
+    url = str(remote_cache_server.make_url("/bucket"))
+    layered = LayeredCache([local, RemoteCacheBackend(hass, url, timeout=1)])
+    remote_cache_server.objects[(b"k" * 16).hex()] = b"clip"
+
+    assert await layered.async_get(b"k" * 16) == b"clip"
+    assert await local.async_get(b"k" * 16) == b"clip"
+    await layered.async_close()
+
+
+def test_memory_tier_keeps_popular_clips():
+    """Test clips read again survive a burst of one-off clips."""
+    memory = MemoryCacheBackend(100)
+    memory.put(b"popular", b"p" * 40)
+    assert memory.get(b"popular") == b"p" * 40
+    for number in range(10):
+        memory.put(f"once {number}".encode(), b"o" * 30)
+    memory.put(b"too large", b"x" * 101)
+
+    assert memory.get(b"popular") == b"p" * 40
+    assert memory.get(b"once 0") is None
+    assert memory.get(b"too large") is None
+    assert memory.get(b"once 9") == b"o" * 30
+    assert (memory.size, len(memory)) == (100, 3)
+    assert memory.hit_ratio == 3 / 5
+
+
+def test_memory_tier_shrinks_under_memory_pressure():
+    """Test the budget halves while memory is short and comes back after."""
+    memory = MemoryCacheBackend(100)
+    for number in range(5):
+        memory.put(bytes([number]), b"a" * 20)
+
+    memory.adjust_to_memory(available=10, min_free=50)
+    assert (memory.limit, memory.size, len(memory)) == (50, 40, 2)
+    memory.adjust_to_memory(available=60, min_free=50)
+    assert memory.limit == 50
+    memory.adjust_to_memory(available=100, min_free=50)
+    assert memory.limit == 100
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_is_filled_by_disk_hits(hass, tmp_path):
+    """Test a clip read from disk is served from memory afterwards."""
+    local = LocalCacheBackend(hass, AudioCache(str(tmp_path), 1024**2))
+    memory = MemoryCacheBackend(1024)
+    layered = LayeredCache([memory, local])
+    await local.async_put(b"k" * 16, b"clip")
+
+    assert await layered.async_get(b"k" * 16) == b"clip"
+    with patch.object(local, "async_get") as disk_get:
+        assert await layered.async_get(b"k" * 16) == b"clip"
+    disk_get.assert_not_called()
+    await layered.async_close()
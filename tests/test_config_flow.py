@@ -1,10 +1,18 @@
 from unittest.mock import Mock, patch
 
 from homeassistant import config_entries, data_entry_flow
+from homeassistant.components.tts import ATTR_VOICE, Voice
 from httpx import HTTPStatusError
 import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.elevenlabs_tts.const import DOMAIN
+from custom_components.elevenlabs_tts.const import (
+    CONF_CACHE_SIZE,
+    CONF_FALLBACK_TTS,
+    CONF_OFFLINE_SIMILARITY,
+    DATA_VOICE_CATALOG,
+    DOMAIN,
+)
 
 from .mocks import MOCK_CONFIG
 
@@ -24,15 +32,19 @@ async def test_successful_config_flow(hass):
     # If a user were to enter `test_username` for username and `test_password`
     # for password, it would result in this function call
     with patch(
-        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.get_voices"
+        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.validate_api_key"
+    ) as mock_validate, patch(
+        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.get_voices",
+        return_value=[],
     ) as mock_get_voices:
         result = await hass.config_entries.flow.async_configure(
             result["flow_id"], user_input=MOCK_CONFIG
         )
 
     # Check that the config flow is complete and a new entry is created with
-    # the input data
-    assert mock_get_voices.call_count == 2
+    # the input data, and that setup reused the catalog fetched by the flow
+    assert mock_validate.call_count == 1
+    assert mock_get_voices.call_count == 1
     assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
     assert result["title"] == "Eleven Labs TTS"
     assert result["data"] == MOCK_CONFIG
@@ -60,6 +72,11 @@ async def test_bad_api_key(hass):
     }  # return value for json() method
 
     with patch(
+        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.validate_api_key",
+        side_effect=HTTPStatusError(
+            "An error occurred", request=Mock(), response=response_mock
+        ),
+    ) as mock_validate, patch(
         "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.get_voices",
         side_effect=HTTPStatusError(
             "An error occurred", request=Mock(), response=response_mock
@@ -74,12 +91,64 @@ async def test_bad_api_key(hass):
             pass
 
     # ASSERT
+    assert mock_validate.call_count == 1
     assert mock_get_voices.call_count == 1
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
     assert result["errors"] == {"api_key": "invalid_api_key"}
     assert result["step_id"] == "user"
 
 
+@pytest.mark.asyncio
+async def test_key_without_user_access(hass):
+    """Test a key that cannot read the user is validated by listing voices."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    response_mock = Mock()
+    response_mock.status_code = 401
+    response_mock.json.return_value = {"detail": {"status": "missing_permissions"}}
+
+    with patch(
+        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.validate_api_key",
+        side_effect=HTTPStatusError(
+            "An error occurred", request=Mock(), response=response_mock
+        ),
+    ), patch(
+        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.get_voices",
+        return_value=[],
+    ) as mock_get_voices:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=MOCK_CONFIG
+        )
+
+    # Setup reused the catalog fetched by the flow
+    assert mock_get_voices.call_count == 1
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert not hass.data[DOMAIN].get(DATA_VOICE_CATALOG)
+
+
+@pytest.mark.asyncio
+async def test_catalog_dropped_when_setup_fails(hass):
+    """Test the catalog handed to setup is dropped with the flow."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch(
+        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.validate_api_key"
+    ), patch(
+        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.get_voices",
+        return_value=[],
+    ):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=MOCK_CONFIG
+        )
+
+    # No voice was found, so setup failed
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert result["result"].state is config_entries.ConfigEntryState.SETUP_ERROR
+    assert not hass.data[DOMAIN].get(DATA_VOICE_CATALOG)
+
+
 @pytest.mark.asyncio
 async def test_server_error(hass):
     """Test a bad config flow."""
@@ -99,10 +168,12 @@ async def test_server_error(hass):
     response_mock.content = b"Server Error"
 
     with patch(
-        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.get_voices",
+        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.validate_api_key",
         side_effect=HTTPStatusError(
             "An error occurred", request=Mock(), response=response_mock
         ),
+    ) as mock_validate, patch(
+        "custom_components.elevenlabs_tts.elevenlabs.ElevenLabsClient.get_voices"
     ) as mock_get_voices:
         # ACT
         try:
@@ -113,7 +184,73 @@ async def test_server_error(hass):
             pass
 
     # ASSERT
-    assert mock_get_voices.call_count == 1
+    assert mock_validate.call_count == 1
+    assert mock_get_voices.call_count == 0
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
     assert result["errors"] == {"api_key": "Server Error"}
     assert result["step_id"] == "user"
+    # Nothing is left behind by a flow that created no entry
+    assert DATA_VOICE_CATALOG not in hass.data.get(DOMAIN, {})
+
+
+@pytest.mark.asyncio
+async def test_options_flow_voice_selector(hass):
+    """Test the options flow offers the cached voices without a network call."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    entry.add_to_hass(hass)
+    client = Mock()
+    client.voices = [
+        Voice(voice_id="1", name="Rachel"),
+        Voice(voice_id="2", name="Laura (Legacy)"),
+    ]
+    hass.data[DOMAIN] = {entry.entry_id: client}
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == data_entry_flow.RESULT_TYPE_MENU
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"next_step_id": "voice"}
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "voice"
+    selector = result["data_schema"].schema[ATTR_VOICE]
+    assert [option["value"] for option in selector.config["options"]] == [
+        "Rachel",
+        "Laura (Legacy)",
+    ]
+    assert client.get_voices.call_count == 0
+    # Markers only carry their key and default, no stray error message
+    assert all(marker.msg is None for marker in result["data_schema"].schema)
+
+
+@pytest.mark.asyncio
+async def test_options_flow_saves_one_group(hass):
+    """Test a step replaces its own options and keeps those of the others."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        options={CONF_CACHE_SIZE: 64, CONF_FALLBACK_TTS: "tts.piper"},
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["menu_options"] == [
+        "voice",
+        "latency",
+        "cache",
+        "resilience",
+        "long_form",
+        "tracing",
+    ]
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"next_step_id": "resilience"}
+    )
+    # The fallback entity was cleared
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_OFFLINE_SIMILARITY: 0.5}
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert entry.options[CONF_CACHE_SIZE] == 64
+    assert entry.options[CONF_OFFLINE_SIMILARITY] == 0.5
+    assert CONF_FALLBACK_TTS not in entry.options
@@ -0,0 +1,150 @@
+import asyncio
+import io
+from unittest.mock import patch
+import wave
+
+from homeassistant.components.tts.media_source import media_source_id_to_kwargs
+from homeassistant.const import CONF_API_KEY
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from yarl import URL
+
+from custom_components.elevenlabs_tts.const import (
+    CONF_DIALOGUE_GAP,
+    CONF_SIMILARITY,
+    CONF_SPEAKERS,
+    CONF_STABILITY,
+    DOMAIN,
+)
+from custom_components.elevenlabs_tts.dialogue import (
+    join_pcm,
+    parse_dialogue,
+    parse_speakers,
+)
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.spool import AudioSpool, MemoryBudget
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+SPEAKERS = {"Butler": "Alfred", "security": "2"}
+
+
+def test_parse_dialogue():
+    """Test a script is split into lines of the speakers' voices."""
+    script = (
+        "Good evening.\n"
+        "butler: Sir, someone is at the door.\n"
+        "\n"
+        "SECURITY:  The camera shows a courier,\n"
+        "  carrying a parcel.\n"
+        "Butler:\n"
+        "Note: not a speaker\n"
+    )
+
+    assert parse_dialogue(script, SPEAKERS) == [
+        (None, "Good evening."),
+        ("Alfred", "Sir, someone is at the door."),
+        ("2", "The camera shows a courier, carrying a parcel."),
+        ("Alfred", "Note: not a speaker"),
+    ]
+    assert parse_dialogue("", SPEAKERS) == []
+
+
+def test_parse_speakers():
+    """Test speakers are read from a mapping, a JSON object or label pairs."""
+    assert parse_speakers(SPEAKERS) == SPEAKERS
+    assert parse_speakers('{"Butler": "Alfred", "security": "2"}') == SPEAKERS
+    assert parse_speakers(" Butler = Alfred, security=2") == SPEAKERS
+    for invalid in ("Butler", "Butler=", '{"Butler": 1}', "[1]", ["Butler"]):
+        with pytest.raises(ValueError):
+            parse_speakers(invalid)
+
+
+def test_join_pcm():
+    """Test clips are joined with silence, dropping odd trailing bytes."""
+    assert join_pcm([b"\x01\x02\x03", b"\x04\x05"], gap=0.5, rate=4) == (
+        b"\x01\x02" + bytes(4) + b"\x04\x05"
+    )
+
+
+@pytest.mark.asyncio
+async def test_dialogue_lines_are_synthesized_at_once(hass):
+    """Test the lines of a dialogue are requested concurrently and joined."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        options={CONF_STABILITY: 0.5, CONF_SIMILARITY: 0.7},
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Alfred"), VoiceRecord("2", "Guard")])
+    in_flight = []
+    both_sent = asyncio.Event()
+
+    async def post(endpoint, data, params, api_key=None):
+        assert params["output_format"] == "pcm_24000"
+        in_flight.append(endpoint)
+        if len(in_flight) == 2:
+            both_sent.set()
+        await both_sent.wait()
+        spool = AudioSpool(hass, MemoryBudget())
+        spool.first_byte = 0.1
+        await spool.async_write(endpoint[-1].encode() * 4)
+        return spool
+
+    options = {
+        CONF_SPEAKERS: SPEAKERS,
+        CONF_DIALOGUE_GAP: 0.001,
+        "supersede": "media_player.hall",
+    }
+    with patch.object(client, "post", side_effect=post):
+        extension, audio = await asyncio.wait_for(
+            client.get_tts_audio("Butler: Visitor.\nSecurity: A courier.", options),
+            1,
+        )
+
+    assert sorted(in_flight) == ["text-to-speech/1", "text-to-speech/2"]
+    assert extension == "wav"
+    with wave.open(io.BytesIO(audio)) as wav:
+        assert wav.getframerate() == 24000
+        # 24 samples of silence between the lines
+        assert wav.readframes(100) == b"1111" + bytes(48) + b"2222"
+
+
+@pytest.mark.asyncio
+async def test_dialogue_through_media_source(hass):
+    """Test speakers given as text survive the media source ID of tts.speak."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        options={CONF_STABILITY: 0.5, CONF_SIMILARITY: 0.7},
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Alfred"), VoiceRecord("2", "Guard")])
+    requested = []
+
+    async def post(endpoint, data, params, api_key=None):
+        requested.append(endpoint)
+        spool = AudioSpool(hass, MemoryBudget())
+        spool.first_byte = 0.1
+        await spool.async_write(b"\x01\x00")
+        return spool
+
+    # tts.speak puts the options in the query string of the media source ID
+    media_source_id = str(
+        URL.build(
+            path="tts.elevenlabs",
+            query={
+                "message": "Butler: Visitor.\nSecurity: A courier.",
+                CONF_SPEAKERS: "Butler=Alfred,Security=Guard",
+                CONF_DIALOGUE_GAP: 0.1,
+            },
+        )
+    )
+    kwargs = media_source_id_to_kwargs(media_source_id)
+    with patch.object(client, "post", side_effect=post):
+        extension, _ = await client.get_tts_audio(kwargs["message"], kwargs["options"])
+        assert extension == "wav"
+        assert sorted(requested) == ["text-to-speech/1", "text-to-speech/2"]
+
+        with pytest.raises(HomeAssistantError):
+            await client.get_tts_audio("Butler: Hi.", {CONF_SPEAKERS: "Butler"})
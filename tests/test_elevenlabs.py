@@ -1,24 +1,49 @@
-from unittest.mock import Mock
-
-from homeassistant.components.tts import ATTR_VOICE
+from array import array
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+from unittest.mock import Mock, patch
+import wave
+
+from homeassistant.components.tts import ATTR_AUDIO_OUTPUT, ATTR_LANGUAGE, ATTR_VOICE
 from homeassistant.const import CONF_API_KEY
+from homeassistant.exceptions import HomeAssistantError
+import httpx
 import orjson
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 import respx
 
+from custom_components.elevenlabs_tts.breaker import (
+    BREAKER_MIN_REQUESTS,
+    CircuitOpenError,
+)
+from custom_components.elevenlabs_tts.elevenlabs import DeadlineExceededError
 from custom_components.elevenlabs_tts.const import (
+    CONF_ADAPTIVE_LATENCY,
+    CONF_BASE_URLS,
+    CONF_DEADLINE,
     CONF_MODEL,
     CONF_OPTIMIZE_LATENCY,
+    CONF_POST_PROCESSING,
+    CONF_PRIORITY,
+    CONF_SAMPLE_RATE,
     CONF_SIMILARITY,
     CONF_STABILITY,
+    CONF_STYLE,
+    CONF_SUPERSEDE,
+    CONF_TEXT_NORMALIZATION,
+    CONF_USE_SPEAKER_BOOST,
 )
+from custom_components.elevenlabs_tts.cache import AudioCache, LocalCacheBackend
 from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.spool import AudioSpool, MemoryBudget
+from custom_components.elevenlabs_tts.voices import VoiceRecord
 
 
 @pytest.fixture
 def mock_config_entry():
-    return Mock()
+    return Mock(options={})
 
 
 @pytest.fixture
@@ -67,7 +92,7 @@ def test_init_with_config_entry(hass, mock_config_entry):
     assert client._api_key == mock_config_entry.data["api_key"]
     assert client.base_url == "https://api.elevenlabs.io/v1"
     assert client._headers == {"Content-Type": "application/json"}
-    assert client._voices == []
+    assert len(client.catalog) == 0
 
 
 def test_init_without_api_key_or_config_entry(hass):
@@ -134,12 +159,13 @@ async def test_post(client):
         )
 
         # Call the method being tested
-        response = await client.post(
+        spool = await client.post(
             endpoint, data={"param": "value"}, params={"query": "param"}
         )
 
         # Assert that the response matches the expected value
-        assert response.content == mock_response
+        assert await spool.async_read() == mock_response
+        spool.close()
 
         # Assert that the request was made with the correct URL, headers, and data
         expected_url = f"https://api.elevenlabs.io/v1/{endpoint}?query=param"
@@ -162,7 +188,7 @@ async def test_post_with_api_key(client):
 
         # Call the method being tested with a specific API key
         api_key = "test-api-key"
-        response = await client.post(
+        spool = await client.post(
             endpoint,
             data={"param": "value"},
             params={"query": "param"},
@@ -170,7 +196,8 @@ async def test_post_with_api_key(client):
         )
 
         # Assert that the response matches the expected value
-        assert response.content == mock_response
+        assert await spool.async_read() == mock_response
+        spool.close()
 
         # Assert that the request was made with the correct URL, headers, and data
         expected_url = f"https://api.elevenlabs.io/v1/{endpoint}?query=param"
@@ -190,23 +217,23 @@ async def test_get_voices(client):
                 {"voice_id": "2", "name": "Voice 2"},
             ]
         }
-        respx.get("https://api.elevenlabs.io/v1/voices").respond(json=mock_response)
+        respx.get("https://api.elevenlabs.io/v2/voices").respond(json=mock_response)
 
         # Call the method being tested
         voices = await client.get_voices()
 
         # Assert that the returned value matches the expected value
-        assert voices == mock_response["voices"]
+        assert [voice.voice_id for voice in voices] == ["1", "2"]
 
         # Assert that the request was made with the correct URL and headers
         assert (
             respx.calls[0].request.url
-            == "https://api.elevenlabs.io/v1/voices?show_legacy=true"
+            == "https://api.elevenlabs.io/v2/voices?page_size=100&show_legacy=true"
         )
         assert respx.calls[0].request.headers["xi-api-key"] == client._api_key
 
-        # Assert that the client's _voices attribute is updated correctly
-        assert client._voices == mock_response["voices"]
+        # Assert that the client's catalog is updated correctly
+        assert [voice.name for voice in client.voices] == ["Voice 1", "Voice 2"]
 
 
 @pytest.mark.asyncio
@@ -217,14 +244,14 @@ async def test_get_voice_by_name_or_id(client):
         {"voice_id": "2", "name": "Voice2"},
         {"voice_id": "3", "name": "Voice3"},
     ]
-    client._voices = voices
+    client.set_voices([VoiceRecord.from_api(voice) for voice in voices])
     voice_name = "Voice2"
 
     # Call the method being tested
     voice = await client.get_voice_by_name_or_id(voice_name)
 
     # Assert that the returned voice matches the expected voice
-    assert voice == {"voice_id": "2", "name": "Voice2"}
+    assert voice == VoiceRecord("2", "Voice2")
 
 
 @pytest.mark.asyncio
@@ -235,14 +262,14 @@ async def test_get_voice_by_name_not_found(client):
         {"voice_id": "2", "name": "Voice2"},
         {"voice_id": "3", "name": "Voice3"},
     ]
-    client._voices = voices
+    client.set_voices([VoiceRecord.from_api(voice) for voice in voices])
     voice_name = "Voice4"  # Voice name not present in the mocked voices
 
     # Call the method being tested
     voice = await client.get_voice_by_name_or_id(voice_name)
 
-    # Assert that the returned voice is an empty dictionary
-    assert voice == {}
+    # Assert that no voice is returned
+    assert voice is None
 
 
 @pytest.mark.asyncio
@@ -260,7 +287,7 @@ async def test_get_tts_audio(client):
             {"voice_id": "2", "name": "Voice2"},
             {"voice_id": "3", "name": "Voice3"},
         ]
-        client._voices = voices
+        client.set_voices([VoiceRecord.from_api(voice) for voice in voices])
 
         # Define the options for the TTS audio generation
         options = {
@@ -317,7 +344,7 @@ async def test_get_tts_options_with_valid_voice_name(client):
         ]
 
         # Mock the API response for getting voices
-        respx.get("https://api.elevenlabs.io/v1/voices").respond(
+        respx.get("https://api.elevenlabs.io/v2/voices").respond(
             json={"voices": example_voices}
         )
 
@@ -364,7 +391,7 @@ async def test_get_tts_options_with_valid_voice_name_not_found(client):
         ]
 
         # Mock the API response for getting voices
-        respx.get("https://api.elevenlabs.io/v1/voices").respond(
+        respx.get("https://api.elevenlabs.io/v2/voices").respond(
             json={"voices": example_voices}
         )
 
@@ -413,10 +440,10 @@ async def test_get_tts_options_with_valid_voice_name_refresh(client):
         ]
 
         # Mock the API response for getting voices
-        respx.get("https://api.elevenlabs.io/v1/voices").respond(
-            json={"voices": example_voices_initial}
+        client.set_voices(
+            [VoiceRecord.from_api(voice) for voice in example_voices_initial]
         )
-        respx.get("https://api.elevenlabs.io/v1/voices").respond(
+        respx.get("https://api.elevenlabs.io/v2/voices").respond(
             json={"voices": example_voices_refreshed}
         )
 
@@ -443,3 +470,443 @@ async def test_get_tts_options_with_valid_voice_name_refresh(client):
         assert model == "custom_model"
         assert optimize_latency == 1
         assert api_key == "test_api_key"
+
+
+@pytest.mark.asyncio
+async def test_validate_api_key(client):
+    """Test the API key is validated against the user endpoint."""
+    with respx.mock:
+        respx.get("https://api.elevenlabs.io/v1/user").respond(json={"user_id": "1"})
+
+        response = await client.validate_api_key()
+
+        assert response == {"user_id": "1"}
+        assert respx.calls[0].request.url == "https://api.elevenlabs.io/v1/user"
+        assert respx.calls[0].request.headers["xi-api-key"] == client._api_key
+
+
+@pytest.mark.asyncio
+async def test_stream_tts_audio(client):
+    """Test audio chunks are read from the streaming endpoint."""
+    with respx.mock:
+        respx.post("https://api.elevenlabs.io/v1/text-to-speech/1/stream").respond(
+            content=b"mock_audio_data"
+        )
+        client.set_voices(
+            [
+                VoiceRecord.from_api(voice)
+                for voice in [{"voice_id": "1", "name": "Voice1"}]
+            ]
+        )
+
+        chunks = [
+            chunk
+            async for chunk in client.stream_tts_audio(
+                "Hello, world!", {ATTR_VOICE: "Voice1"}
+            )
+        ]
+
+        assert b"".join(chunks) == b"mock_audio_data"
+        assert respx.calls[0].request.headers["accept"] == "audio/mpeg"
+
+
+@pytest.mark.asyncio
+async def test_stream_tts_audio_failover_and_cache(hass, tmp_path):
+    """Test streaming fails over like a synthesis and caches the clip."""
+    entry = MockConfigEntry(
+        domain="elevenlabs_tts",
+        data={CONF_API_KEY: "test_api_key"},
+        options={
+            CONF_STABILITY: 0.5,
+            CONF_SIMILARITY: 0.7,
+            CONF_BASE_URLS: "https://eu.example.com,https://api.elevenlabs.io",
+        },
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    client.audio_cache = LocalCacheBackend(hass, AudioCache(str(tmp_path), 1024**2))
+
+    async def stream():
+        return [
+            chunk
+            async for chunk in client.stream_tts_audio("Hello", {ATTR_VOICE: "Voice1"})
+        ]
+
+    with respx.mock:
+        regional = respx.post("https://eu.example.com/v1/text-to-speech/1/stream").mock(
+            side_effect=httpx.ConnectError("unreachable")
+        )
+        route = respx.post(
+            "https://api.elevenlabs.io/v1/text-to-speech/1/stream"
+        ).respond(content=b"streamed")
+
+        assert b"".join(await stream()) == b"streamed"
+        assert b"".join(await stream()) == b"streamed"
+        # The plain synthesis of the same message shares the cached clip
+        assert await client.get_tts_audio("Hello", {ATTR_VOICE: "Voice1"}) == (
+            "mp3",
+            b"streamed",
+        )
+
+    assert regional.call_count == 1
+    assert route.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_tts_audio_circuit_open(client):
+    """Test nothing is streamed while the circuit breaker is open."""
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    for _ in range(BREAKER_MIN_REQUESTS):
+        client.breaker.record_failure()
+
+    with respx.mock:
+        route = respx.post("https://api.elevenlabs.io/v1/text-to-speech/1/stream")
+        with pytest.raises(CircuitOpenError):
+            async for _ in client.stream_tts_audio("Hello", {ATTR_VOICE: "Voice1"}):
+                pass
+
+    assert not route.called
+
+
+@pytest.mark.asyncio
+async def test_get_tts_audio_wav_output(client):
+    """Test WAV output is asked for as PCM and other formats are refused."""
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    with respx.mock:
+        route = respx.post("https://api.elevenlabs.io/v1/text-to-speech/1").respond(
+            content=b"\x01\x00\x02\x00"
+        )
+        audio_format, audio = await client.get_tts_audio(
+            "Hello", {ATTR_VOICE: "Voice1", ATTR_AUDIO_OUTPUT: "wav"}
+        )
+
+    assert route.calls[0].request.url.params["output_format"] == "pcm_24000"
+    assert audio_format == "wav"
+    with wave.open(io.BytesIO(audio)) as wav:
+        assert wav.readframes(wav.getnframes()) == b"\x01\x00\x02\x00"
+    with pytest.raises(ValueError):
+        await client.get_tts_audio(
+            "Hello", {ATTR_VOICE: "Voice1", ATTR_AUDIO_OUTPUT: "ogg"}
+        )
+
+
+@pytest.mark.asyncio
+async def test_get_tts_audio_uses_audio_cache(hass, client, tmp_path):
+    """Test a repeated request is served from the audio cache."""
+    client.audio_cache = LocalCacheBackend(hass, AudioCache(str(tmp_path), 1024**2))
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    with respx.mock:
+        route = respx.post("https://api.elevenlabs.io/v1/text-to-speech/1").respond(
+            content=b"mock_audio_data"
+        )
+
+        first = await client.get_tts_audio("Hello", {ATTR_VOICE: "Voice1"})
+        second = await client.get_tts_audio("Hello", {ATTR_VOICE: "Voice1"})
+
+    assert first == second == ("mp3", b"mock_audio_data")
+    assert route.call_count == 1
+    await client.audio_cache.async_close()
+
+
+async def _spool(client, audio):
+    """Return a spool holding the audio, as `post` does."""
+    spool = AudioSpool(client.hass, MemoryBudget())
+    spool.first_byte = 0.0
+    await spool.async_write(audio)
+    return spool
+
+
+@pytest.mark.asyncio
+async def test_get_tts_audio_superseded(client):
+    """Test a newer message with the same supersede key cancels the pending one."""
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    release = asyncio.Event()
+    cancelled = []
+
+    async def slow_post(endpoint, data, params, api_key=None):
+        try:
+            await release.wait()
+        except asyncio.CancelledError:
+            cancelled.append(data["text"])
+            raise
+        return await _spool(client, data["text"].encode())
+
+    options = {ATTR_VOICE: "Voice1", CONF_SUPERSEDE: "media_player.kitchen"}
+    with patch.object(client, "post", side_effect=slow_post):
+        first = asyncio.create_task(client.get_tts_audio("First", options))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(client.get_tts_audio("Second", options))
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(HomeAssistantError):
+            await first
+        assert await second == ("mp3", b"Second")
+
+    assert cancelled == ["First"]
+
+
+@pytest.mark.asyncio
+async def test_get_tts_audio_deadline(client):
+    """Test a synthesis is abandoned once its deadline passes."""
+    client.set_voices([VoiceRecord("1", "Voice1")])
+
+    async def slow_post(endpoint, data, params, api_key=None):
+        await asyncio.sleep(10)
+
+    with patch.object(client, "post", side_effect=slow_post), pytest.raises(
+        HomeAssistantError
+    ):
+        await client.get_tts_audio("Hello", {ATTR_VOICE: "Voice1", CONF_DEADLINE: 0.01})
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_does_not_trip_breaker(client):
+    """Test the breaker ignores time spent waiting for a request slot."""
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    client._slots = asyncio.Semaphore(1)
+
+    async def post(endpoint, data, params, api_key=None):
+        await asyncio.sleep(0.02)
+        return await _spool(client, b"audio")
+
+    with patch.object(client, "post", side_effect=post), patch(
+        "custom_components.elevenlabs_tts.breaker.BREAKER_SLOW_SECONDS", 0.01
+    ):
+        # Each request waits in the queue behind the ones before it
+        await asyncio.gather(
+            *(
+                client.get_tts_audio(f"Message {i}", {ATTR_VOICE: "Voice1"})
+                for i in range(BREAKER_MIN_REQUESTS)
+            )
+        )
+        assert client.breaker.state == "closed"
+
+        await client._slots.acquire()
+        for i in range(BREAKER_MIN_REQUESTS):
+            with pytest.raises(DeadlineExceededError):
+                await client.get_tts_audio(
+                    f"Late {i}", {ATTR_VOICE: "Voice1", CONF_DEADLINE: 0.01}
+                )
+        client._slots.release()
+    assert client.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_frees_its_slot(client):
+    """Test cancelling a running request hands its slot to a queued one."""
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    client._slots = asyncio.Semaphore(1)
+    started = []
+
+    async def slow_post(endpoint, data, params, api_key=None):
+        started.append(data["text"])
+        if data["text"] == "First":
+            await asyncio.sleep(10)
+        return await _spool(client, data["text"].encode())
+
+    with patch.object(client, "post", side_effect=slow_post):
+        first = asyncio.create_task(client.get_tts_audio("First", {ATTR_VOICE: "1"}))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(client.get_tts_audio("Second", {ATTR_VOICE: "1"}))
+        await asyncio.sleep(0.01)
+        assert started == ["First"]
+
+        first.cancel()
+        assert await second == ("mp3", b"Second")
+
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_build_tts_request_adaptive_latency(hass):
+    """Test the adaptive mode picks settings unless they are pinned per call."""
+    mock_entry = MockConfigEntry(
+        domain="elevenlabs_tts",
+        data={CONF_API_KEY: "test_api_key"},
+        options={CONF_ADAPTIVE_LATENCY: True},
+    )
+    client = ElevenLabsClient(hass, config_entry=mock_entry)
+    client.set_voices([VoiceRecord("1", "Laura")])
+
+    _, data, params, _ = await client.build_tts_request(
+        "A long and leisurely announcement " * 4, {CONF_PRIORITY: "low"}
+    )
+    assert data["model_id"] == "eleven_multilingual_v2"
+    assert "style" in data["voice_settings"]
+    assert params == {"optimize_streaming_latency": 0}
+
+    _, data, _, _ = await client.build_tts_request(
+        "Hi", {CONF_PRIORITY: "low", CONF_MODEL: "eleven_flash_v2_5"}
+    )
+    assert data["model_id"] == "eleven_flash_v2_5"
+
+
+@pytest.mark.asyncio
+async def test_latency_learned_from_first_audio(client):
+    """Test the latency controller learns the time to first audio of a request."""
+    client.set_voices([VoiceRecord("1", "Voice1")])
+
+    async def slow_post(endpoint, data, params, api_key=None):
+        # Waiting for memory and reading the body are not counted
+        await asyncio.sleep(0.2)
+        spool = await _spool(client, b"audio")
+        spool.first_byte = 0.05
+        return spool
+
+    with patch.object(client, "post", side_effect=slow_post):
+        await client.get_tts_audio("Hello", {ATTR_VOICE: "Voice1"})
+
+    assert client.latency_controller.estimate("custom_model", 1, 5, 9) == 0.05
+
+
+@pytest.mark.asyncio
+async def test_post_records_first_byte(client):
+    """Test post keeps the time from sending the request to its first audio."""
+    with respx.mock:
+        respx.post("https://api.elevenlabs.io/v1/test").respond(content=b"audio")
+        spool = await client.post("test", data={}, params={})
+
+    assert 0 <= spool.first_byte < 1
+    spool.close()
+
+
+@pytest.mark.asyncio
+async def test_build_tts_request_zero_settings(hass):
+    """Test settings of 0 or False are sent rather than replaced by defaults."""
+    mock_entry = MockConfigEntry(
+        domain="elevenlabs_tts",
+        data={CONF_API_KEY: "test_api_key"},
+        options={CONF_STABILITY: 0.5, CONF_SIMILARITY: 0.7, CONF_STYLE: 0.4},
+    )
+    client = ElevenLabsClient(hass, config_entry=mock_entry)
+    client.set_voices([VoiceRecord("1", "Laura")])
+
+    _, data, params, _ = await client.build_tts_request(
+        "Hi",
+        {
+            CONF_MODEL: "eleven_multilingual_v2",
+            CONF_STABILITY: 0,
+            CONF_STYLE: 0,
+            CONF_USE_SPEAKER_BOOST: False,
+            CONF_OPTIMIZE_LATENCY: 0,
+        },
+    )
+    assert data["voice_settings"] == {
+        "stability": 0,
+        "similarity_boost": 0.7,
+        "style": 0,
+        "use_speaker_boost": False,
+    }
+    assert params == {"optimize_streaming_latency": 0}
+
+
+@pytest.mark.asyncio
+async def test_build_tts_request_local_normalization(hass):
+    """Test messages are normalized locally when rules exist for the language."""
+    mock_entry = MockConfigEntry(
+        domain="elevenlabs_tts",
+        data={CONF_API_KEY: "test_api_key"},
+        options={CONF_TEXT_NORMALIZATION: "local"},
+    )
+    client = ElevenLabsClient(hass, config_entry=mock_entry)
+    client.set_voices([VoiceRecord("1", "Laura")])
+
+    _, data, _, _ = await client.build_tts_request("It is 21.5°C", {})
+    assert data["text"] == "It is twenty-one point five degrees Celsius"
+    assert data["apply_text_normalization"] == "off"
+
+    _, data, _, _ = await client.build_tts_request(
+        "Il fait 21,5°C", {ATTR_LANGUAGE: "fr"}
+    )
+    assert data["text"] == "Il fait 21,5°C"
+    assert "apply_text_normalization" not in data
+
+
+@pytest.mark.asyncio
+async def test_get_voices_paginated(client):
+    """Test the catalog is downloaded page by page and updated in place."""
+    with respx.mock:
+        route = respx.get("https://api.elevenlabs.io/v2/voices")
+        route.side_effect = [
+            httpx.Response(
+                200,
+                json={
+                    "voices": [{"voice_id": "1", "name": "Rachel"}],
+                    "has_more": True,
+                    "next_page_token": "page2",
+                },
+            ),
+            httpx.Response(
+                200,
+                json={
+                    "voices": [{"voice_id": "2", "name": "Laura", "is_legacy": True}],
+                    "has_more": False,
+                    "next_page_token": None,
+                },
+            ),
+        ]
+        await client.get_voices()
+
+    assert route.calls[1].request.url.params["next_page_token"] == "page2"
+    assert [voice.name for voice in client.voices] == ["Rachel", "Laura (Legacy)"]
+    rachel = await client.get_voice_by_name_or_id("Rachel")
+
+    # A second sync keeps unchanged records and applies the differences
+    added, changed, removed = client.catalog.apply(
+        [
+            VoiceRecord("1", "Rachel"),
+            VoiceRecord("3", "Adam", labels=(("accent", "american"),)),
+        ]
+    )
+    assert (added, changed, removed) == (1, 0, 1)
+    assert await client.get_voice_by_name_or_id("Rachel") is rachel
+    assert await client.get_voice_by_name_or_id("Laura") is None
+    assert (await client.get_voice_by_name_or_id("3")).name == "Adam"
+
+
+@pytest.mark.asyncio
+async def test_get_tts_audio_post_processing(hass, tmp_path):
+    """Test post-processed clips are made from PCM and cached with it."""
+    mock_entry = MockConfigEntry(
+        domain="elevenlabs_tts",
+        data={CONF_API_KEY: "test_api_key"},
+        options={CONF_POST_PROCESSING: True, CONF_SAMPLE_RATE: 16000},
+    )
+    client = ElevenLabsClient(hass, config_entry=mock_entry)
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    client.audio_cache = LocalCacheBackend(hass, AudioCache(str(tmp_path), 1024**2))
+    pcm = array("h", [0] * 2400 + [8000, -8000] * 2400 + [0] * 2400).tobytes()
+    pool = ThreadPoolExecutor(1)
+
+    with respx.mock, patch(
+        "custom_components.elevenlabs_tts.elevenlabs.async_get_process_pool",
+        return_value=pool,
+    ):
+        respx.get("https://api.elevenlabs.io/v1/voices/1/settings").respond(
+            json={"stability": 0.4, "similarity_boost": 0.8}
+        )
+        route = respx.post("https://api.elevenlabs.io/v1/text-to-speech/1").respond(
+            content=pcm
+        )
+        first = await client.get_tts_audio("Hello", {ATTR_VOICE: "Voice1"})
+        second = await client.get_tts_audio("Hello", {ATTR_VOICE: "Voice1"})
+    pool.shutdown()
+
+    assert route.call_count == 1
+    assert route.calls[0].request.url.params["output_format"] == "pcm_24000"
+    assert first == second
+    extension, audio = first
+    assert extension == "wav"
+    with wave.open(io.BytesIO(audio)) as wav:
+        assert wav.getframerate() == 16000
+    assert set(client.post_processing_timings) == {
+        "trim",
+        "gain",
+        "resample",
+        "encode",
+        "pool",
+    }
+    # The raw PCM stays cached for other post-processing settings
+    assert len(client.audio_cache.local_cache) == 2
+    await client.audio_cache.async_close()
@@ -0,0 +1,90 @@
+from homeassistant.components.tts import ATTR_VOICE
+from homeassistant.const import CONF_API_KEY
+import httpx
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import respx
+
+from custom_components.elevenlabs_tts.const import (
+    CONF_BASE_URLS,
+    CONF_SIMILARITY,
+    CONF_STABILITY,
+    DOMAIN,
+)
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.endpoints import (
+    ENDPOINT_RETRY_SECONDS,
+    EndpointPool,
+    parse_base_urls,
+)
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+GLOBAL = "https://api.elevenlabs.io"
+REGIONAL = "https://api.eu.residency.elevenlabs.io"
+
+
+def test_endpoint_order():
+    """Test the fastest healthy endpoint is used, failed ones last."""
+    pool = EndpointPool(parse_base_urls(f" {GLOBAL}/, {REGIONAL} ,"))
+    first, second = pool.endpoints
+    assert pool.best() is first
+
+    pool.observe(first, 0.2)
+    pool.observe(second, 0.05)
+    assert pool.best() is second
+    assert pool.report() == {REGIONAL: 50.0, GLOBAL: 200.0}
+
+    pool.record_failure(second)
+    assert pool.ordered() == [first, second]
+    assert pool.report() == {GLOBAL: 200.0, REGIONAL: None}
+
+    second.failed_at -= ENDPOINT_RETRY_SECONDS
+    assert pool.best() is second
+    pool.record_success(second)
+    assert second.failed_at is None
+
+
+@pytest.mark.asyncio
+async def test_probe_endpoints(hass):
+    """Test probes measure the endpoints and mark unreachable ones."""
+    pool = EndpointPool([GLOBAL, REGIONAL])
+    changes = []
+    pool.async_add_listener(lambda: changes.append(pool.report()))
+    with respx.mock:
+        respx.head(GLOBAL).respond(404)
+        respx.head(REGIONAL).mock(side_effect=httpx.ConnectTimeout("timeout"))
+        async with httpx.AsyncClient() as session:
+            await pool.async_probe(session)
+
+    assert pool.endpoints[0].latency is not None
+    assert pool.endpoints[1].failed_at is not None
+    assert changes[-1] == {GLOBAL: pool.report()[GLOBAL], REGIONAL: None}
+
+
+@pytest.mark.asyncio
+async def test_failover(hass):
+    """Test a synthesis goes to the next endpoint when one is unreachable."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        options={
+            CONF_STABILITY: 0.5,
+            CONF_SIMILARITY: 0.7,
+            CONF_BASE_URLS: f"{REGIONAL},{GLOBAL}",
+        },
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    with respx.mock:
+        regional = respx.post(f"{REGIONAL}/v1/text-to-speech/1").mock(
+            side_effect=httpx.ConnectError("unreachable")
+        )
+        respx.post(f"{GLOBAL}/v1/text-to-speech/1").respond(content=b"audio")
+
+        first = await client.get_tts_audio("Hello", {ATTR_VOICE: "Voice1"})
+        second = await client.get_tts_audio("Hello again", {ATTR_VOICE: "Voice1"})
+
+    assert first == second == ("mp3", b"audio")
+    assert regional.call_count == 1
+    assert client.base_url == f"{GLOBAL}/v1"
+    assert client.breaker.state == "closed"
@@ -0,0 +1,136 @@
+from unittest.mock import patch
+
+from homeassistant.const import CONF_API_KEY
+import httpx
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import respx
+
+from custom_components.elevenlabs_tts.const import CONF_MODEL, CONF_STABILITY
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.history import HistoryIndex
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+API = "https://api.elevenlabs.io/v1"
+SETTINGS = {"stability": 0.5, "similarity_boost": 0.75}
+
+
+def history_item(item_id: str, text: str, date: int, **fields) -> dict:
+    """Return a history item as listed by the API."""
+    return {
+        "history_item_id": item_id,
+        "voice_id": "1",
+        "model_id": "eleven_flash_v2_5",
+        "text": text,
+        "date_unix": date,
+        "content_type": "audio/mpeg",
+        "state": "created",
+        "settings": SETTINGS | {"style": 0, "use_speaker_boost": True},
+    } | fields
+
+
+class HistoryApi:
+    """A stand-in of the history endpoints, serving its items newest first."""
+
+    def __init__(self, items: list[dict]) -> None:
+        """Initialize the stand-in."""
+        self.items = items
+        self.pages: list[dict] = []
+
+    def _list(self, request: httpx.Request) -> httpx.Response:
+        params = dict(request.url.params)
+        self.pages.append(params)
+        start = 0
+        if after := params.get("start_after_history_item_id"):
+            ids = [item["history_item_id"] for item in self.items]
+            start = ids.index(after) + 1
+        page = self.items[start : start + int(params["page_size"])]
+        return httpx.Response(
+            200,
+            json={
+                "history": page,
+                "last_history_item_id": page[-1]["history_item_id"] if page else None,
+                "has_more": start + len(page) < len(self.items),
+            },
+        )
+
+    def _audio(self, request: httpx.Request, item_id: str) -> httpx.Response:
+        if not any(item["history_item_id"] == item_id for item in self.items):
+            return httpx.Response(404)
+        return httpx.Response(200, content=f"audio of {item_id}".encode())
+
+    def mount(self, router: respx.Router) -> None:
+        """Route the history requests of the mock router to the stand-in."""
+        router.get(f"{API}/history").mock(side_effect=self._list)
+        router.get(url__regex=rf"{API}/history/(?P<item_id>[^/]+)/audio").mock(
+            side_effect=self._audio
+        )
+
+
+@pytest.fixture
+def client(hass):
+    """Return a client of a config entry."""
+    entry = MockConfigEntry(domain="elevenlabs_tts", data={CONF_API_KEY: "key"})
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Laura")])
+    return client
+
+
+@pytest.mark.asyncio
+async def test_history_sync_incremental(hass, client):
+    """Test a sync only pages through the items newer than the last one."""
+    api = HistoryApi(
+        [
+            history_item("c", "Third", 300),
+            history_item("b", "Second", 200),
+            history_item("a", "First", 100, state="deleted"),
+        ]
+    )
+    history = HistoryIndex(client, "entry")
+    with respx.mock as router, patch(
+        "custom_components.elevenlabs_tts.history.HISTORY_PAGE_SIZE", 2
+    ):
+        api.mount(router)
+        assert await history.async_sync() == 2
+        assert len(api.pages) == 2
+
+        api.items.insert(0, history_item("d", "Fourth", 400))
+        api.pages.clear()
+        assert await history.async_sync() == 1
+        assert len(api.pages) == 1
+
+    restored = HistoryIndex(client, "entry")
+    await restored.async_load()
+    assert len(restored) == 3
+    assert restored.find("1", "eleven_flash_v2_5", "Fourth", SETTINGS) == "d"
+    assert restored.find("1", "eleven_flash_v2_5", "First", SETTINGS) is None
+
+
+@pytest.mark.asyncio
+async def test_get_tts_audio_from_history(hass, client):
+    """Test a cache miss downloads the same request from the history."""
+    api = HistoryApi(
+        [history_item("b", "Second", 200), history_item("a", "First", 100)]
+    )
+    client.history = HistoryIndex(client, "entry")
+    options = {CONF_MODEL: "eleven_flash_v2_5"}
+
+    with respx.mock as router:
+        api.mount(router)
+        router.get(f"{API}/voices/1/settings").respond(json=SETTINGS)
+        tts = router.post(f"{API}/text-to-speech/1").respond(content=b"generated")
+        await client.history.async_sync()
+
+        assert await client.get_tts_audio("First", options) == ("mp3", b"audio of a")
+        assert not tts.called
+
+        # Other settings make other audio
+        assert await client.get_tts_audio("First", options | {CONF_STABILITY: 0.9}) == (
+            "mp3",
+            b"generated",
+        )
+
+        # Items deleted from the history are forgotten
+        del api.items[0]
+        assert await client.get_tts_audio("Second", options) == ("mp3", b"generated")
+        assert len(client.history) == 1
@@ -0,0 +1,54 @@
+from custom_components.elevenlabs_tts.latency import LatencyController
+
+
+def test_choose_without_history_uses_priors():
+    """Test short urgent messages get a fast model, long relaxed ones quality."""
+    controller = LatencyController()
+
+    model, _ = controller.choose(30, hour=9, priority="urgent")
+    assert model in ("eleven_flash_v2_5", "eleven_turbo_v2_5")
+    model, level = controller.choose(800, hour=9, priority="low")
+    assert (model, level) == ("eleven_multilingual_v2", 0)
+
+
+def test_choose_gives_long_messages_more_time():
+    """Test a long message waits for a model a short one of its class skips."""
+    controller = LatencyController()
+    for length in (30, 800):
+        for level in range(5):
+            controller.observe("eleven_multilingual_v2", level, length, 9, 1.5)
+
+    model, _ = controller.choose(30, hour=9, priority="normal")
+    assert model == "eleven_turbo_v2_5"
+    model, _ = controller.choose(800, hour=9, priority="normal")
+    assert model == "eleven_multilingual_v2"
+
+    # Urgent messages get no allowance for their length
+    model, _ = controller.choose(800, hour=9, priority="urgent")
+    assert model in ("eleven_flash_v2_5", "eleven_turbo_v2_5")
+
+
+def test_choose_follows_observed_latency():
+    """Test a model observed to be slow is avoided at that time of day."""
+    controller = LatencyController()
+    for level in range(5):
+        for _ in range(5):
+            controller.observe("eleven_multilingual_v2", level, 100, 18, 6.0)
+
+    model, _ = controller.choose(100, hour=19, priority="normal")
+    assert model == "eleven_turbo_v2_5"
+
+    # Other times of day fall back to the history of all hours
+    model, _ = controller.choose(100, hour=3, priority="normal")
+    assert model == "eleven_turbo_v2_5"
+
+
+def test_choose_respects_pinned_settings():
+    """Test a pinned model or level is kept."""
+    controller = LatencyController()
+
+    assert controller.choose(
+        30, hour=9, priority="urgent", model="eleven_multilingual_v2", level=4
+    ) == ("eleven_multilingual_v2", 4)
+    model, level = controller.choose(30, hour=9, priority="urgent", level=0)
+    assert level == 0
@@ -0,0 +1,103 @@
+import orjson
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import pytest
+
+from custom_components.elevenlabs_tts.const import (
+    CONF_BASE_URLS,
+    CONF_MAX_CONCURRENCY,
+    DEFAULT_VOICE,
+    DOMAIN,
+)
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.tts import ElevenLabsProvider
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+from .load import (
+    MockApi,
+    StepResult,
+    format_report,
+    percentile,
+    recommend_limit,
+    report_as_dict,
+    run_step,
+)
+from .mocks import MOCK_CONFIG
+
+
+async def _run_ramp(hass, levels, latency, payload, rounds):
+    """Ramp through the levels against a fresh mock API and return the steps."""
+    api = MockApi(latency, payload)
+    api.start()
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        # Let every call of a step through, the steps measure the limit
+        options={CONF_BASE_URLS: api.base_url, CONF_MAX_CONCURRENCY: max(levels)},
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", DEFAULT_VOICE)])
+    provider = ElevenLabsProvider(entry, client)
+    provider.hass = hass
+    try:
+        return [await run_step(provider, level, rounds) for level in levels]
+    finally:
+        api.close()
+
+
+def _step(concurrency, p50, p95, lag, errors=0):
+    return StepResult(
+        concurrency, concurrency, errors, p50, p95, p95, p95, lag, lag, 0, 0
+    )
+
+
+def test_recommend_limit():
+    """Test the limit is the highest step within the lag and latency budgets."""
+    results = [
+        _step(1, 0.2, 0.2, 0.001),
+        _step(10, 0.2, 0.25, 0.01),
+        _step(50, 0.2, 0.3, 0.02, errors=1),
+        _step(100, 0.3, 0.5, 0.2),
+    ]
+    assert recommend_limit(results) == 10
+    assert recommend_limit([]) == 1
+    # Kept within the bounds of the option
+    assert recommend_limit([_step(1, 0.2, 0.2, 0), _step(200, 0.2, 0.2, 0)]) == 50
+
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile([], 0.99) == 0
+
+
+async def test_load_smoke(hass, socket_enabled):
+    """Test the harness measures a short ramp through the entity."""
+    results = await _run_ramp(hass, [1, 4], latency=0.01, payload=16 * 1024, rounds=1)
+
+    assert [(result.concurrency, result.errors) for result in results] == [
+        (1, 0),
+        (4, 0),
+    ]
+    assert all(result.latency_p50 > 0.01 for result in results)
+    assert all(result.open_sockets > 0 and result.rss_mb > 0 for result in results)
+    assert "Recommended max_concurrent_requests" in format_report(
+        results, 0.01, 16 * 1024
+    )
+
+
+@pytest.mark.load
+async def test_load_ramp(hass, socket_enabled, pytestconfig):
+    """Ramp the concurrency and report what limit to configure."""
+    levels = [
+        int(level) for level in pytestconfig.getoption("--load-levels").split(",")
+    ]
+    latency = pytestconfig.getoption("--load-latency")
+    payload = pytestconfig.getoption("--load-payload")
+
+    results = await _run_ramp(hass, levels, latency, payload, rounds=3)
+
+    print()
+    print(format_report(results, latency, payload))
+    if path := pytestconfig.getoption("--load-report"):
+        with open(path, "wb") as report:
+            report.write(
+                orjson.dumps(report_as_dict(results), option=orjson.OPT_INDENT_2)
+            )
+    assert len(results) == len(levels)
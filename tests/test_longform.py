@@ -0,0 +1,170 @@
+import io
+import itertools
+import os
+from unittest.mock import patch
+import wave
+
+from homeassistant.const import CONF_API_KEY
+import httpx
+import orjson
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import respx
+
+from custom_components.elevenlabs_tts import _async_setup_long_form
+from custom_components.elevenlabs_tts.const import (
+    CONF_ADAPTIVE_LATENCY,
+    CONF_LONG_FORM,
+    CONF_MODEL,
+    CONF_SIMILARITY,
+    CONF_STABILITY,
+)
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.longform import LongFormJobs, split_long_form
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+MESSAGE = "The first sentence. The second sentence. The third one."
+
+
+def test_split_long_form():
+    """Test chunks end at sentence ends, or between words if they must."""
+    assert split_long_form(MESSAGE, 40) == [
+        "The first sentence. The second sentence.",
+        "The third one.",
+    ]
+    assert split_long_form("One two three four five.\n\nSix", 10) == [
+        "One two",
+        "three four",
+        "five. Six",
+    ]
+    assert split_long_form("abcdefghij", 4) == ["abcd", "efgh", "ij"]
+
+
+@pytest.mark.asyncio
+async def test_long_form_is_opt_in(hass):
+    """Test long messages are only chunked with the option enabled."""
+    for enabled in (False, True):
+        entry = MockConfigEntry(
+            domain="elevenlabs_tts",
+            data={CONF_API_KEY: "key"},
+            options={CONF_LONG_FORM: True} if enabled else {},
+        )
+        client = ElevenLabsClient(hass, config_entry=entry)
+        await _async_setup_long_form(hass, entry, client)
+        assert (client.long_form is not None) == enabled
+
+
+def make_client(hass, path: str, **options) -> ElevenLabsClient:
+    """Return a client keeping its long-form jobs in a folder."""
+    entry = MockConfigEntry(
+        domain="elevenlabs_tts",
+        data={CONF_API_KEY: "key"},
+        options={CONF_STABILITY: 0.5, CONF_SIMILARITY: 0.7} | options,
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Laura")])
+    client.long_form = LongFormJobs(path)
+    return client
+
+
+def test_save_chunk_from_file(tmp_path):
+    """Test a chunk spooled to a file is copied without reading it whole."""
+    job = LongFormJobs(str(tmp_path)).open("job", ["One.", "Two."])
+    job.save_chunk(0, "r1", memoryview(b"\x01\x00"))
+    job.save_chunk(1, None, io.BytesIO(b"\x02\x00"))
+
+    assert job.read_chunks() == [b"\x01\x00", b"\x02\x00"]
+    assert job.missing == []
+
+
+@pytest.mark.asyncio
+async def test_long_form_resumes_missing_chunks(hass, tmp_path):
+    """Test a retry, even by a new client, only requests the missing chunks."""
+    path = str(tmp_path / "long_form")
+    requested: list[dict] = []
+    request_ids = itertools.count(1)
+
+    def _respond(request: httpx.Request) -> httpx.Response:
+        body = orjson.loads(request.content)
+        requested.append(body)
+        if failing and body["text"] == "The second sentence.":
+            return httpx.Response(503)
+        index = next(request_ids)
+        return httpx.Response(
+            200, content=bytes([index, 0]) * 2, headers={"request-id": f"r{index}"}
+        )
+
+    with respx.mock, patch(
+        "custom_components.elevenlabs_tts.elevenlabs.LONG_FORM_CHUNK_CHARS", 20
+    ), patch("custom_components.elevenlabs_tts.elevenlabs.RETRY_DELAY", 0):
+        route = respx.post("https://api.elevenlabs.io/v1/text-to-speech/1")
+        route.side_effect = _respond
+
+        failing = True
+        with pytest.raises(httpx.HTTPStatusError):
+            await make_client(hass, path).get_tts_audio(MESSAGE, {})
+        # The first chunk, then three attempts at the second one
+        assert [body["text"] for body in requested] == [
+            "The first sentence.",
+            *["The second sentence."] * 3,
+        ]
+
+        failing = False
+        requested.clear()
+        audio_format, audio = await make_client(hass, path).get_tts_audio(MESSAGE, {})
+
+    assert route.calls[0].request.url.params["output_format"] == "pcm_24000"
+    assert [body["text"] for body in requested] == [
+        "The second sentence.",
+        "The third one.",
+    ]
+    assert requested[0]["previous_request_ids"] == ["r1"]
+    assert requested[1]["previous_request_ids"] == ["r1", "r2"]
+    assert audio_format == "wav"
+    with wave.open(io.BytesIO(audio)) as wav:
+        assert (
+            wav.readframes(wav.getnframes())
+            == b"\x01\x00\x01\x00\x02\x00\x02\x00\x03\x00\x03\x00"
+        )
+    assert os.listdir(path) == []
+
+
+@pytest.mark.asyncio
+async def test_long_form_pins_model_and_latency(hass, tmp_path):
+    """Test adaptive latency does not pick settings per chunk."""
+    client = make_client(
+        hass,
+        str(tmp_path / "long_form"),
+        **{CONF_ADAPTIVE_LATENCY: True, CONF_MODEL: "eleven_multilingual_v2"},
+    )
+    # Choices that would change between the chunks if they were asked for
+    choices = itertools.cycle(
+        [("eleven_flash_v2_5", 4), ("eleven_turbo_v2_5", 2), ("eleven_v3", 0)]
+    )
+    requested: list[tuple[str, str]] = []
+
+    def _respond(request: httpx.Request) -> httpx.Response:
+        requested.append(
+            (
+                orjson.loads(request.content)["model_id"],
+                request.url.params["optimize_streaming_latency"],
+            )
+        )
+        return httpx.Response(200, content=b"\x00\x00")
+
+    with respx.mock, patch(
+        "custom_components.elevenlabs_tts.elevenlabs.LONG_FORM_CHUNK_CHARS", 20
+    ), patch.object(
+        client.latency_controller,
+        "choose",
+        side_effect=lambda length, hour, priority, model, level: (
+            (model, level) if model and level is not None else next(choices)
+        ),
+    ):
+        respx.get("https://api.elevenlabs.io/v1/voices/1/settings").respond(json={})
+        respx.post("https://api.elevenlabs.io/v1/text-to-speech/1").side_effect = (
+            _respond
+        )
+        await client.get_tts_audio(MESSAGE, {})
+
+    assert requested == [("eleven_multilingual_v2", "0")] * 3
@@ -0,0 +1,88 @@
+from homeassistant.const import CONF_API_KEY
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import respx
+
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.metadata import InvalidRequestError
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+MODELS = [
+    {
+        "model_id": "eleven_turbo_v2_5",
+        "can_do_text_to_speech": True,
+        "can_use_style": True,
+        "can_use_speaker_boost": True,
+        "max_characters_request_subscribed_user": 40000,
+    },
+    {
+        "model_id": "eleven_english_sts_v2",
+        "can_do_text_to_speech": False,
+    },
+    {
+        "model_id": "eleven_flash_v2_5",
+        "can_do_text_to_speech": True,
+        "max_characters_request_subscribed_user": 20,
+    },
+]
+
+
+@pytest.fixture
+async def client(hass):
+    client = ElevenLabsClient(
+        hass,
+        config_entry=MockConfigEntry(
+            domain="elevenlabs_tts", data={CONF_API_KEY: "test_api_key"}
+        ),
+    )
+    client.set_voices([VoiceRecord("1", "Laura")])
+    with respx.mock:
+        respx.get("https://api.elevenlabs.io/v1/models").respond(json=MODELS)
+        await client.metadata.async_refresh_models()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_request_uses_capabilities_and_voice_defaults(client):
+    """Test style is sent to any model supporting it, with the voice defaults."""
+    with respx.mock:
+        settings = respx.get("https://api.elevenlabs.io/v1/voices/1/settings")
+        settings.respond(json={"stability": 0.3, "similarity_boost": 0.9, "style": 0.2})
+
+        _, data, _, _ = await client.build_tts_request(
+            "Hello", {"voice": "Laura", "model": "eleven_turbo_v2_5"}
+        )
+        assert data["voice_settings"] == {
+            "stability": 0.3,
+            "similarity_boost": 0.9,
+            "style": 0.2,
+            "use_speaker_boost": True,
+        }
+
+        # Settings are cached until they expire
+        _, data, _, _ = await client.build_tts_request(
+            "Hello", {"voice": "Laura", "model": "eleven_flash_v2_5", "stability": 0.7}
+        )
+        assert data["voice_settings"] == {"stability": 0.7, "similarity_boost": 0.9}
+    assert settings.call_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("model", "message", "error"),
+    [
+        ("eleven_monolingual_v0", "Hello", "Unknown model"),
+        ("eleven_english_sts_v2", "Hello", "does not do text to speech"),
+        ("eleven_flash_v2_5", "A message longer than twenty", "longer than the 20"),
+    ],
+)
+async def test_invalid_requests_rejected_locally(client, model, message, error):
+    """Test requests ElevenLabs would reject fail without calling it."""
+    with respx.mock:
+        respx.get("https://api.elevenlabs.io/v1/voices/1/settings").respond(json={})
+        tts = respx.post("https://api.elevenlabs.io/v1/text-to-speech/1")
+        with pytest.raises(InvalidRequestError, match=error):
+            await client.get_tts_audio(
+                message, {"voice": "Laura", "model": model, "stability": 0.5}
+            )
+    assert tts.call_count == 0
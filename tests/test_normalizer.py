@@ -0,0 +1,75 @@
+import pytest
+
+from custom_components.elevenlabs_tts.normalizer import normalize_text
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("It is 21.5°C", "It is twenty-one point five degrees Celsius"),
+        ("1 kWh, 3 kWh", "one kilowatt hour, three kilowatt hours"),
+        (
+            "1,234,567 W",
+            "one million two hundred thirty-four thousand five hundred sixty-seven watts",
+        ),
+        ("-3 °F", "minus three degrees Fahrenheit"),
+        ("Battery at 45%", "Battery at forty-five percent"),
+        ("Wake up at 07:30", "Wake up at seven thirty"),
+        ("Lunch at 12:00", "Lunch at twelve o'clock"),
+        ("Due 2024-05-03", "Due May third, twenty twenty-four"),
+        ("Person is not_home", "Person is not home"),
+        ("Version 1.2.3, 5-10 km, 3/4, 42nd", "Version 1.2.3, 5-10 km, 3/4, 42nd"),
+        # Single letters are only units after a space
+        ("The 1990s, 30s, 3h, 100W", "The nineteen nineties, 30s, 3h, 100W"),
+        ("Wait 5 s, 2 h, 100 W", "Wait five seconds, two hours, one hundred watts"),
+        ("the '80s", "the eighties"),
+        (
+            "Pay $5, $1.50 or 0.99 €",
+            "Pay five dollars, one dollar and fifty cents or ninety-nine cents",
+        ),
+        ("-$3, US$5, £1", "minus three dollars, US$5, one pound"),
+        ("Quiet from 00:00 to 06:05", "Quiet from midnight to six oh five"),
+        ("25:99 and 2024-13-01", "25:99 and 2024-13-01"),
+        ("Walked 10 000 steps", "Walked ten thousand steps"),
+        (
+            "Call 555 123 4567",
+            "Call five hundred fifty-five one hundred twenty-three "
+            "four thousand five hundred sixty-seven",
+        ),
+        ("Due 2024-02-30", "Due 2024-02-30"),
+        ("Feed at 0:15", "Feed at twelve fifteen a.m."),
+        (
+            "Turned on light.living_room and input_boolean.guest_mode",
+            "Turned on light.living_room and input_boolean.guest_mode",
+        ),
+    ],
+)
+def test_normalize_english(text, expected):
+    """Test numbers, units, times, dates and states are spelled out in English."""
+    assert normalize_text(text, "en-US") == expected
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Es sind 21,5°C", "Es sind einundzwanzig Komma fünf Grad Celsius"),
+        ("1.234 W", "eintausendzweihundertvierunddreißig Watt"),
+        ("1 kWh, 1 h", "eine Kilowattstunde, eine Stunde"),
+        ("Wecker um 07:30", "Wecker um sieben Uhr dreißig"),
+        ("Am 2024-05-03", "Am dritten Mai zweitausendvierundzwanzig"),
+        ("1999-12-21", "einundzwanzigster Dezember neunzehnhundertneunundneunzig"),
+        ("In den 90ern, die 1980er", "In den neunzigern, die neunzehnhundertachtziger"),
+        ("Das kostet 5,50 €", "Das kostet fünf Euro und fünfzig Cent"),
+        ("Ruhe ab 0:00", "Ruhe ab null Uhr"),
+        ("10 000 Schritte", "zehntausend Schritte"),
+        ("2023-02-29", "2023-02-29"),
+    ],
+)
+def test_normalize_german(text, expected):
+    """Test German reads numbers, times and dates with its own rules."""
+    assert normalize_text(text, "de") == expected
+
+
+def test_normalize_unknown_language():
+    """Test languages without rules are left to ElevenLabs."""
+    assert normalize_text("21,5°C", "fr") is None
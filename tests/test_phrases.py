@@ -0,0 +1,158 @@
+import random
+
+from homeassistant.components.tts import ATTR_VOICE
+from homeassistant.const import CONF_API_KEY
+import httpx
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import respx
+
+from custom_components.elevenlabs_tts.cache import AudioCache, LocalCacheBackend
+from custom_components.elevenlabs_tts.const import (
+    CONF_OFFLINE_SIMILARITY,
+    CONF_SIMILARITY,
+    CONF_STABILITY,
+    CONF_TEXT_NORMALIZATION,
+    DOMAIN,
+)
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.phrases import PhraseIndex, normalize, tokens
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+
+def test_find_phrase():
+    """Test the most similar phrase of the same voice is found."""
+    index = PhraseIndex()
+    index.add("The washing machine is done.", "1", b"a", "mp3")
+    index.add("The dryer is done", "1", b"b", "mp3")
+    index.add("The washing machine is done now", "2", b"c", "mp3")
+
+    assert index.find("the WASHING machine, is done", "1", 0.8)[0].key == b"a"
+    phrase, score = index.find("The washing machine is now done", "1", 0.8)
+    assert (phrase.key, score) == (b"a", 5 / 6)
+    assert index.find("The washing machine is now done", "2", 0.8)[1] == 1.0
+    assert index.find("The oven is done", "1", 0.8) is None
+    assert index.find("...", "1", 0.8) is None
+    assert index.add("The dryer is done", "1", b"b", "mp3") is None
+    assert len(index) == 3
+
+
+def test_remove_phrase():
+    """Test a removed phrase is no longer found, but the others are."""
+    index = PhraseIndex()
+    index.add("The washing machine is done", "1", b"a", "mp3")
+    index.add("The washing machine is now done", "1", b"b", "mp3")
+
+    index.remove(b"a")
+    index.remove(b"unknown")
+    assert len(index) == 1
+    assert index.find("The washing machine is done", "1", 0.8)[0].key == b"b"
+    index.remove(b"b")
+    assert index.find("The washing machine is done", "1", 0.5) is None
+    assert not index._postings and not index._counts and not index._exact
+
+
+def test_find_phrase_matches_brute_force():
+    """Test the filters never miss the best phrase of a small index."""
+    rng = random.Random(1)
+    vocabulary = [f"word{number}" for number in range(20)]
+    texts = [" ".join(rng.choices(vocabulary, k=rng.randint(1, 8))) for _ in range(200)]
+    index = PhraseIndex()
+    for number, text in enumerate(texts):
+        index.add(text, "1", number.to_bytes(2, "big"), "mp3")
+
+    for _ in range(100):
+        query = " ".join(rng.choices(vocabulary, k=rng.randint(1, 8)))
+        words = tokens(normalize(query))
+        best = max(
+            len(words & tokens(text)) / len(words | tokens(text)) for text in texts
+        )
+        found = index.find(query, "1", 0.5)
+        if best < 0.5:
+            assert found is None
+        else:
+            assert found[1] == best
+
+
+def test_load_phrases(tmp_path):
+    """Test the log is replayed and rewritten once mostly stale."""
+    path = str(tmp_path / "phrases.jsonl")
+    index = PhraseIndex(path)
+    for key in (b"a", b"b", b"c"):
+        index.append(index.add(f"Phrase {key.decode()}", "1", key, "mp3"))
+    with open(path, "ab") as log:
+        log.write(b'{"text": "cut sh')
+
+    loaded = PhraseIndex(path)
+    loaded.load([b"a", b"c"])
+
+    assert len(loaded) == 2
+    assert loaded.find("phrase c", "1", 1.0)[0].key == b"c"
+    with open(path, "rb") as log:
+        assert len(log.readlines()) == 2
+
+
+@pytest.mark.asyncio
+async def test_offline_playback(hass, tmp_path):
+    """Test a similar cached phrase is played while ElevenLabs is unreachable."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        options={
+            CONF_STABILITY: 0.5,
+            CONF_SIMILARITY: 0.7,
+            CONF_OFFLINE_SIMILARITY: 0.7,
+        },
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    client.audio_cache = LocalCacheBackend(hass, AudioCache(str(tmp_path), 1024**2))
+    client.phrases = PhraseIndex()
+    with respx.mock:
+        route = respx.post("https://api.elevenlabs.io/v1/text-to-speech/1")
+        route.respond(content=b"mock_audio_data")
+        await client.get_tts_audio("Front door is open", {ATTR_VOICE: "Voice1"})
+        # A closer phrase whose clip was evicted from the cache since
+        client.phrases.add("The front door is open", "1", b"evicted", "mp3")
+
+        route.side_effect = httpx.ConnectError("offline")
+        audio = await client.get_tts_audio(
+            "The front door is open", {ATTR_VOICE: "Voice1"}
+        )
+        with pytest.raises(httpx.ConnectError):
+            await client.get_tts_audio("Back door is locked", {ATTR_VOICE: "1"})
+
+    assert audio == ("mp3", b"mock_audio_data")
+    assert len(client.phrases) == 1
+    await client.audio_cache.async_close()
+
+
+@pytest.mark.asyncio
+async def test_offline_playback_normalized(hass, tmp_path):
+    """Test a lookup normalizes the message like the phrases were indexed."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        options={
+            CONF_STABILITY: 0.5,
+            CONF_SIMILARITY: 0.7,
+            CONF_OFFLINE_SIMILARITY: 0.8,
+            CONF_TEXT_NORMALIZATION: "local",
+        },
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    client.audio_cache = LocalCacheBackend(hass, AudioCache(str(tmp_path), 1024**2))
+    client.phrases = PhraseIndex()
+    with respx.mock:
+        route = respx.post("https://api.elevenlabs.io/v1/text-to-speech/1")
+        route.respond(content=b"mock_audio_data")
+        await client.get_tts_audio("The temperature is 21°C", {ATTR_VOICE: "Voice1"})
+
+        route.side_effect = httpx.ConnectError("offline")
+        audio = await client.get_tts_audio(
+            "The temperature is now 21°C", {ATTR_VOICE: "Voice1"}
+        )
+
+    assert audio == ("mp3", b"mock_audio_data")
+    await client.audio_cache.async_close()
@@ -0,0 +1,85 @@
+from array import array
+import io
+import math
+import wave
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+
+from custom_components.elevenlabs_tts.postprocess import (
+    async_get_process_pool,
+    async_shutdown_process_pool,
+    normalize_gain,
+    process_audio,
+    resample,
+    trim_silence,
+)
+
+
+def _rms_db(samples: array) -> float:
+    rms = math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+    return 20 * math.log10(rms / 32767)
+
+
+def test_trim_silence_keeps_padding():
+    """Test leading and trailing silence is cut down to the padding."""
+    samples = array("h", [0] * 24000 + [1000] * 100 + [3] * 24000)
+    trimmed = trim_silence(samples, 24000)
+    # 50 ms of padding on each side
+    assert len(trimmed) == 100 + 2 * 1200
+    assert trim_silence(array("h", [0] * 100), 24000) == array("h")
+
+
+def test_normalize_gain_without_clipping():
+    """Test quiet clips are raised to the target and loud peaks never clip."""
+    quiet = array("h", [1000, -1000] * 1000)
+    assert round(_rms_db(normalize_gain(quiet, -20.0))) == -20
+
+    # A single peak limits the gain
+    peaky = array("h", [100] * 1000 + [30000])
+    assert max(normalize_gain(peaky, -6.0)) <= 32767
+
+
+def test_resample_length():
+    """Test resampling changes the number of samples by the rate ratio."""
+    samples = array("h", range(2400))
+    assert len(resample(samples, 24000, 16000)) == 1600
+    assert resample(samples, 24000, 24000) is samples
+
+
+def test_process_audio_returns_wav():
+    """Test the whole pipeline returns a WAV file and the stage timings."""
+    pcm = array("h", [0] * 2400 + [2000, -2000] * 2400).tobytes()
+    audio, timings = process_audio(pcm, 24000, 22050, -20.0)
+
+    with wave.open(io.BytesIO(audio)) as wav:
+        assert wav.getframerate() == 22050
+        assert wav.getnchannels() == 1
+    assert set(timings) == {"trim", "gain", "resample", "encode"}
+
+
+async def test_process_pool_shutdown(hass):
+    """Test the pool is stopped and a new one started on the next use."""
+    pool = async_get_process_pool(hass)
+    assert async_get_process_pool(hass) is pool
+
+    async_shutdown_process_pool(hass)
+    assert pool._shutdown_thread
+    assert async_get_process_pool(hass) is not pool
+    async_shutdown_process_pool(hass)
+
+
+async def test_process_pool_stop_listener_removed(hass):
+    """Test restarting the pool does not pile up stop listeners."""
+    listeners = hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_STOP, 0)
+    for _ in range(3):
+        async_get_process_pool(hass)
+        assert hass.bus.async_listeners()[EVENT_HOMEASSISTANT_STOP] == listeners + 1
+        async_shutdown_process_pool(hass)
+    assert hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_STOP, 0) == listeners
+
+    pool = async_get_process_pool(hass)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await hass.async_block_till_done()
+    assert pool._shutdown_thread
+    assert async_get_process_pool(hass) is not pool
+    async_shutdown_process_pool(hass)
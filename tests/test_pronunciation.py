@@ -0,0 +1,144 @@
+from unittest.mock import Mock
+
+from homeassistant.const import CONF_API_KEY
+import httpx
+import orjson
+import pytest
+import respx
+
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.pronunciation import PronunciationDictionaries
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+BASE_URL = "https://api.elevenlabs.io/v1/pronunciation-dictionaries"
+
+
+def _write_lexicon(path, content: str) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+@pytest.mark.asyncio
+async def test_sync_uploads_once_and_then_incrementally(hass, hass_storage, tmp_path):
+    """Test dictionaries are uploaded once and only changed rules are resent."""
+    client = ElevenLabsClient(hass, api_key="test_api_key")
+    lexicon = str(tmp_path / "lexicon.yaml")
+    _write_lexicon(
+        lexicon,
+        "places:\n"
+        "  - string: Worcester\n"
+        "    alias: Wuster\n"
+        "  - string: Reading\n"
+        "    alias: Redding\n",
+    )
+
+    with respx.mock:
+        create = respx.post(f"{BASE_URL}/add-from-rules").respond(
+            json={"id": "dict1", "version_id": "v1"}
+        )
+        dictionaries = PronunciationDictionaries(hass, client, "entry", lexicon)
+        await dictionaries.async_sync()
+
+        # An unchanged lexicon is not uploaded again
+        await dictionaries.async_sync()
+
+    assert create.call_count == 1
+    assert client.pronunciation_locators == [
+        {"pronunciation_dictionary_id": "dict1", "version_id": "v1"}
+    ]
+    assert (
+        hass_storage["elevenlabs_tts.pronunciation.entry"]["data"]["places"][
+            "version_id"
+        ]
+        == "v1"
+    )
+
+    _write_lexicon(
+        lexicon,
+        "places:\n"
+        "  - string: Worcester\n"
+        "    alias: Wuster\n"
+        "  - string: Leicester\n"
+        "    alias: Lester\n",
+    )
+    with respx.mock:
+        remove = respx.post(f"{BASE_URL}/dict1/remove-rules").respond(
+            json={"id": "dict1", "version_id": "v2"}
+        )
+        add = respx.post(f"{BASE_URL}/dict1/add-rules").respond(
+            json={"id": "dict1", "version_id": "v3"}
+        )
+        await dictionaries.async_sync()
+
+    assert orjson.loads(remove.calls[0].request.content) == {
+        "rule_strings": ["Reading"]
+    }
+    assert orjson.loads(add.calls[0].request.content) == {
+        "rules": [
+            {"type": "alias", "string_to_replace": "Leicester", "alias": "Lester"}
+        ]
+    }
+    assert client.pronunciation_locators == [
+        {"pronunciation_dictionary_id": "dict1", "version_id": "v3"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sync_failure_keeps_stored_locators(hass, hass_storage, tmp_path):
+    """Test a failed sync keeps speaking with the dictionaries synced before."""
+    hass_storage["elevenlabs_tts.pronunciation.entry"] = {
+        "version": 1,
+        "key": "elevenlabs_tts.pronunciation.entry",
+        "data": {
+            "places": {
+                "id": "dict1",
+                "version_id": "v1",
+                "hash": "stale",
+                "rules": [],
+            }
+        },
+    }
+    client = ElevenLabsClient(hass, api_key="test_api_key")
+    lexicon = str(tmp_path / "lexicon.yaml")
+    _write_lexicon(
+        lexicon,
+        "places:\n"
+        "  - string: Worcester\n"
+        "    alias: Wuster\n"
+        "names:\n"
+        "  - string: Siobhan\n"
+        "    alias: Shivawn\n",
+    )
+
+    with respx.mock:
+        respx.post(f"{BASE_URL}/dict1/add-rules").respond(
+            json={"id": "dict1", "version_id": "v2"}
+        )
+        respx.post(f"{BASE_URL}/add-from-rules").respond(503)
+        dictionaries = PronunciationDictionaries(hass, client, "entry", lexicon)
+        with pytest.raises(httpx.HTTPStatusError):
+            await dictionaries.async_sync()
+
+    # The dictionary updated before the failure is already in use
+    assert client.pronunciation_locators == [
+        {"pronunciation_dictionary_id": "dict1", "version_id": "v2"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_locators_sent_with_tts_request(hass):
+    """Test the locators are added to the TTS request body."""
+    client = ElevenLabsClient(
+        hass, config_entry=Mock(data={CONF_API_KEY: "test_api_key"}, options={})
+    )
+    client.set_voices([VoiceRecord("1", "Laura")])
+    client.pronunciation_locators = [
+        {"pronunciation_dictionary_id": "dict1", "version_id": "v1"}
+    ]
+
+    _, data, _, _ = await client.build_tts_request(
+        "Hello", {CONF_API_KEY: "test_api_key"}
+    )
+
+    assert data["text"] == "Hello"
+    assert data["pronunciation_dictionary_locators"] == client.pronunciation_locators
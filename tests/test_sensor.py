@@ -0,0 +1,32 @@
+from unittest.mock import Mock
+
+import pytest
+
+from custom_components.elevenlabs_tts.cache import MemoryCacheBackend
+from custom_components.elevenlabs_tts.const import DOMAIN
+from custom_components.elevenlabs_tts.sensor import async_setup_entry
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_sensors():
+    """Test the sensors report the hit ratio and size of the memory tier."""
+    memory = MemoryCacheBackend(1024)
+    memory.put(b"k", b"clip")
+    memory.get(b"k")
+    memory.get(b"other")
+    config_entry = Mock(entry_id="entry")
+    hass = Mock(data={DOMAIN: {"entry": Mock(memory_cache=memory)}})
+    async_add_entities = Mock()
+
+    await async_setup_entry(hass, config_entry, async_add_entities)
+
+    hit_ratio, size = async_add_entities.call_args[0][0]
+    assert hit_ratio.native_value == 50.0
+    assert hit_ratio.extra_state_attributes == {"hits": 1, "misses": 1}
+    assert size.native_value == 4
+    assert size.unique_id == "entry-memory_cache_size"
+
+    async_add_entities.reset_mock()
+    hass.data[DOMAIN]["entry"].memory_cache = None
+    await async_setup_entry(hass, config_entry, async_add_entities)
+    async_add_entities.assert_not_called()
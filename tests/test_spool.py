@@ -0,0 +1,111 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.elevenlabs_tts.spool import (
+    AudioSpool,
+    MemoryBudget,
+    async_get_memory_budget,
+)
+
+
+@pytest.mark.asyncio
+async def test_spool_in_memory(hass):
+    """Test a small response is read into a preallocated buffer."""
+    budget = MemoryBudget(limit=1000)
+    spool = AudioSpool(hass, budget, expected_size=100, threshold=500)
+    await spool.async_write(b"a" * 60)
+    await spool.async_write(b"b" * 40)
+
+    assert not spool.spooled
+    assert budget.used == 100
+    view = spool.view()
+    assert view.obj is spool._buffer and bytes(view) == b"a" * 60 + b"b" * 40
+    view.release()
+    # The buffer stays reserved while the copy is used, until the spool closes
+    assert await spool.async_read() == b"a" * 60 + b"b" * 40
+    assert budget.used == 100
+
+    spool.close()
+    assert budget.used == 0
+
+
+@pytest.mark.asyncio
+async def test_spool_to_file(hass):
+    """Test a response past the threshold moves to a temporary file."""
+    budget = MemoryBudget(limit=1000)
+    spool = AudioSpool(hass, budget, threshold=50)
+    await spool.async_write(b"a" * 40)
+    assert not spool.spooled and budget.used == 50
+    await spool.async_write(b"b" * 40)
+
+    assert spool.spooled
+    assert budget.used == 0
+    assert spool.size == 80
+    assert await spool.async_read() == b"a" * 40 + b"b" * 40
+    assert await spool.async_read() == b"a" * 40 + b"b" * 40
+    with pytest.raises(ValueError):
+        spool.view()
+    spool.close()
+
+
+@pytest.mark.asyncio
+async def test_spool_open_without_copy(hass):
+    """Test the audio is handed on as a view of the buffer or as the file."""
+    budget = MemoryBudget(limit=1000)
+    spool = AudioSpool(hass, budget, threshold=50)
+    await spool.async_write(b"a" * 40)
+    audio = await spool.async_open()
+    assert isinstance(audio, memoryview) and audio.obj is spool._buffer
+    audio.release()
+
+    await spool.async_write(b"b" * 40)
+    audio = await spool.async_open()
+    assert audio is spool._file
+    assert audio.read() == b"a" * 40 + b"b" * 40
+    spool.close()
+
+
+@pytest.mark.asyncio
+async def test_budget_backpressure(hass):
+    """Test responses spool once the budget is used and new requests wait."""
+    budget = async_get_memory_budget(hass)
+    assert async_get_memory_budget(hass) is budget
+    budget.limit = 100
+
+    first = AudioSpool(hass, budget, expected_size=100, threshold=200)
+    await first.async_write(b"a" * 100)
+    second = AudioSpool(hass, budget, threshold=200)
+    await second.async_write(b"b" * 10)
+    assert not first.spooled and second.spooled
+
+    waiter = asyncio.create_task(budget.async_wait_for_room())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    first.close()
+    await asyncio.wait_for(waiter, 1)
+    second.close()
+    assert budget.used == 0
+
+
+@pytest.mark.asyncio
+async def test_spooled_chunks_written_in_batches(hass):
+    """Test chunks after spooling are written to the file in batches."""
+    spool = AudioSpool(hass, MemoryBudget(limit=1000), threshold=10)
+    with patch("custom_components.elevenlabs_tts.spool.SPOOL_WRITE_BATCH", 30):
+        await spool.async_write(b"a" * 20)
+        assert spool.spooled
+        with patch.object(
+            hass, "async_add_executor_job", wraps=hass.async_add_executor_job
+        ) as executor:
+            for _ in range(4):
+                await spool.async_write(b"b" * 10)
+            # The chunk that spooled and two more, then three chunks
+            assert executor.call_count == 2
+            await spool.async_write(b"c" * 10)
+            assert executor.call_count == 2
+
+    assert await spool.async_read() == b"a" * 20 + b"b" * 40 + b"c" * 10
+    spool.close()
@@ -0,0 +1,115 @@
+import asyncio
+
+from homeassistant.setup import async_setup_component
+import pytest
+
+from custom_components.elevenlabs_tts.stream import (
+    AudioStreamBuffer,
+    StreamEvictedError,
+    async_get_stream_manager,
+    async_shutdown_streams,
+)
+
+
+@pytest.mark.asyncio
+async def test_buffer_late_reader_replays_from_start():
+    """Test a reader joining mid-stream gets the whole clip."""
+    buffer = AudioStreamBuffer(max_bytes=16)
+    await buffer.write(b"abc")
+    await buffer.write(b"def")
+
+    async def read_all():
+        return b"".join([chunk async for chunk in buffer.iter_from(0)])
+
+    reader = asyncio.create_task(read_all())
+    await asyncio.sleep(0)
+    await buffer.write(b"ghi")
+    await buffer.close()
+
+    assert await reader == b"abcdefghi"
+    # The buffer only grew as far as the clip
+    assert len(buffer._ring) == 9
+
+
+@pytest.mark.asyncio
+async def test_buffer_wraps_and_evicts():
+    """Test the ring stays bounded and refuses reads of dropped audio."""
+    buffer = AudioStreamBuffer(max_bytes=8)
+    await buffer.write(b"0123456")
+    await buffer.write(b"789")
+
+    assert buffer.start_offset == 2
+    assert buffer.read(2) == b"23456789"
+    with pytest.raises(StreamEvictedError):
+        buffer.read(0)
+
+    buffer = AudioStreamBuffer(max_bytes=8)
+    await buffer.write(b"0123456789")
+    assert buffer.read(2) == b"23456789"
+    assert len(buffer._ring) == 8
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+async def test_stream_view(hass, hass_client_no_auth):
+    """Test several players can fetch the same in-progress stream."""
+    assert await async_setup_component(hass, "http", {})
+    release = asyncio.Event()
+
+    async def chunks():
+        yield b"first-"
+        await release.wait()
+        yield b"second"
+
+    manager = async_get_stream_manager(hass)
+    stream_id = manager.async_start(chunks())
+    client = await hass_client_no_auth()
+
+    first = asyncio.create_task(
+        client.get(f"/api/elevenlabs_tts/stream/{stream_id}.mp3")
+    )
+    second = asyncio.create_task(
+        client.get(f"/api/elevenlabs_tts/stream/{stream_id}.mp3")
+    )
+    await asyncio.sleep(0.1)
+    release.set()
+
+    for response in await asyncio.gather(first, second):
+        assert response.status == 200
+        assert response.headers["Content-Type"] == "audio/mpeg"
+        assert await response.read() == b"first-second"
+
+    response = await client.get("/api/elevenlabs_tts/stream/unknown.mp3")
+    assert response.status == 404
+
+
+@pytest.mark.asyncio
+async def test_shutdown_streams(hass):
+    """Test unloading stops the streams and their linger timers."""
+    assert await async_setup_component(hass, "http", {})
+    started = asyncio.Event()
+
+    async def finished():
+        yield b"done"
+
+    async def endless():
+        started.set()
+        yield b"first"
+        await asyncio.Event().wait()
+
+    manager = async_get_stream_manager(hass)
+    done_id = manager.async_start(finished())
+    running_id = manager.async_start(endless())
+    running = manager.get(running_id)
+    await started.wait()
+    await hass.async_block_till_done()
+    assert manager._expirations.keys() == {done_id}
+
+    async_shutdown_streams(hass)
+    await asyncio.sleep(0)
+
+    assert manager.get(done_id) is None
+    assert manager.get(running_id) is None
+    assert not manager._expirations
+    # Players of the stopped stream are not left waiting
+    assert running.done
@@ -0,0 +1,90 @@
+from unittest.mock import Mock
+
+from homeassistant.const import CONF_API_KEY
+import orjson
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import respx
+
+from custom_components.elevenlabs_tts.cache import AudioCache, LocalCacheBackend
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.tracing import (
+    JsonlTraceHook,
+    Trace,
+    Tracer,
+    current_trace,
+    span,
+)
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+
+
+def test_tracing_disabled_is_a_no_op():
+    """Test nothing is recorded without hooks or debug logging."""
+    tracer = Tracer()
+    with tracer.trace("synthesis") as trace:
+        assert trace is None
+        assert current_trace() is None
+        with span("queue") as queue:
+            assert queue is None
+
+
+@pytest.mark.asyncio
+async def test_synthesis_spans(hass, tmp_path):
+    """Test a synthesis gets a request ID and a span per step."""
+    client = ElevenLabsClient(
+        hass,
+        config_entry=MockConfigEntry(
+            domain="elevenlabs_tts", data={CONF_API_KEY: "test_api_key"}
+        ),
+    )
+    client.set_voices([VoiceRecord("1", "Voice1")])
+    client.audio_cache = LocalCacheBackend(hass, AudioCache(str(tmp_path), 1024**2))
+    hook = Mock()
+    client.tracer.hooks.append(hook)
+
+    with respx.mock:
+        respx.get("https://api.elevenlabs.io/v1/voices/1/settings").respond(
+            json={"stability": 0.4, "similarity_boost": 0.8}
+        )
+        respx.post("https://api.elevenlabs.io/v1/text-to-speech/1").respond(
+            content=b"mock_audio_data"
+        )
+        await client.get_tts_audio("Hello", {"voice": "Voice1"})
+    await client.audio_cache.async_close()
+
+    trace: Trace = hook.handle.call_args[0][0]
+    assert len(trace.request_id) == 16
+    assert trace.attributes == {"chars": 5}
+    assert trace.error is None
+    assert [span.name for span in trace.spans] == [
+        "voice_lookup",
+        "resolve_options",
+        "cache_read",
+        "queue",
+        "memory_wait",
+        "transfer",
+        "cache_write",
+    ]
+    assert current_trace() is None
+
+
+@pytest.mark.asyncio
+async def test_jsonl_hook(hass, tmp_path):
+    """Test traces are appended as JSON lines."""
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer()
+    tracer.hooks.append(JsonlTraceHook(hass, str(path)))
+
+    with pytest.raises(ValueError):
+        with tracer.trace("synthesis", chars=5):
+            with span("queue"):
+                pass
+            raise ValueError
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(tracer.close)
+
+    record = orjson.loads(path.read_bytes().splitlines()[0])
+    assert record["name"] == "synthesis"
+    assert record["error"] == "ValueError"
+    assert record["attributes"] == {"chars": 5}
+    assert [span["name"] for span in record["spans"]] == ["queue"]
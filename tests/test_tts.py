@@ -1,9 +1,11 @@
-from unittest.mock import AsyncMock, Mock
+from unittest.mock import AsyncMock, Mock, patch
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+import httpx
 import pytest
 
+from custom_components.elevenlabs_tts.breaker import CircuitOpenError
 from custom_components.elevenlabs_tts.tts import (
     DOMAIN,
     ElevenLabsClient,
@@ -24,7 +26,20 @@ async def test_async_setup_entry():
     # Mock the DOMAIN dictionary for the HomeAssistant data
     hass.data = {DOMAIN: {config_entry.entry_id: client}}
 
-    await async_setup_entry(hass, config_entry, async_add_entities)
+    with patch(
+        "custom_components.elevenlabs_tts.tts.entity_platform.async_get_current_platform"
+    ) as mock_platform:
+        await async_setup_entry(hass, config_entry, async_add_entities)
+
+    # Ensure the entity services were registered on the platform
+    register = mock_platform.return_value.async_register_entity_service
+    assert [call.args[0] for call in register.call_args_list] == [
+        "stream_speak",
+        "queue_speak",
+        "wyoming_speak",
+        "export_cache",
+        "import_cache",
+    ]
 
     # Ensure async_add_entities was called with correct parameters
     async_add_entities.assert_called_once()
@@ -53,5 +68,66 @@ async def test_async_get_tts_audio():
     result = await provider.async_get_tts_audio(message, language, options)
 
     # ASSERT
-    client.get_tts_audio.assert_called_once_with(message, options)
+    client.get_tts_audio.assert_called_once_with(message, options | {"language": "en"})
     assert result == ("mocked_format", b"mocked_audio")
+
+
+@pytest.mark.asyncio
+async def test_async_get_tts_audio_fallback():
+    """Test the fallback TTS entity is used while the breaker is open."""
+    client = Mock()
+    client.get_tts_audio = AsyncMock(side_effect=CircuitOpenError("open"))
+    config_entry = Mock(options={"fallback_tts": "tts.piper"})
+    provider = ElevenLabsProvider(config_entry, client)
+    provider.hass = Mock()
+
+    with patch(
+        "custom_components.elevenlabs_tts.tts.generate_media_source_id",
+        return_value="media-source://tts/tts.piper",
+    ) as generate, patch(
+        "custom_components.elevenlabs_tts.tts.async_get_media_source_audio",
+        AsyncMock(return_value=("mp3", b"fallback_audio")),
+    ):
+        result = await provider.async_get_tts_audio("Hello world", "en", {})
+
+    assert result == ("mp3", b"fallback_audio")
+    generate.assert_called_once_with(
+        provider.hass, "Hello world", engine="tts.piper", language="en"
+    )
+
+    # Without a fallback the error is raised
+    provider = ElevenLabsProvider(Mock(options={}), client)
+    with pytest.raises(CircuitOpenError):
+        await provider.async_get_tts_audio("Hello world", "en", {})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("status", "falls_back"), [(400, False), (401, False), (500, True), (503, True)]
+)
+async def test_async_get_tts_audio_fallback_on_server_errors(status, falls_back):
+    """Test only server errors switch to the fallback TTS entity."""
+    request = httpx.Request("POST", "https://api.elevenlabs.io/v1/text-to-speech/1")
+    error = httpx.HTTPStatusError(
+        "error", request=request, response=httpx.Response(status, request=request)
+    )
+    client = Mock()
+    client.get_tts_audio = AsyncMock(side_effect=error)
+    provider = ElevenLabsProvider(Mock(options={"fallback_tts": "tts.piper"}), client)
+    provider.hass = Mock()
+
+    with patch(
+        "custom_components.elevenlabs_tts.tts.generate_media_source_id",
+        return_value="media-source://tts/tts.piper",
+    ), patch(
+        "custom_components.elevenlabs_tts.tts.async_get_media_source_audio",
+        AsyncMock(return_value=("mp3", b"fallback_audio")),
+    ):
+        if falls_back:
+            assert await provider.async_get_tts_audio("Hello", "en", {}) == (
+                "mp3",
+                b"fallback_audio",
+            )
+        else:
+            with pytest.raises(httpx.HTTPStatusError):
+                await provider.async_get_tts_audio("Hello", "en", {})
@@ -0,0 +1,164 @@
+import asyncio
+
+from homeassistant.const import CONF_API_KEY
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import respx
+
+from custom_components.elevenlabs_tts.const import (
+    CONF_SIMILARITY,
+    CONF_STABILITY,
+    DOMAIN,
+)
+from custom_components.elevenlabs_tts.elevenlabs import ElevenLabsClient
+from custom_components.elevenlabs_tts.tts import ElevenLabsProvider
+from custom_components.elevenlabs_tts.voices import VoiceRecord
+from custom_components.elevenlabs_tts.wyoming import (
+    async_read_event,
+    async_stream_to_wyoming,
+)
+
+
+class WyomingSoundService:
+    """A stand-in of a satellite's sound service, recording the events."""
+
+    def __init__(self, confirm: bool = True) -> None:
+        """Initialize the stand-in."""
+        self.confirm = confirm
+        self.events: list[tuple[str, dict, bytes]] = []
+        self.first_chunk_at: float | None = None
+        self._server: asyncio.Server | None = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        while True:
+            event = await async_read_event(reader)
+            self.events.append(event)
+            if event[0] == "audio-chunk" and self.first_chunk_at is None:
+                self.first_chunk_at = asyncio.get_running_loop().time()
+            if event[0] == "audio-stop":
+                break
+        if self.confirm:
+            writer.write(b'{"type": "played"}\n')
+            await writer.drain()
+        writer.close()
+
+    async def start(self) -> int:
+        """Listen on a free local port and return it."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop listening."""
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def pcm(self) -> bytes:
+        """Return the audio of the chunks received."""
+        return b"".join(
+            payload for kind, _, payload in self.events if kind == "audio-chunk"
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("confirm", [True, False])
+async def test_stream_to_wyoming(socket_enabled, confirm):
+    """Test chunks are forwarded as they arrive, cut at sample boundaries."""
+    service = WyomingSoundService(confirm)
+    port = await service.start()
+    more_audio = asyncio.Event()
+
+    async def audio():
+        yield b"\x01\x02\x03"
+        # The first chunk plays before the rest of the clip is synthesized
+        await more_audio.wait()
+        yield b"\x04\x05"
+
+    async def release_when_first_chunk_arrives():
+        while service.first_chunk_at is None:
+            await asyncio.sleep(0.001)
+        more_audio.set()
+
+    releaser = asyncio.create_task(release_when_first_chunk_arrives())
+    await async_stream_to_wyoming(audio(), "127.0.0.1", port, 16000)
+    await releaser
+    await service.close()
+
+    kinds = [kind for kind, _, _ in service.events]
+    assert kinds == ["audio-start", "audio-chunk", "audio-chunk", "audio-stop"]
+    assert service.events[0][1] == {"rate": 16000, "width": 2, "channels": 1}
+    assert [len(payload) for _, _, payload in service.events] == [0, 2, 2, 0]
+    assert service.pcm == b"\x01\x02\x03\x04"
+
+
+@pytest.mark.asyncio
+async def test_wyoming_speak(hass, socket_enabled):
+    """Test the entity service streams PCM at the satellite's rate."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        options={CONF_STABILITY: 0.5, CONF_SIMILARITY: 0.7},
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Laura")])
+    provider = ElevenLabsProvider(entry, client)
+    provider.hass = hass
+    service = WyomingSoundService()
+    port = await service.start()
+
+    with respx.mock:
+        route = respx.post(
+            "https://api.elevenlabs.io/v1/text-to-speech/1/stream"
+        ).respond(content=b"\x00\x01" * 100)
+        await provider.async_wyoming_speak("Hello", "127.0.0.1", port, 22050, {})
+        with pytest.raises(HomeAssistantError):
+            await provider.async_wyoming_speak("Hello", "127.0.0.1", 1, 22050, {})
+    await service.close()
+
+    assert route.calls[0].request.url.params["output_format"] == "pcm_22050"
+    assert service.pcm == b"\x00\x01" * 100
+
+
+@pytest.mark.asyncio
+async def test_wyoming_speak_to_satellite_entity(hass, socket_enabled):
+    """Test the host is taken from the Wyoming entry of a satellite entity."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        options={CONF_STABILITY: 0.5, CONF_SIMILARITY: 0.7},
+    )
+    client = ElevenLabsClient(hass, config_entry=entry)
+    client.set_voices([VoiceRecord("1", "Laura")])
+    provider = ElevenLabsProvider(entry, client)
+    provider.hass = hass
+
+    satellite_entry = MockConfigEntry(
+        domain="wyoming", data={"host": "127.0.0.1", "port": 10700}
+    )
+    satellite_entry.add_to_hass(hass)
+    registry = er.async_get(hass)
+    satellite = registry.async_get_or_create(
+        "binary_sensor", "wyoming", "kitchen", config_entry=satellite_entry
+    ).entity_id
+    other = registry.async_get_or_create("sensor", "demo", "other").entity_id
+
+    service = WyomingSoundService()
+    port = await service.start()
+    with respx.mock:
+        respx.post("https://api.elevenlabs.io/v1/text-to-speech/1/stream").respond(
+            content=b"\x00\x01" * 100
+        )
+        await provider.async_wyoming_speak(
+            "Hello", port=port, rate=16000, options={}, satellite=satellite
+        )
+        with pytest.raises(HomeAssistantError):
+            await provider.async_wyoming_speak("Hello", port=port, satellite=other)
+        with pytest.raises(HomeAssistantError):
+            await provider.async_wyoming_speak("Hello", port=port)
+    await service.close()
+
+    assert service.pcm == b"\x00\x01" * 100